@@ -0,0 +1,81 @@
+import time
+
+from config.settings import (
+    ARCHIVE_RESEARCH_MIN_SIMILARITY,
+    ARCHIVE_REUSE,
+    ARCHIVE_SEED_MIN_SCORE,
+    ARCHIVE_SEED_MIN_SIMILARITY,
+    RESEARCH_TTL_SECONDS,
+    get_draft_archive,
+)
+from graph.state import BlogState
+
+# Candidates considered per lookup (the nearest one may be too weak to seed from)
+RECALL_CANDIDATES = 5
+
+
+def recall_node(state: BlogState) -> BlogState:
+    """
+    Before the first iteration: look up the nearest archived run. A close,
+    high-scoring run seeds the first draft (state['seed_draft']); a very
+    close one archived within RESEARCH_TTL_SECONDS (the research store's
+    freshness window) also lends its research notes, so planning and search
+    are skipped. Pure Python, like the orchestrator: no LLM is used here.
+    """
+    if state.get("guardrails_valid") is False:
+        return {}
+    hits = get_draft_archive().similar(
+        state["topic"],
+        state.get("constraints", ""),
+        k=RECALL_CANDIDATES,
+        min_similarity=min(ARCHIVE_SEED_MIN_SIMILARITY, ARCHIVE_RESEARCH_MIN_SIMILARITY),
+    )
+    seed = next(
+        (
+            h for h in hits
+            if h["similarity"] >= ARCHIVE_SEED_MIN_SIMILARITY and h["best_score"] >= ARCHIVE_SEED_MIN_SCORE
+        ),
+        None,
+    ) if "draft" in ARCHIVE_REUSE else None
+    fresh_after = time.time() - RESEARCH_TTL_SECONDS
+    research = next(
+        (
+            h for h in hits
+            if h["similarity"] >= ARCHIVE_RESEARCH_MIN_SIMILARITY
+            and h["research_notes"]
+            and h["created_at"] >= fresh_after
+        ),
+        None,
+    ) if "research" in ARCHIVE_REUSE else None
+
+    update: BlogState = {}
+    if seed is not None:
+        update["seed_draft"] = seed["best_draft"]
+        update["archive_match"] = {
+            "id": seed["id"],
+            "topic": seed["topic"],
+            "similarity": seed["similarity"],
+            "best_score": seed["best_score"],
+        }
+    if research is not None:
+        update["research_notes"] = research["research_notes"]
+        update.setdefault("archive_match", {"id": research["id"], "topic": research["topic"],
+                                            "similarity": research["similarity"]})
+        update["archive_match"]["research_from"] = research["id"]
+    return update
+
+
+def archive_node(state: BlogState) -> BlogState:
+    """After the run: store the finished run so later runs can start from it."""
+    if state.get("guardrails_valid") is False or not state.get("best_draft"):
+        return {}
+    get_draft_archive().add(
+        state["topic"],
+        state.get("tone", ""),
+        state.get("constraints", ""),
+        state.get("word_count", 800),
+        state["best_draft"],
+        state.get("best_score", 0.0),
+        state.get("research_notes", ""),
+    )
+    return {}
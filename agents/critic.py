@@ -1,11 +1,37 @@
+import asyncio
+import re
+from typing import Dict, List, Optional, Tuple
+
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 
-from config.settings import get_critic_llm
-from utils.prompt_loader import load_prompt
+from config.settings import (
+    CRITIC_ASPECT_WEIGHTS,
+    CRITIC_CALIBRATION,
+    CRITIC_EXCERPT_TOKEN_BUDGET,
+    CRITIC_MODE,
+    CRITIC_PRESCORE,
+    CRITIC_RESEARCH_TOKEN_BUDGET,
+    GENERATOR_CANDIDATE_CONCURRENCY,
+    PRESCORE_MAX_LENGTH_RATIO,
+    PRESCORE_MAX_REPETITION,
+    PRESCORE_MIN_KEYWORD_COVERAGE,
+    PRESCORE_MIN_LENGTH_RATIO,
+    RESEARCH_CHUNK_TOKENS,
+    RESEARCH_TOP_K,
+    get_critic_llm,
+    get_prompt_registry,
+    get_score_calibration,
+)
+from utils.draft_sections import split_sections
+from utils.prompt_budget import compress_text, truncate_text
+from utils.research_chunks import relevant_chunks
+from utils.text_metrics import PreScore, extract_keywords, prescore
 from graph.state import BlogState
 
-critic_llm = get_critic_llm(temperature=0.0)
+
+def critic_llm(tier: int = 0):
+    return get_critic_llm(temperature=0.0, agent="critic", tier=tier)
 
 
 class CriticScore(BaseModel):
@@ -28,60 +54,289 @@ class CriticScore(BaseModel):
     short_feedback: str = Field(
         description="Short constructive feedback on how to improve the blog."
     )
+    weak_sections: List[str] = Field(
+        default_factory=list,
+        description="Exact headings of the sections that most need rework; empty if none stands out.",
+    )
 
 
-def critic_node(state: BlogState) -> BlogState:
-    draft = state.get("draft", "")
+get_prompt_registry().register(
+    "critic",
+    system="critic_system",
+    human=(
+        "Evaluate this blog draft.\n\n"
+        "Topic: {topic}\nTone: {tone}\nConstraints: {constraints}\n"
+        "Iteration: {iteration}\n\n"
+        "{metrics}"
+        "{evidence}"
+        "Draft:\n{draft}"
+    ),
+    variables=("topic", "tone", "constraints", "iteration", "metrics", "evidence", "draft"),
+)
+
+
+class AspectScore(BaseModel):
+    """Score of one aspect of the blog (ensemble critic)."""
+    score: int = Field(description="Score for this aspect between 1 and 10.")
+    feedback: str = Field(description="Short, actionable feedback on this aspect only.")
+    weak_sections: List[str] = Field(
+        default_factory=list,
+        description="Exact headings of the sections weakest on this aspect; empty if none stands out.",
+    )
+
+
+# Ensemble aspects (each fills CriticScore.<aspect>_score): label, what they judge
+ASPECTS = {
+    "grammar": ("Grammar", "Grammar, clarity and readability: typos, awkward phrasing, run-on sentences."),
+    "depth": ("Depth", "Depth and correctness of topic coverage: key information, examples, evidence; "
+                       "surface-level content scores low."),
+    "structure": ("Structure", "Structure and flow: introduction, headings, section balance, transitions, conclusion."),
+    "seo_alignment": ("SEO", "SEO alignment: keywords in the title, headings and opening; scannable headings."),
+}
+
+get_prompt_registry().register(
+    "critic_aspect",
+    system="critic_aspect_system",
+    human=(
+        "Aspect: {aspect}\nWhat to judge: {rubric}\n\n"
+        "Topic: {topic}\nTone: {tone}\nConstraints: {constraints}\n"
+        "Iteration: {iteration}\n\n"
+        "{metrics}"
+        "{evidence}"
+        "Excerpt ({excerpt_kind}):\n{excerpt}"
+    ),
+    variables=(
+        "aspect", "rubric", "topic", "tone", "constraints", "iteration", "metrics", "evidence",
+        "excerpt_kind", "excerpt",
+    ),
+)
+
+
+def _evidence(state: BlogState, draft: str) -> str:
+    """The research-note chunks most relevant to the draft's topic and headings, as a prompt block."""
+    notes = state.get("research_notes", "")
+    if CRITIC_RESEARCH_TOKEN_BUDGET <= 0 or not notes:
+        return ""
+    headings = " ".join(h for h, _ in split_sections(draft) if h)
+    chunks = relevant_chunks(
+        notes, f"{state['topic']} {headings}", CRITIC_RESEARCH_TOKEN_BUDGET, RESEARCH_TOP_K, RESEARCH_CHUNK_TOKENS
+    )
+    return f"Research evidence (most relevant excerpts of the notes):\n{chunks}\n\n" if chunks else ""
+
+
+def _outline_excerpt(draft: str) -> str:
+    lines = []
+    for heading, body in split_sections(draft):
+        sentences = re.split(r"(?<=[.!?])\s+", " ".join(body.split()))
+        sample = sentences[0] if len(sentences) == 1 else f"{sentences[0]} … {sentences[-1]}"
+        lines.append(f"{heading or '(before the first heading)'} [{len(body.split())} words] {sample}")
+    return "\n".join(lines)
+
+
+def _excerpt(aspect: str, draft: str) -> Tuple[str, str]:
+    """(description, text) of the part of the draft an aspect is judged on."""
+    budget = CRITIC_EXCERPT_TOKEN_BUDGET
+    if aspect == "structure":
+        return "each heading, its length, first and last sentence", truncate_text(_outline_excerpt(draft), budget)
+    if aspect == "seo_alignment":
+        sections = split_sections(draft)
+        opening = next((body for _, body in sections if body.strip()), "")
+        text = "\n".join(h for h, _ in sections if h) + "\n\nOpening:\n" + opening
+        return "headings and opening paragraph", truncate_text(text, budget)
+    if aspect == "grammar":
+        return "a sample of the prose", compress_text(draft, budget // 2)
+    return "the draft, each section shortened to fit", compress_text(draft, budget)
+
+
+def _aspect_messages(state: BlogState, aspect: str, draft: str, pre: Optional[PreScore]):
+    excerpt_kind, excerpt = _excerpt(aspect, draft)
+    return get_prompt_registry().get("critic_aspect").format_messages(
+        aspect=aspect,
+        rubric=ASPECTS[aspect][1],
+        topic=state["topic"],
+        tone=state.get("tone", ""),
+        constraints=state.get("constraints", ""),
+        iteration=state.get("iteration", 0),
+        metrics=f"Measured metrics (exact, do not recount): {pre.summary()}\n\n" if pre else "",
+        # only depth is judged against the research
+        evidence=_evidence(state, draft) if aspect == "depth" else "",
+        excerpt_kind=excerpt_kind,
+        excerpt=excerpt,
+    )
+
+
+def _combine(results: Dict[str, AspectScore]) -> CriticScore:
+    """One verdict from the aspect scores: calibrated, weighted, weakest aspects' feedback first."""
+    points = {aspect: min(10, max(1, int(r.score))) for aspect, r in results.items()}
+    calibrated = get_score_calibration().calibrate(points) if CRITIC_CALIBRATION else dict(points)
+
+    weights = {aspect: CRITIC_ASPECT_WEIGHTS.get(aspect, 1.0) for aspect in ASPECTS}
+    total = sum(weights.values()) or 1.0
+    overall = sum(weights[a] * calibrated[a] for a in ASPECTS) / total / 10
+
+    ranked = sorted(ASPECTS, key=lambda a: calibrated[a])
+    feedback = " ".join(
+        f"{ASPECTS[a][0]} ({points[a]}/10): {results[a].feedback.strip()}"
+        for a in ranked[:2]
+    )
+    weak_sections: List[str] = []
+    for a in ranked:
+        weak_sections += [h for h in results[a].weak_sections if h not in weak_sections]
+    return CriticScore(
+        overall_score=round(overall, 3),
+        short_feedback=feedback,
+        weak_sections=weak_sections,
+        **{f"{aspect}_score": points[aspect] for aspect in ASPECTS},
+    )
+
+
+def _build_messages(state: BlogState, draft: Optional[str] = None, pre: Optional[PreScore] = None):
+    draft = state.get("draft", "") if draft is None else draft
     topic = state["topic"]
     tone = state.get("tone", "")
     constraints = state.get("constraints", "")
     iteration = state.get("iteration", 0)
 
-    system_prompt = load_prompt("critic_system")
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_prompt),
-            (
-                "human",
-                "Evaluate this blog draft.\n\n"
-                "Topic: {topic}\nTone: {tone}\nConstraints: {constraints}\n"
-                "Iteration: {iteration}\n\n"
-                "Draft:\n{draft}",
-            ),
-        ]
-    )
-
-    messages = prompt.format_messages(
+    return get_prompt_registry().get("critic").format_messages(
         topic=topic,
         tone=tone,
         constraints=constraints,
         iteration=iteration,
+        metrics=f"Measured metrics (exact, do not recount): {pre.summary()}\n\n" if pre else "",
+        evidence=_evidence(state, draft),
         draft=draft,
     )
 
-    structured_llm = critic_llm.with_structured_output(CriticScore)
-    result: CriticScore = structured_llm.invoke(messages)
 
-    # Store current score
+def _apply_score(
+    state: BlogState, draft: str, result: CriticScore, pre: Optional[PreScore] = None, source: str = "llm"
+) -> BlogState:
+    """State update for one scored draft (only the keys the critic changes)."""
     last_score = float(result.overall_score)
-    state["last_score"] = last_score
-    state["critic_feedback"] = result.short_feedback
-
-    # Track score history
-    scores_list = state.get("confidence_scores", [])
-    scores_list.append(last_score)
-    state["confidence_scores"] = scores_list
+    update: BlogState = {
+        "critic_source": source,
+        "last_score": last_score,
+        "critic_feedback": result.short_feedback,
+        "critic_sections": list(result.weak_sections),
+        # appended by the reducers in graph/state.py: bounded score history,
+        # and feedback merged into the deduplicated mistake memory
+        "confidence_scores": [last_score],
+        # an unchanged draft repeats feedback that is already remembered
+        "mistake_memory": [] if source == "unchanged" else [result.short_feedback],
+    }
+    if source == "llm" and CRITIC_MODE == "ensemble" and CRITIC_CALIBRATION:
+        # the history gets the kept draft's raw aspect points once per round,
+        # not every best-of-N candidate scored on the way
+        get_score_calibration().record({a: getattr(result, f"{a}_score") for a in ASPECTS})
+    if pre is not None:
+        update["draft_metrics"] = pre.metrics
+        update["draft_fingerprint"] = pre.fingerprint
 
     # Update best draft if this is better
-    best_score = state.get("best_score", 0.0)
-    if last_score > best_score:
-        state["best_score"] = last_score
-        state["best_draft"] = draft
+    if last_score > state.get("best_score", 0.0):
+        update["best_score"] = last_score
+        update["best_draft"] = draft
+
+    return update
+
+
+def _prescore(state: BlogState, draft: str) -> Optional[PreScore]:
+    if not CRITIC_PRESCORE:
+        return None
+    return prescore(
+        draft,
+        state.get("word_count", 800),
+        extract_keywords(state.get("topic", ""), state.get("constraints", "")),
+        previous_fingerprint=state.get("draft_fingerprint"),
+        min_length_ratio=PRESCORE_MIN_LENGTH_RATIO,
+        max_length_ratio=PRESCORE_MAX_LENGTH_RATIO,
+        min_keyword_coverage=PRESCORE_MIN_KEYWORD_COVERAGE,
+        max_repetition=PRESCORE_MAX_REPETITION,
+    )
+
+
+def _local_score(state: BlogState, pre: Optional[PreScore]) -> Optional[Tuple[CriticScore, str]]:
+    """A verdict that needs no LLM: unchanged draft, or hard local failures."""
+    if pre is None:
+        return None
+    if pre.unchanged and state.get("critic_feedback"):
+        fields = pre.fields()
+        fields["overall_score"] = state.get("last_score", 0.0)
+        fields["weak_sections"] = state.get("critic_sections", [])
+        prefix = "The draft did not change since the last review; apply this feedback: "
+        feedback = state["critic_feedback"]
+        fields["short_feedback"] = feedback if feedback.startswith(prefix) else prefix + feedback
+        return CriticScore(**fields), "unchanged"
+    if pre.hard_fails:
+        return CriticScore(**pre.fields()), "prescore"
+    return None
+
+
+def _structured_critic(state: BlogState):
+    schema = AspectScore if CRITIC_MODE == "ensemble" else CriticScore
+    return critic_llm(state.get("model_tier", 0)).with_structured_output(schema)
+
+
+def _score(state: BlogState, structured_llm, draft: str) -> Tuple[CriticScore, Optional[PreScore], str]:
+    pre = _prescore(state, draft)
+    local = _local_score(state, pre)
+    if local is not None:
+        return local[0], pre, local[1]
+    if CRITIC_MODE == "ensemble":
+        with ContextThreadPoolExecutor(max_workers=len(ASPECTS)) as pool:
+            scores = pool.map(lambda a: structured_llm.invoke(_aspect_messages(state, a, draft, pre)), ASPECTS)
+            return _combine(dict(zip(ASPECTS, scores))), pre, "llm"
+    return structured_llm.invoke(_build_messages(state, draft, pre)), pre, "llm"
 
-    # Accumulate feedback for future iterations
-    mistake_memory = state.get("mistake_memory", [])
-    mistake_memory.append(result.short_feedback)
-    state["mistake_memory"] = mistake_memory
 
-    return state
\ No newline at end of file
+async def _ascore(state: BlogState, structured_llm, draft: str) -> Tuple[CriticScore, Optional[PreScore], str]:
+    pre = _prescore(state, draft)
+    local = _local_score(state, pre)
+    if local is not None:
+        return local[0], pre, local[1]
+    if CRITIC_MODE == "ensemble":
+        scores = await asyncio.gather(
+            *(structured_llm.ainvoke(_aspect_messages(state, a, draft, pre)) for a in ASPECTS)
+        )
+        return _combine(dict(zip(ASPECTS, scores))), pre, "llm"
+    return await structured_llm.ainvoke(_build_messages(state, draft, pre)), pre, "llm"
+
+
+def _select_candidate(state: BlogState, scored: List[Tuple[CriticScore, Optional[PreScore], str]]) -> BlogState:
+    """Promote the highest-scoring best-of-N candidate to the current draft."""
+    drafts = state["candidate_drafts"]
+    best = max(range(len(drafts)), key=lambda i: scored[i][0].overall_score)
+    update = _apply_score(state, drafts[best], *scored[best])
+    update["candidate_scores"] = [float(result.overall_score) for result, _, _ in scored]
+    update["draft"] = drafts[best]
+    update["candidate_drafts"] = []
+    return update
+
+
+def critic_node(state: BlogState) -> BlogState:
+    structured_llm = _structured_critic(state)
+    candidates = state.get("candidate_drafts") or []
+    if candidates:
+        with ContextThreadPoolExecutor(max_workers=GENERATOR_CANDIDATE_CONCURRENCY) as pool:
+            scored = list(pool.map(lambda d: _score(state, structured_llm, d), candidates))
+        return _select_candidate(state, scored)
+
+    draft = state.get("draft", "")
+    return _apply_score(state, draft, *_score(state, structured_llm, draft))
+
+
+async def critic_node_async(state: BlogState) -> BlogState:
+    structured_llm = _structured_critic(state)
+    candidates = state.get("candidate_drafts") or []
+    if candidates:
+        semaphore = asyncio.Semaphore(GENERATOR_CANDIDATE_CONCURRENCY)
+
+        async def score(draft: str):
+            async with semaphore:
+                return await _ascore(state, structured_llm, draft)
+
+        scored = await asyncio.gather(*(score(d) for d in candidates))
+        return _select_candidate(state, list(scored))
+
+    draft = state.get("draft", "")
+    return _apply_score(state, draft, *(await _ascore(state, structured_llm, draft)))
@@ -1,51 +1,191 @@
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
 
-from config.settings import get_llm
-from utils.prompt_loader import load_prompt
+from pydantic import BaseModel, Field
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from config.settings import (
+    GENERATOR_CANDIDATE_CONCURRENCY,
+    GENERATOR_CANDIDATE_TEMPERATURES,
+    GENERATOR_CANDIDATES,
+    GENERATOR_FEEDBACK_TOKEN_BUDGET,
+    GENERATOR_RESEARCH_TOKEN_BUDGET,
+    GENERATOR_REVISION_MODE,
+    GENERATOR_SECTION_CONCURRENCY,
+    GENERATOR_SECTION_RESEARCH_TOKEN_BUDGET,
+    GENERATOR_SECTION_TRANSITIONS,
+    GENERATOR_SECTIONS_MIN_WORDS,
+    RESEARCH_CHUNK_TOKENS,
+    RESEARCH_TOP_K,
+    get_llm,
+    get_prompt_registry,
+)
+from utils.draft_sections import (
+    apply_section_edits,
+    join_sections,
+    normalize_heading,
+    split_sections,
+    strip_heading,
+)
+from utils.prompt_budget import compress_text, count_section_tokens, truncate_text
+from utils.research_chunks import relevant_chunks
+from utils.resilience import is_model_failure
+from utils.tracing import note_degraded
 from graph.state import BlogState
+from graph.streaming import get_event_writer, tokens_requested
 
-generator_llm = get_llm(temperature=0.7)
 
+logger = logging.getLogger(__name__)
 
-def generator_node(state: BlogState) -> BlogState:
+
+def generator_llm(temperature: float = 0.7, tier: int = 0):
+    return get_llm(temperature=temperature, agent="generator", tier=tier)
+
+
+# Best-of-N candidates differ in temperature and in one of these angles
+CANDIDATE_ANGLES = (
+    "",
+    "Open with a concrete, real-world example before the main points.",
+    "Lead with the key takeaway, then support it section by section.",
+    "Use a practical, step-by-step structure with actionable advice.",
+    "Frame the post around the most common questions readers ask.",
+)
+
+
+class SectionEdit(BaseModel):
+    heading: str = Field(
+        description="Exact heading of the section to replace (as in the draft), or a new heading to add."
+    )
+    content: str = Field(
+        description="Complete new body of that section, without the heading line."
+    )
+
+
+class DraftRevision(BaseModel):
+    """Section-level edits to apply to the previous draft."""
+    edits: List[SectionEdit] = Field(
+        default_factory=list,
+        description="Only the sections that must change; unchanged sections are omitted.",
+    )
+
+
+class OutlineSection(BaseModel):
+    heading: str = Field(description="Section heading, without '#'.")
+    key_points: List[str] = Field(
+        default_factory=list, description="Two to four points the section must cover."
+    )
+    words: int = Field(description="Word budget for the section.")
+
+
+class BlogOutline(BaseModel):
+    """Plan of a long post, whose sections are then written independently."""
+    title: str = Field(description="Title of the post.")
+    sections: List[OutlineSection] = Field(
+        description="Sections in reading order: introduction first, conclusion last."
+    )
+
+
+class SectionTransitions(BaseModel):
+    """Bridging sentences between separately written sections."""
+    bridges: List[str] = Field(
+        default_factory=list,
+        description="One sentence per boundary, in order, ending the earlier section and leading into the next.",
+    )
+
+
+def _is_revision(state: BlogState) -> bool:
+    return (
+        state.get("iteration", 1) > 1
+        and bool(state.get("draft", ""))
+        and bool(state.get("critic_feedback", ""))
+    )
+
+
+def _use_patches(state: BlogState) -> bool:
+    return GENERATOR_REVISION_MODE == "patch" and _is_revision(state)
+
+
+def _seed_topic(state: BlogState) -> str:
+    return (state.get("archive_match") or {}).get("topic", "")
+
+
+def _use_sections(state: BlogState) -> bool:
+    return 0 < GENERATOR_SECTIONS_MIN_WORDS <= state.get("word_count", 800)
+
+
+get_prompt_registry().register(
+    "generator",
+    system="generator_system",
+    human=(
+        "You are writing or revising a blog.\n\n"
+        "Topic: {topic}\n"
+        "Tone: {tone}\n"
+        "Target word count: {word_count}\n"
+        "Additional constraints: {constraints}\n"
+        "Iteration: {iteration}\n\n"
+        "Research notes (source of truth):\n{research_notes}\n\n"
+        "GLOBAL MISTAKE MEMORY (mistakes you must NOT repeat):\n"
+        "{mistake_memory_text}\n\n"
+        "{revision_instructions}"
+    ),
+    variables=(
+        "topic", "tone", "word_count", "constraints", "iteration",
+        "research_notes", "mistake_memory_text", "revision_instructions",
+    ),
+)
+
+
+def _mistake_memory_text(state: BlogState) -> str:
+    # 🧠 list of past mistakes / feedback across iterations
+    mistake_memory = state.get("mistake_memory", [])
+    # To avoid super-long prompts, just use the last few
+    recent_mistakes = mistake_memory[-3:] if mistake_memory else []
+    return truncate_text(
+        "\n\n".join(recent_mistakes), GENERATOR_FEEDBACK_TOKEN_BUDGET
+    ) if recent_mistakes else "None yet."
+
+
+def _revision_research(state: BlogState, critic_feedback: str) -> str:
+    """The note chunks most relevant to the critic's feedback and flagged sections."""
+    query = " ".join([state["topic"], critic_feedback] + list(state.get("critic_sections") or []))
+    return relevant_chunks(
+        state.get("research_notes", ""), query, GENERATOR_RESEARCH_TOKEN_BUDGET, RESEARCH_TOP_K, RESEARCH_CHUNK_TOKENS
+    )
+
+
+def _build_messages(state: BlogState, angle: str = "") -> Tuple[list, Dict[str, int]]:
+    """Prompt messages plus estimated tokens per prompt section."""
     topic = state["topic"]
     tone = state.get("tone", "")
     word_count = state.get("word_count", 800)
     constraints = state.get("constraints", "")
-    research_notes = state.get("research_notes", "")
 
     iteration = state.get("iteration", 1)
-    critic_feedback = state.get("critic_feedback", "")
+    critic_feedback = truncate_text(state.get("critic_feedback", ""), GENERATOR_FEEDBACK_TOKEN_BUDGET)
+    # A first draft needs all of the notes (compressed to a fixed budget); a
+    # revision only the chunks that bear on what the critic asked to fix
+    if _is_revision(state):
+        research_notes = _revision_research(state, critic_feedback)
+    else:
+        research_notes = compress_text(state.get("research_notes", ""), GENERATOR_RESEARCH_TOKEN_BUDGET)
     previous_draft = state.get("draft", "")
 
-    # 🧠 list of past mistakes / feedback across iterations
-    mistake_memory = state.get("mistake_memory", [])
-    # To avoid super-long prompts, just use the last few
-    recent_mistakes = mistake_memory[-3:] if mistake_memory else []
-    mistake_memory_text = "\n\n".join(recent_mistakes) if recent_mistakes else "None yet."
-
-    system_prompt = load_prompt("generator_system")
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_prompt),
-            (
-                "human",
-                "You are writing or revising a blog.\n\n"
-                "Topic: {topic}\n"
-                "Tone: {tone}\n"
-                "Target word count: {word_count}\n"
-                "Additional constraints: {constraints}\n"
-                "Iteration: {iteration}\n\n"
-                "Research notes (source of truth):\n{research_notes}\n\n"
-                "GLOBAL MISTAKE MEMORY (mistakes you must NOT repeat):\n"
-                "{mistake_memory_text}\n\n"
-                "{revision_instructions}"
-            ),
-        ]
-    )
+    mistake_memory_text = _mistake_memory_text(state)
 
-    if iteration <= 1 or not previous_draft or not critic_feedback:
+    if not _is_revision(state) and state.get("seed_draft"):
+        revision_instructions = (
+            "This is the FIRST iteration, starting from a published post on a similar "
+            f"topic (\"{_seed_topic(state)}\").\n\n"
+            "Prior post:\n"
+            "---------------------\n"
+            f"{state['seed_draft']}\n"
+            "---------------------\n\n"
+            "Adapt it into a complete, polished blog for the topic, tone, constraints and "
+            "word count above: keep what fits, rewrite or replace what does not, and use "
+            "the research notes. Do not mention the prior post, a draft or an iteration."
+        )
+    elif not _is_revision(state):
         revision_instructions = (
             "This is the FIRST iteration. Write a complete, polished blog from scratch "
             "using the research notes. Do not mention that this is a draft or an iteration."
@@ -67,8 +207,24 @@ def generator_node(state: BlogState) -> BlogState:
             "rewrite or refine the blog so that you DO NOT repeat any prior mistakes. "
             "Preserve strengths, fix weaknesses, and keep the requested tone and lengths."
         )
+        if _use_patches(state):
+            revision_instructions += (
+                "\n\nDo NOT return the whole blog. Return only edits for the sections that "
+                "must change: for each, the section heading exactly as it appears in the "
+                "previous draft (or a new heading to add) and the complete new section body."
+            )
+    if angle:
+        revision_instructions += f"\n\nAngle for this version: {angle}"
 
-    messages = prompt.format_messages(
+    token_counts = count_section_tokens(
+        {
+            "research_notes": research_notes,
+            "mistake_memory": mistake_memory_text,
+            "revision_instructions": revision_instructions,
+        }
+    )
+
+    return get_prompt_registry().get("generator").format_messages(
         topic=topic,
         tone=tone,
         word_count=word_count,
@@ -77,8 +233,498 @@ def generator_node(state: BlogState) -> BlogState:
         research_notes=research_notes,
         mistake_memory_text=mistake_memory_text,
         revision_instructions=revision_instructions,
+    ), token_counts
+
+
+def _stream_draft(state: BlogState, messages, llm, stream: bool = True) -> str:
+    """
+    Stream the model's draft, forwarding each chunk as a 'token' event.
+    Without a streaming caller (or with stream=False) this is a single invoke.
+    """
+    if not (stream and tokens_requested()):
+        return llm.invoke(messages).content
+    write = get_event_writer()
+    iteration = state.get("iteration", 1)
+    parts: List[str] = []
+    for chunk in llm.stream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            write({"type": "token", "node": "generator", "iteration": iteration, "text": chunk.content})
+    return "".join(parts)
+
+
+async def _astream_draft(state: BlogState, messages, llm, stream: bool = True) -> str:
+    if not (stream and tokens_requested()):
+        return (await llm.ainvoke(messages)).content
+    write = get_event_writer()
+    iteration = state.get("iteration", 1)
+    parts: List[str] = []
+    async for chunk in llm.astream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            write({"type": "token", "node": "generator", "iteration": iteration, "text": chunk.content})
+    return "".join(parts)
+
+
+def _emit_draft(state: BlogState, draft: Optional[str] = None, candidate: Optional[int] = None) -> None:
+    event = {
+        "type": "draft",
+        "node": "generator",
+        "iteration": state.get("iteration", 1),
+        "draft": state["draft"] if draft is None else draft,
+    }
+    if candidate is not None:
+        event["candidate"] = candidate
+    get_event_writer()(event)
+
+
+def _revised(state: BlogState, revision: DraftRevision) -> Optional[str]:
+    if not revision.edits:
+        return None
+    return apply_section_edits(
+        state["draft"], [(edit.heading, edit.content) for edit in revision.edits]
     )
 
-    response = generator_llm.invoke(messages)
-    state["draft"] = response.content
-    return state
+
+def _degrade(step: str, fallback: str, error: Exception) -> None:
+    """Log a failed optional step and record it on the node's trace span; re-raise anything else."""
+    if not is_model_failure(error):
+        raise error
+    logger.warning("generator: %s failed (%s: %s); using %s", step, type(error).__name__, error, fallback)
+    note_degraded(step, fallback, error)
+
+
+def _write_draft(state: BlogState, messages, llm, stream: bool = True) -> str:
+    if _use_patches(state):
+        # Patch mode: the model returns section edits that are applied locally.
+        # Fall back to a full rewrite if the structured call fails or is empty.
+        try:
+            draft = _revised(state, llm.with_structured_output(DraftRevision).invoke(messages))
+            if draft is not None:
+                return draft
+        except Exception as e:
+            _degrade("patch revision", "a full rewrite", e)
+    return _stream_draft(state, messages, llm, stream)
+
+
+async def _awrite_draft(state: BlogState, messages, llm, stream: bool = True) -> str:
+    if _use_patches(state):
+        try:
+            draft = _revised(state, await llm.with_structured_output(DraftRevision).ainvoke(messages))
+            if draft is not None:
+                return draft
+        except Exception as e:
+            _degrade("patch revision", "a full rewrite", e)
+    return await _astream_draft(state, messages, llm, stream)
+
+
+# --- Long-form (sections) mode -------------------------------------------------
+# The post is outlined first; every section is then written concurrently with
+# its own slice of the research notes, so wall time follows the longest
+# section rather than the whole post. Revisions rewrite only the sections the
+# critic flagged (falling back to a whole-draft revision when none are); a
+# draft seeded from the archive is adapted section by section.
+
+get_prompt_registry().register(
+    "generator_outline",
+    system="generator_system",
+    human=(
+        "Plan a long blog post before it is written.\n\n"
+        "Topic: {topic}\n"
+        "Tone: {tone}\n"
+        "Target word count: {word_count}\n"
+        "Additional constraints: {constraints}\n\n"
+        "Research notes (source of truth):\n{research_notes}\n\n"
+        "GLOBAL MISTAKE MEMORY (mistakes you must NOT repeat):\n"
+        "{mistake_memory_text}\n\n"
+        "Return the title and the sections in reading order (an introduction first, "
+        "a conclusion last). Give each section its heading, the key points it covers "
+        "and a word budget; the budgets should add up to the target word count."
+    ),
+    variables=("topic", "tone", "word_count", "constraints", "research_notes", "mistake_memory_text"),
+)
+
+get_prompt_registry().register(
+    "generator_section",
+    system="generator_system",
+    human=(
+        "You are writing ONE section of a longer blog post; the other sections "
+        "are written separately.\n\n"
+        "Topic: {topic}\n"
+        "Tone: {tone}\n"
+        "Additional constraints: {constraints}\n"
+        "Iteration: {iteration}\n\n"
+        "Outline of the post:\n{outline}\n\n"
+        "Section to write: {heading}\n"
+        "Key points: {key_points}\n"
+        "Section word count: {words}\n\n"
+        "Research notes for this section (source of truth):\n{research_notes}\n\n"
+        "GLOBAL MISTAKE MEMORY (mistakes you must NOT repeat):\n"
+        "{mistake_memory_text}\n\n"
+        "{revision_instructions}\n\n"
+        "Return only the body of this section: no heading line, and do not introduce "
+        "or conclude the whole post unless this section is the introduction or conclusion."
+    ),
+    variables=(
+        "topic", "tone", "constraints", "iteration", "outline", "heading", "key_points",
+        "words", "research_notes", "mistake_memory_text", "revision_instructions",
+    ),
+)
+
+get_prompt_registry().register(
+    "generator_transitions",
+    system="generator_system",
+    human=(
+        "The sections of this blog post were written separately.\n\n"
+        "Topic: {topic}\n"
+        "Tone: {tone}\n\n"
+        "For each boundary below, write one sentence to append to the end of the "
+        "earlier section so that it leads naturally into the next one. Do not "
+        "repeat or summarize what the section already says.\n\n"
+        "{boundaries}"
+    ),
+    variables=("topic", "tone", "boundaries"),
+)
+
+
+def _outline_messages(state: BlogState):
+    return get_prompt_registry().get("generator_outline").format_messages(
+        topic=state["topic"],
+        tone=state.get("tone", ""),
+        word_count=state.get("word_count", 800),
+        constraints=state.get("constraints", ""),
+        research_notes=compress_text(state.get("research_notes", ""), GENERATOR_RESEARCH_TOKEN_BUDGET),
+        mistake_memory_text=_mistake_memory_text(state),
+    )
+
+
+def _plan(state: BlogState, outline: BlogOutline) -> Optional[Dict]:
+    """The outline as stored in state, word budgets scaled to the target (None if unusable)."""
+    sections = [s for s in outline.sections if s.heading.strip()]
+    if len(sections) < 2:
+        return None
+    word_count = state.get("word_count", 800)
+    total = sum(max(1, s.words) for s in sections)
+    return {
+        "title": outline.title.strip() or state["topic"],
+        "sections": [
+            {
+                "heading": s.heading.strip().lstrip("#").strip(),
+                "key_points": list(s.key_points),
+                "words": max(50, round(word_count * max(1, s.words) / total)),
+            }
+            for s in sections
+        ],
+    }
+
+
+def _plan_entry(state: BlogState, plan: Dict, heading: str) -> Dict:
+    key = normalize_heading(heading)
+    for entry in plan["sections"]:
+        if normalize_heading(entry["heading"]) == key:
+            return entry
+    words = state.get("word_count", 800) // max(1, len(plan["sections"]))
+    return {"heading": heading.lstrip("#").strip(), "key_points": [], "words": words}
+
+
+def _flagged_sections(state: BlogState, sections: List[Tuple[str, str]]) -> List[int]:
+    """Indexes of the draft sections named by the critic (weak_sections, or in its feedback)."""
+    named = {normalize_heading(name) for name in state.get("critic_sections") or []}
+    feedback = f" {normalize_heading(state.get('critic_feedback', ''))} "
+    flagged = []
+    for i, (heading, _) in enumerate(sections):
+        key = normalize_heading(heading)
+        # the '# title' line has no body of its own
+        if not key or heading.startswith("# "):
+            continue
+        if key in named or f" {key} " in feedback:
+            flagged.append(i)
+    return flagged
+
+
+def _section_jobs(state: BlogState) -> Optional[Tuple[Dict, List[Tuple[str, str]], List[int]]]:
+    """(plan, draft sections, indexes to rewrite) for a revision, or None to revise the whole draft."""
+    plan = state.get("outline")
+    if not plan:
+        return None
+    sections = split_sections(state["draft"])
+    flagged = _flagged_sections(state, sections)
+    return (plan, sections, flagged) if flagged else None
+
+
+def _seed_jobs(state: BlogState) -> Optional[Tuple[Dict, List[Tuple[str, str]], List[int]]]:
+    """Adapt an archived post section by section: its headings become the outline."""
+    sections = split_sections(state["seed_draft"])
+    indexes = [i for i, (h, body) in enumerate(sections) if h and not h.startswith("# ") and body.strip()]
+    if len(indexes) < 2:
+        return None
+    title = next((h.lstrip("#").strip() for h, _ in sections if h.startswith("# ")), state["topic"])
+    sizes = [max(1, len(sections[i][1].split())) for i in indexes]
+    word_count = state.get("word_count", 800)
+    plan = {
+        "title": title,
+        "sections": [
+            {
+                "heading": sections[i][0].lstrip("#").strip(),
+                "key_points": [],
+                "words": max(50, round(word_count * size / sum(sizes))),
+            }
+            for i, size in zip(indexes, sizes)
+        ],
+    }
+    return plan, sections, indexes
+
+
+def _new_sections(plan: Dict) -> Tuple[Dict, List[Tuple[str, str]], List[int]]:
+    sections = [(f"# {plan['title']}", "")] + [(f"## {s['heading']}", "") for s in plan["sections"]]
+    return plan, sections, list(range(1, len(sections)))
+
+
+def _section_messages(
+    state: BlogState, plan: Dict, heading: str, previous: str
+) -> Tuple[list, Dict[str, int]]:
+    entry = _plan_entry(state, plan, heading)
+    key_points = "; ".join(entry["key_points"]) or "as the outline implies"
+    query = f"{state['topic']} {entry['heading']} {key_points}"
+    if previous and _is_revision(state):
+        query += " " + state.get("critic_feedback", "")
+    research_notes = relevant_chunks(
+        state.get("research_notes", ""),
+        query,
+        GENERATOR_SECTION_RESEARCH_TOKEN_BUDGET,
+        RESEARCH_TOP_K,
+        RESEARCH_CHUNK_TOKENS,
+    )
+    mistake_memory_text = _mistake_memory_text(state)
+    if previous and not _is_revision(state):
+        revision_instructions = (
+            "Adapt this section from a published post on a similar topic "
+            f"(\"{_seed_topic(state)}\"):\n"
+            "---------------------\n"
+            f"{previous}\n"
+            "---------------------\n\n"
+            "Keep what fits this post, rewrite what does not."
+        )
+    elif previous:
+        critic_feedback = truncate_text(state.get("critic_feedback", ""), GENERATOR_FEEDBACK_TOKEN_BUDGET)
+        revision_instructions = (
+            "The critic flagged this section. Its previous text:\n"
+            "---------------------\n"
+            f"{previous}\n"
+            "---------------------\n\n"
+            "Critic feedback on the whole post:\n"
+            "---------------------\n"
+            f"{critic_feedback}\n"
+            "---------------------\n\n"
+            "Rewrite the section to fix what concerns it; keep what already works."
+        )
+    else:
+        revision_instructions = "Write this section now."
+
+    token_counts = count_section_tokens(
+        {
+            "research_notes": research_notes,
+            "mistake_memory": mistake_memory_text,
+            "revision_instructions": revision_instructions,
+        }
+    )
+    return get_prompt_registry().get("generator_section").format_messages(
+        topic=state["topic"],
+        tone=state.get("tone", ""),
+        constraints=state.get("constraints", ""),
+        iteration=state.get("iteration", 1),
+        outline="\n".join(f"- {s['heading']}" for s in plan["sections"]),
+        heading=entry["heading"],
+        key_points=key_points,
+        words=entry["words"],
+        research_notes=research_notes,
+        mistake_memory_text=mistake_memory_text,
+        revision_instructions=revision_instructions,
+    ), token_counts
+
+
+def _section_prompts(state: BlogState, sections: List[Tuple[str, str]], indexes: List[int], plan: Dict):
+    prompts = [_section_messages(state, plan, sections[i][0], sections[i][1]) for i in indexes]
+    totals: Dict[str, int] = {}
+    for _, counts in prompts:
+        for name, tokens in counts.items():
+            totals[name] = totals.get(name, 0) + tokens
+    return [messages for messages, _ in prompts], totals
+
+
+def _fill_sections(
+    sections: List[Tuple[str, str]], indexes: List[int], bodies: List[str]
+) -> List[Tuple[str, str]]:
+    sections = list(sections)
+    for i, body in zip(indexes, bodies):
+        sections[i] = (sections[i][0], strip_heading(body, sections[i][0]))
+    return sections
+
+
+def _boundaries(sections: List[Tuple[str, str]], indexes: List[int]) -> List[int]:
+    """Rewritten sections followed by another section (each gets a bridge at its end)."""
+    return [i for i in indexes if i + 1 < len(sections) and sections[i][1].strip()]
+
+
+def _transitions_messages(state: BlogState, sections: List[Tuple[str, str]], boundaries: List[int]):
+    parts = []
+    for n, i in enumerate(boundaries, 1):
+        ending = " ".join(sections[i][1].split()[-60:])
+        parts.append(
+            f"Boundary {n}:\nEnd of \"{sections[i][0].lstrip('#').strip()}\": …{ending}\n"
+            f"Next section: {sections[i + 1][0].lstrip('#').strip()}"
+        )
+    return get_prompt_registry().get("generator_transitions").format_messages(
+        topic=state["topic"], tone=state.get("tone", ""), boundaries="\n\n".join(parts)
+    )
+
+
+def _bridge(sections: List[Tuple[str, str]], boundaries: List[int], bridges: List[str]) -> List[Tuple[str, str]]:
+    sections = list(sections)
+    for i, bridge in zip(boundaries, bridges):
+        if bridge.strip():
+            sections[i] = (sections[i][0], f"{sections[i][1].rstrip()} {bridge.strip()}")
+    return sections
+
+
+def _write_sections(state: BlogState, llm) -> Optional[Tuple[str, Dict, Dict[str, int]]]:
+    """(draft, outline, token counts) in sections mode, or None to fall back to a whole-draft write."""
+    if _is_revision(state):
+        jobs = _section_jobs(state)
+    elif state.get("seed_draft"):
+        jobs = _seed_jobs(state)
+    else:
+        try:
+            plan = _plan(state, llm.with_structured_output(BlogOutline).invoke(_outline_messages(state)))
+        except Exception as e:
+            _degrade("outline", "a single-pass draft", e)
+            return None
+        jobs = _new_sections(plan) if plan else None
+    if jobs is None:
+        return None
+    plan, sections, indexes = jobs
+    prompts, token_counts = _section_prompts(state, sections, indexes, plan)
+    with ContextThreadPoolExecutor(max_workers=GENERATOR_SECTION_CONCURRENCY) as pool:
+        bodies = list(pool.map(lambda messages: llm.invoke(messages).content, prompts))
+    sections = _fill_sections(sections, indexes, bodies)
+
+    boundaries = _boundaries(sections, indexes)
+    if GENERATOR_SECTION_TRANSITIONS and boundaries:
+        # smoothing is optional: keep the stitched draft if it fails
+        try:
+            transitions = llm.with_structured_output(SectionTransitions).invoke(
+                _transitions_messages(state, sections, boundaries)
+            )
+            sections = _bridge(sections, boundaries, transitions.bridges)
+        except Exception as e:
+            _degrade("section transitions", "the stitched sections", e)
+    return join_sections(sections), plan, token_counts
+
+
+async def _awrite_sections(state: BlogState, llm) -> Optional[Tuple[str, Dict, Dict[str, int]]]:
+    if _is_revision(state):
+        jobs = _section_jobs(state)
+    elif state.get("seed_draft"):
+        jobs = _seed_jobs(state)
+    else:
+        try:
+            plan = _plan(state, await llm.with_structured_output(BlogOutline).ainvoke(_outline_messages(state)))
+        except Exception as e:
+            _degrade("outline", "a single-pass draft", e)
+            return None
+        jobs = _new_sections(plan) if plan else None
+    if jobs is None:
+        return None
+    plan, sections, indexes = jobs
+    prompts, token_counts = _section_prompts(state, sections, indexes, plan)
+    semaphore = asyncio.Semaphore(GENERATOR_SECTION_CONCURRENCY)
+
+    async def write(messages) -> str:
+        async with semaphore:
+            return (await llm.ainvoke(messages)).content
+
+    bodies = await asyncio.gather(*(write(m) for m in prompts))
+    sections = _fill_sections(sections, indexes, list(bodies))
+
+    boundaries = _boundaries(sections, indexes)
+    if GENERATOR_SECTION_TRANSITIONS and boundaries:
+        try:
+            transitions = await llm.with_structured_output(SectionTransitions).ainvoke(
+                _transitions_messages(state, sections, boundaries)
+            )
+            sections = _bridge(sections, boundaries, transitions.bridges)
+        except Exception as e:
+            _degrade("section transitions", "the stitched sections", e)
+    return join_sections(sections), plan, token_counts
+
+
+def _candidate_variants(state: BlogState):
+    """
+    (messages, llm) per best-of-N candidate (candidate 0 is the plain prompt),
+    plus the plain prompt's token counts.
+    """
+    variants, token_counts = [], {}
+    for i in range(GENERATOR_CANDIDATES):
+        temperature = GENERATOR_CANDIDATE_TEMPERATURES[i % len(GENERATOR_CANDIDATE_TEMPERATURES)]
+        angle = CANDIDATE_ANGLES[i % len(CANDIDATE_ANGLES)]
+        messages, counts = _build_messages(state, angle)
+        token_counts = token_counts or counts
+        variants.append((messages, generator_llm(temperature, state.get("model_tier", 0))))
+    return variants, token_counts
+
+
+def _set_candidates(state: BlogState, drafts: List[str], token_counts: Dict[str, int]) -> BlogState:
+    for i, draft in enumerate(drafts):
+        _emit_draft(state, draft, candidate=i)
+    # The critic scores every candidate and promotes the best to state["draft"]
+    return {"candidate_drafts": drafts, "prompt_token_counts": token_counts}
+
+
+def _set_draft(state: BlogState, draft: str, token_counts: Dict[str, int]) -> BlogState:
+    _emit_draft(state, draft)
+    return {"candidate_drafts": [], "draft": draft, "prompt_token_counts": token_counts}
+
+
+def _set_sections(state: BlogState, written: Tuple[str, Dict, Dict[str, int]]) -> BlogState:
+    draft, plan, token_counts = written
+    update = _set_draft(state, draft, token_counts)
+    update["outline"] = plan
+    return update
+
+
+def generator_node(state: BlogState) -> BlogState:
+    if _use_sections(state):
+        written = _write_sections(state, generator_llm(tier=state.get("model_tier", 0)))
+        if written is not None:
+            return _set_sections(state, written)
+
+    if GENERATOR_CANDIDATES > 1:
+        variants, token_counts = _candidate_variants(state)
+        # no token streaming: N interleaved streams would be unreadable
+        with ContextThreadPoolExecutor(max_workers=GENERATOR_CANDIDATE_CONCURRENCY) as pool:
+            drafts = list(pool.map(lambda v: _write_draft(state, v[0], v[1], stream=False), variants))
+        return _set_candidates(state, drafts, token_counts)
+
+    messages, token_counts = _build_messages(state)
+    return _set_draft(state, _write_draft(state, messages, generator_llm(tier=state.get("model_tier", 0))), token_counts)
+
+
+async def generator_node_async(state: BlogState) -> BlogState:
+    if _use_sections(state):
+        written = await _awrite_sections(state, generator_llm(tier=state.get("model_tier", 0)))
+        if written is not None:
+            return _set_sections(state, written)
+
+    if GENERATOR_CANDIDATES > 1:
+        semaphore = asyncio.Semaphore(GENERATOR_CANDIDATE_CONCURRENCY)
+
+        async def write(messages, llm) -> str:
+            async with semaphore:
+                return await _awrite_draft(state, messages, llm, stream=False)
+
+        variants, token_counts = _candidate_variants(state)
+        drafts = await asyncio.gather(*(write(m, llm) for m, llm in variants))
+        return _set_candidates(state, list(drafts), token_counts)
+
+    messages, token_counts = _build_messages(state)
+    return _set_draft(state, await _awrite_draft(state, messages, generator_llm(tier=state.get("model_tier", 0))), token_counts)
@@ -1,14 +1,50 @@
 # agents/guardrails.py
+import threading
+from collections import Counter, OrderedDict
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
-from typing import List, Optional
+from langchain_core.messages import HumanMessage
+from typing import Any, Dict, List, Optional, Tuple
 
-from config.settings import get_critic_llm
-from utils.prompt_loader import load_prompt
+from config.settings import (
+    GUARDRAILS_EXTRA_BANNED_TERMS,
+    GUARDRAILS_MAX_CONSTRAINTS_CHARS,
+    GUARDRAILS_MAX_TOPIC_CHARS,
+    GUARDRAILS_MEMO_SIZE,
+    GUARDRAILS_MODEL,
+    get_critic_llm,
+    get_guardrails_llm,
+    get_prompt_registry,
+)
+from utils.guardrail_rules import BANNED_TERMS, INJECTION_REASON, RuleVerdict, check_inputs, input_key
 from graph.state import BlogState
 
+
 # deterministic guard model
-guard_llm = get_critic_llm(temperature=0.0)
+def guard_llm():
+    return get_critic_llm(temperature=0.0, agent="guardrails")
+
+
+def llama_guard_llm():
+    return get_guardrails_llm(temperature=0.0, agent="guardrails")
+
+
+# Llama Guard 3 hazard categories (its "unsafe" reply lists these codes)
+LLAMA_GUARD_CATEGORIES = {
+    "S1": "violent crimes",
+    "S2": "non-violent crimes",
+    "S3": "sex-related crimes",
+    "S4": "child sexual exploitation",
+    "S5": "defamation",
+    "S6": "specialized advice",
+    "S7": "privacy",
+    "S8": "intellectual property",
+    "S9": "indiscriminate weapons",
+    "S10": "hate",
+    "S11": "suicide and self-harm",
+    "S12": "sexual content",
+    "S13": "elections",
+    "S14": "code interpreter abuse",
+}
 
 
 class GuardrailsOutput(BaseModel):
@@ -22,69 +58,220 @@ class GuardrailsOutput(BaseModel):
     )
 
 
+# Verdicts by normalized input hash, and how many requests each tier decided
+# ("rules", "memo", "llama_guard" / "llm", "error"); shared by all pipelines.
+_verdicts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_tier_counts: Counter = Counter()
+_lock = threading.Lock()
+
+
+def guardrails_stats() -> Dict[str, int]:
+    """Requests decided per tier in this process."""
+    with _lock:
+        return dict(_tier_counts)
+
+
+def _count(tier: str) -> None:
+    with _lock:
+        _tier_counts[tier] += 1
+
+
+def _recall(key: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        verdict = _verdicts.get(key)
+        if verdict is not None:
+            _verdicts.move_to_end(key)
+        return verdict
+
+
+def _remember(key: str, verdict: Dict[str, Any]) -> None:
+    with _lock:
+        _verdicts[key] = verdict
+        _verdicts.move_to_end(key)
+        while len(_verdicts) > GUARDRAILS_MEMO_SIZE:
+            _verdicts.popitem(last=False)
+
+
+get_prompt_registry().register(
+    "guardrails",
+    system="guardrails_system",
+    human=(
+        "Validate and sanitize the following user inputs. Respond with structured JSON matching the GuardrailsOutput schema.\n\n"
+        "Topic: {topic}\n\n"
+        "Constraints: {constraints}\n\n"
+        "Return only JSON."
+    ),
+    variables=("topic", "constraints"),
+)
+
+
+def _build_messages(state: BlogState):
+    raw_topic = state.get("topic", "")
+    raw_constraints = state.get("constraints", "")
+
+    return get_prompt_registry().get("guardrails").format_messages(topic=raw_topic, constraints=raw_constraints)
+
+
+def _build_guard_messages(rules: RuleVerdict):
+    # Llama Guard classifies a conversation; the provider applies its template
+    text = f"Write a blog post about: {rules.topic}"
+    if rules.constraints:
+        text += f"\nAdditional requirements: {rules.constraints}"
+    return [HumanMessage(content=text)]
+
+
+def _parse_guard(text: str) -> Tuple[bool, List[str]]:
+    """'safe' -> (True, []); 'unsafe\\nS1,S10' -> (False, [category names])."""
+    lines = [line.strip() for line in str(text).strip().splitlines() if line.strip()]
+    if lines and lines[0].lower() == "safe":
+        return True, []
+    if lines and lines[0].lower() == "unsafe":
+        codes = [c.strip().upper() for c in (lines[1] if len(lines) > 1 else "").split(",") if c.strip()]
+        return False, [LLAMA_GUARD_CATEGORIES.get(c, c) for c in codes] or ["unspecified"]
+    raise ValueError(f"unexpected Llama Guard reply: {text!r}")
+
+
+def _rule_check(state: BlogState) -> RuleVerdict:
+    return check_inputs(
+        state.get("topic", ""),
+        state.get("constraints", ""),
+        banned_terms=BANNED_TERMS + tuple(GUARDRAILS_EXTRA_BANNED_TERMS),
+        max_topic_chars=GUARDRAILS_MAX_TOPIC_CHARS,
+        max_constraints_chars=GUARDRAILS_MAX_CONSTRAINTS_CHARS,
+    )
+
+
+def _rules_verdict(rules: RuleVerdict) -> Dict[str, Any]:
+    return {
+        "valid": rules.decision == "allow",
+        "topic": rules.topic,
+        "constraints": rules.constraints,
+        "issues": rules.issues,
+        "action": rules.action,
+    }
+
+
+def _guard_verdict(rules: RuleVerdict, reply: str) -> Dict[str, Any]:
+    safe, categories = _parse_guard(reply)
+    verdict = _rules_verdict(rules)
+    verdict["valid"] = safe
+    if not safe:
+        verdict["issues"] = rules.issues + [f"Flagged as unsafe: {', '.join(categories)}."]
+        verdict["action"] = "Please choose a different topic or rephrase it."
+    return verdict
+
+
+def _llm_verdict(rules: RuleVerdict, result: GuardrailsOutput) -> Dict[str, Any]:
+    return {
+        "valid": bool(result.valid),
+        "topic": result.topic.strip(),
+        "constraints": (result.constraints or "").strip(),
+        "issues": rules.issues + list(result.issues),
+        "action": result.corrective_action or "",
+    }
+
+
+def _reject(state: BlogState, issue: str) -> BlogState:
+    # conservative fallback: mark invalid and request clarification
+    _count("error")
+    return {
+        "guardrails_valid": False,
+        "guardrails_issues": [issue],
+        "guardrails_action": "Please rephrase the topic or constraints.",
+        "guardrails_tier": "error",
+        # halt pipeline
+        "route": "done",
+    }
+
+
+def _apply_result(state: BlogState, verdict: Dict[str, Any], tier: str) -> BlogState:
+    _count(tier)
+    # Apply sanitized values back to state
+    update: BlogState = {
+        "topic": verdict["topic"],
+        "constraints": verdict["constraints"],
+        "guardrails_issues": list(verdict["issues"]),
+        "guardrails_valid": verdict["valid"],
+        "guardrails_action": verdict["action"],
+        "guardrails_tier": tier,
+    }
+
+    # If inputs invalid, halt the pipeline by setting route to 'done'
+    if not update["guardrails_valid"]:
+        # if invalid, ensure the orchestrator will see route 'done' and stop.
+        update["route"] = "done"
+
+    return update
+
+
+def _local_verdict(state: BlogState) -> Tuple[str, Optional[Dict[str, Any]], str, Optional[RuleVerdict]]:
+    """(key, verdict or None, tier, rules): memo first, then the rule tier."""
+    key = input_key(state.get("topic", ""), state.get("constraints", ""))
+    verdict = _recall(key)
+    if verdict is not None:
+        return key, verdict, "memo", None
+    rules = _rule_check(state)
+    if rules.decision != "escalate":
+        verdict = _rules_verdict(rules)
+        _remember(key, verdict)
+        return key, verdict, "rules", rules
+    if INJECTION_REASON in rules.reasons:
+        # Llama Guard only answers safe/unsafe and would pass the injected
+        # instructions through; the structured guard LLM strips them
+        return key, None, "llm", rules
+    return key, None, GUARDRAILS_MODEL, rules
+
+
 def guardrails_node(state: BlogState) -> BlogState:
     """
-    Validate and sanitize user inputs (topic, constraints) using the guard LLM.
-    If invalid, set state['route'] = 'done' so graph can exit gracefully.
-    Writes back:
+    Validate and sanitize user inputs (topic, constraints) in tiers:
+    memoized verdict -> local rules (length, banned terms, PII) -> a model,
+    only for inputs the rules escalate (Llama Guard or the guard LLM, see
+    GUARDRAILS_MODEL; prompt-injection hits always go to the guard LLM,
+    which rewrites the inputs). If invalid, set state['route'] = 'done' so graph can
+    exit gracefully.
+    Returns updates for:
       - state['topic'] (possibly modified),
       - state['constraints'] (possibly modified),
       - state['guardrails_issues'] (list),
       - state['guardrails_valid'] (bool),
-      - state['guardrails_action'] (string)
+      - state['guardrails_action'] (string),
+      - state['guardrails_tier'] (which tier decided)
     """
-    raw_topic = state.get("topic", "")
-    raw_constraints = state.get("constraints", "")
+    key, verdict, tier, rules = _local_verdict(state)
+    if verdict is not None:
+        return _apply_result(state, verdict, tier)
 
-    system_prompt = load_prompt("guardrails_system")
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_prompt),
-            (
-                "human",
-                "Validate and sanitize the following user inputs. Respond with structured JSON matching the GuardrailsOutput schema.\n\n"
-                "Topic: {topic}\n\n"
-                "Constraints: {constraints}\n\n"
-                "Return only JSON."
-            ),
-        ]
-    )
-
-    # Format messages (safe now because guardrails_system.txt uses double braces)
     try:
-        messages = prompt.format_messages(topic=raw_topic, constraints=raw_constraints)
+        if tier == "llama_guard":
+            verdict = _guard_verdict(rules, llama_guard_llm().invoke(_build_guard_messages(rules)).content)
+        else:
+            structured_llm = guard_llm().with_structured_output(GuardrailsOutput)
+            messages = _build_messages({"topic": rules.topic, "constraints": rules.constraints})
+            verdict = _llm_verdict(rules, structured_llm.invoke(messages))
     except Exception as e:
-        # formatting failed — conservative fallback
-        state["guardrails_valid"] = False
-        state["guardrails_issues"] = [f"prompt formatting failed: {e}"]
-        state["guardrails_action"] = "Please rephrase the topic or constraints."
-        # halt pipeline
-        state["route"] = "done"
-        return state
+        return _reject(state, f"guardrails invocation failed: {e}")
 
-    structured_llm = guard_llm.with_structured_output(GuardrailsOutput)
+    _remember(key, verdict)
+    return _apply_result(state, verdict, tier)
 
-    try:
-        result: GuardrailsOutput = structured_llm.invoke(messages)
-    except Exception as e:
-        # conservative fallback: mark invalid and request clarification
-        state["guardrails_valid"] = False
-        state["guardrails_issues"] = [f"guardrails invocation failed: {e}"]
-        state["guardrails_action"] = "Please rephrase the topic or constraints."
-        state["route"] = "done"
-        return state
 
-    # Apply sanitized values back to state
-    state["topic"] = result.topic.strip()
-    state["constraints"] = (result.constraints or "").strip()
-    state["guardrails_issues"] = result.issues
-    state["guardrails_valid"] = bool(result.valid)
-    state["guardrails_action"] = result.corrective_action or ""
+async def guardrails_node_async(state: BlogState) -> BlogState:
+    """Async variant of guardrails_node (uses ainvoke)."""
+    key, verdict, tier, rules = _local_verdict(state)
+    if verdict is not None:
+        return _apply_result(state, verdict, tier)
 
-    # If inputs invalid, halt the pipeline by setting route to 'done'
-    if not state["guardrails_valid"]:
-        # if invalid, ensure the orchestrator will see route 'done' and stop.
-        state["route"] = "done"
+    try:
+        if tier == "llama_guard":
+            reply = await llama_guard_llm().ainvoke(_build_guard_messages(rules))
+            verdict = _guard_verdict(rules, reply.content)
+        else:
+            structured_llm = guard_llm().with_structured_output(GuardrailsOutput)
+            messages = _build_messages({"topic": rules.topic, "constraints": rules.constraints})
+            verdict = _llm_verdict(rules, await structured_llm.ainvoke(messages))
+    except Exception as e:
+        return _reject(state, f"guardrails invocation failed: {e}")
 
-    return state
+    _remember(key, verdict)
+    return _apply_result(state, verdict, tier)
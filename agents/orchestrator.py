@@ -1,8 +1,61 @@
+from typing import Any, Callable, Dict, List
+
+from config.settings import (
+    RUN_DEADLINE_S,
+    RUN_LATENCY_BUDGET_S,
+    RUN_TOKEN_BUDGET,
+    STOP_MIN_EXPECTED_GAIN,
+    STOP_PLATEAU_MIN_DELTA,
+    STOP_PLATEAU_WINDOW,
+    STOP_POLICIES,
+    get_model_router,
+)
 from graph.state import BlogState
+from utils.stopping import (
+    BudgetPolicy,
+    DeadlinePolicy,
+    ExpectedGainPolicy,
+    MaxIterationsPolicy,
+    PlateauPolicy,
+    ThresholdPolicy,
+    first_stop,
+)
 
 # Confidence threshold for early stopping (0.80 = 80%)
 CONFIDENCE_THRESHOLD: float = 0.80
 
+# Stopping policies by name (STOP_POLICIES picks and orders them)
+STOP_POLICY_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "threshold": lambda: ThresholdPolicy(CONFIDENCE_THRESHOLD),
+    "max_iterations": lambda: MaxIterationsPolicy(CONFIDENCE_THRESHOLD),
+    "plateau": lambda: PlateauPolicy(STOP_PLATEAU_WINDOW, STOP_PLATEAU_MIN_DELTA),
+    "expected_gain": lambda: ExpectedGainPolicy(STOP_MIN_EXPECTED_GAIN),
+    "budget": lambda: BudgetPolicy(RUN_LATENCY_BUDGET_S, RUN_TOKEN_BUDGET),
+    "deadline": lambda: DeadlinePolicy(RUN_DEADLINE_S),
+}
+
+
+# Policies that stop on flat scores: a stalled run escalates to the next model
+# tier instead, while one is left (utils/model_router.py)
+ESCALATE_INSTEAD_OF = ("plateau", "expected_gain")
+
+
+def register_stop_policy(name: str, factory: Callable[[], Any]) -> None:
+    """factory() -> callable(state) returning a stop reason or None, with a .name"""
+    STOP_POLICY_FACTORIES[name] = factory
+
+
+def build_stop_policies(names: List[str] = STOP_POLICIES) -> List[Any]:
+    unknown = [n for n in names if n not in STOP_POLICY_FACTORIES]
+    if unknown:
+        raise RuntimeError(
+            f"Unknown stop policies {unknown} (known: {', '.join(STOP_POLICY_FACTORIES)})"
+        )
+    # max_iterations is a hard cap and always applies
+    if "max_iterations" not in names:
+        names = list(names) + ["max_iterations"]
+    return [STOP_POLICY_FACTORIES[n]() for n in names]
+
 
 def orchestrator_node(state: BlogState) -> BlogState:
     """
@@ -10,18 +63,20 @@ def orchestrator_node(state: BlogState) -> BlogState:
 
     Logic:
     - iteration is incremented on every orchestrator call
-    - EARLY STOP when last_score >= CONFIDENCE_THRESHOLD (e.g. 0.80 → 80%)
-    - otherwise HARD STOP when iteration >= max_iterations
+    - the configured stopping policies run in order (threshold, max
+      iterations, plateau, expected gain, budgets, deadline); the first one
+      that fires stops the run and its reason becomes stop_reason
+    - scores that stalled below the threshold move the run one model tier
+      up (state['model_tier']); a plateau / expected-gain stop is skipped
+      while a larger model is left to try
     - no LLM is used here: this is a pure rule-based controller
     """
 
     # Scores set by critic
     last_score: float = state.get("last_score", 0.0)      # 0–1
-    best_score: float = state.get("best_score", 0.0)      # 0–1
 
     # Loop control
     iteration: int = state.get("iteration", 0)
-    max_iterations: int = state.get("max_iterations", 5)
 
     # Update iteration counter
     if iteration <= 0:
@@ -29,31 +84,34 @@ def orchestrator_node(state: BlogState) -> BlogState:
     else:
         new_iteration = iteration + 1
 
-    state["iteration"] = new_iteration
+    update: BlogState = {"iteration": new_iteration}
 
-    # EARLY STOP: confidence >= threshold (e.g. 80%)
-    if last_score >= CONFIDENCE_THRESHOLD:
-        state["route"] = "done"
-        state["stop_reason"] = (
-            f"Early stop: confidence reached {last_score * 100:.1f}% "
-            f"(threshold {CONFIDENCE_THRESHOLD * 100:.0f}%)"
-        )
-        return state
-
-    # HARD STOP: max iterations reached
-    if new_iteration >= max_iterations:
-        state["route"] = "done"
-        state["stop_reason"] = (
-            f"Max iterations ({max_iterations}) reached without hitting threshold "
-            f"{CONFIDENCE_THRESHOLD * 100:.0f}% "
-            f"(best score {best_score * 100:.1f}%)"
-        )
-        return state
+    # Guardrails rejected the inputs: never start the loop
+    if state.get("guardrails_valid") is False:
+        update["route"] = "done"
+        update["stop_reason"] = "Stopped: inputs failed guardrails validation"
+        update["stop_policy"] = "guardrails"
+        return update
+
+    # policies see the advanced iteration counter
+    stop = first_stop(build_stop_policies(), {**state, **update})
+    hop = None
+    if stop is None or stop["policy"] in ESCALATE_INSTEAD_OF:
+        hop = get_model_router().escalation({**state, **update}, CONFIDENCE_THRESHOLD)
+    if stop and hop is None:
+        update["route"] = "done"
+        update["stop_reason"] = stop["reason"]
+        update["stop_policy"] = stop["policy"]
+        return update
 
     # OTHERWISE: continue loop
-    state["route"] = "continue"
-    state["stop_reason"] = (
+    update["route"] = "continue"
+    update["stop_reason"] = (
         f"Below confidence threshold ({last_score * 100:.1f}% < "
         f"{CONFIDENCE_THRESHOLD * 100:.0f}%), iterations remaining"
     )
-    return state
\ No newline at end of file
+    if hop:
+        update["model_tier"] = hop["to_tier"]
+        update["model_hops"] = [hop]
+        update["stop_reason"] += f"; escalating to model tier {hop['to_tier']} ({hop['reason']})"
+    return update
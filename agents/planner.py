@@ -1,53 +1,46 @@
 # agents/planner.py
+import json
 from typing import List
-from langchain_core.prompts import ChatPromptTemplate
 
-from config.settings import get_llm
-from utils.prompt_loader import load_prompt
+from agents.researcher import research_notes_key
+from config.settings import get_llm, get_prompt_registry, get_research_store
 from graph.state import BlogState
 
-planner_llm = get_llm(temperature=0.2)
+def planner_llm():
+    return get_llm(temperature=0.2, agent="planner")
 
 
-def planner_node(state: BlogState) -> BlogState:
-    """
-    Produce a prioritized list of web-search queries (strings) that the Researcher
-    will run with Tavily. Output: state['search_queries'] = List[str]
-    """
+get_prompt_registry().register(
+    "planner",
+    system="planner_system",
+    human=(
+        "You are a planning agent. Given a blog Topic: {topic}, Tone: {tone}, "
+        "Constraints: {constraints}, and Target word count: {word_count}, "
+        "produce a prioritized list of 6-10 concise web search queries that will "
+        "yield the best material for writing this blog. Return only a JSON array "
+        "of query strings, ordered by priority."
+    ),
+    variables=("topic", "tone", "constraints", "word_count"),
+)
+
+
+def _build_messages(state: BlogState):
     topic = state["topic"]
     tone = state.get("tone", "")
     constraints = state.get("constraints", "")
     word_count = state.get("word_count", 800)
 
-    system_prompt = load_prompt("planner_system")
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_prompt),
-            (
-                "human",
-                "You are a planning agent. Given a blog Topic: {topic}, Tone: {tone}, "
-                "Constraints: {constraints}, and Target word count: {word_count}, "
-                "produce a prioritized list of 6-10 concise web search queries that will "
-                "yield the best material for writing this blog. Return only a JSON array "
-                "of query strings, ordered by priority.",
-            ),
-        ]
-    )
-
-    messages = prompt.format_messages(
+    return get_prompt_registry().get("planner").format_messages(
         topic=topic,
         tone=tone,
         constraints=constraints,
         word_count=word_count,
     )
 
-    # Ask the LLM for a JSON array of queries (simple, deterministic-ish)
-    response = planner_llm.invoke(messages)
-    text = response.content.strip()
 
+def _parse_queries(text: str) -> List[str]:
     # Simple robust parsing: try to extract JSON array; fallback to newline-split
-    import json
+    text = text.strip()
     search_queries: List[str] = []
     try:
         parsed = json.loads(text)
@@ -59,5 +52,32 @@ def planner_node(state: BlogState) -> BlogState:
         search_queries = [l for l in lines if len(l) > 5]
 
     # Limit to reasonable number (e.g. top 8)
-    state["search_queries"] = search_queries[:8]
-    return state
+    return search_queries[:8]
+
+
+def _has_notes(state: BlogState) -> bool:
+    return bool(state.get("research_notes")) or get_research_store().get_notes(research_notes_key(state)) is not None
+
+
+def planner_node(state: BlogState) -> BlogState:
+    """
+    Produce a prioritized list of web-search queries (strings) that the Researcher
+    will run with Tavily. Output: {'search_queries': List[str]}
+    Skipped when research notes are already known: reused from an archived
+    run, or fresh in the research store for these inputs.
+    """
+    if _has_notes(state):
+        return {}
+
+    # Ask the LLM for a JSON array of queries (simple, deterministic-ish)
+    response = planner_llm().invoke(_build_messages(state))
+    return {"search_queries": _parse_queries(response.content)}
+
+
+async def planner_node_async(state: BlogState) -> BlogState:
+    """Async variant of planner_node (uses ainvoke)."""
+    if _has_notes(state):
+        return {}
+
+    response = await planner_llm().ainvoke(_build_messages(state))
+    return {"search_queries": _parse_queries(response.content)}
@@ -1,48 +1,169 @@
-from typing import Dict, Any
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+from typing import Dict, Any, List, Optional
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 
-from config.settings import get_llm
-from utils.prompt_loader import load_prompt
+from config.settings import (
+    RESEARCH_CHUNK_TOKENS,
+    RESEARCH_OFFLINE,
+    RESEARCH_REUSE_MIN_COVERAGE,
+    RESEARCH_REUSE_MIN_RESULTS,
+    RESEARCH_TOKEN_BUDGET,
+    get_llm,
+    get_prompt_registry,
+    get_rate_limiter,
+    get_research_store,
+    get_search_tool,
+)
+from utils.research import format_results, merge_results, rank_results
+from utils.research_chunks import rank_chunks
+from utils.research_store import normalize_query
 from graph.state import BlogState
 
 
-# Tavily tool (web search)
-tavily_search = TavilySearchResults(
-    max_results=5,
-    include_answer=True,
-)
+# Web search tool (Tavily, or the offline fake; see SEARCH_BACKEND)
+SEARCH_MAX_RESULTS = 5
 
 
-researcher_llm = get_llm(temperature=0.2)
+def search_tool():
+    return get_search_tool(max_results=SEARCH_MAX_RESULTS)
 
 
-def researcher_node(state: BlogState) -> BlogState:
+def researcher_llm():
+    return get_llm(temperature=0.2, agent="researcher")
+
+
+def _build_queries(state: BlogState) -> List[str]:
+    """Planned queries if the planner ran, otherwise one combined query."""
+    planned = [q for q in state.get("search_queries", []) if q.strip()]
+    if planned:
+        return planned
+
     topic = state["topic"]
     constraints = state.get("constraints", "")
     tone = state.get("tone", "")
     word_count = state.get("word_count", 800)
 
-    query = f"Research for in-depth blog on: {topic}. Tone: {tone}. " \
-            f"Constraints: {constraints}. Word count target: {word_count}."
-
-    search_results = tavily_search.invoke({"query": query})
+    return [
+        f"Research for in-depth blog on: {topic}. Tone: {tone}. "
+        f"Constraints: {constraints}. Word count target: {word_count}."
+    ]
 
-    system_prompt = load_prompt("researcher_system")
 
-    prompt = ChatPromptTemplate.from_messages(
+def research_notes_key(state: BlogState) -> str:
+    """Store key for summarized notes: the normalized user inputs."""
+    return "|".join(
         [
-            ("system", system_prompt),
-            (
-                "human",
-                "Topic: {topic}\nTone: {tone}\nWord count target: {word_count}\n"
-                "Additional constraints: {constraints}\n\n"
-                "Raw web search results:\n{search_results}",
-            ),
+            normalize_query(state["topic"]),
+            state.get("tone", "").strip().lower(),
+            normalize_query(state.get("constraints", "")),
+            str(state.get("word_count", 800)),
+        ]
+    )
+
+
+def _local_results(query: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Results that let a query skip the network: fresh cached results for the
+    same normalized query, or enough indexed snippets from related queries.
+    """
+    store = get_research_store()
+    cached = store.get_results(query)
+    if cached is not None:
+        return cached
+    if RESEARCH_OFFLINE:
+        return store.search_snippets(query, k=SEARCH_MAX_RESULTS)
+    if RESEARCH_REUSE_MIN_RESULTS > 0:
+        hits = [
+            h for h in store.search_snippets(query, k=SEARCH_MAX_RESULTS)
+            if h["coverage"] >= RESEARCH_REUSE_MIN_COVERAGE
         ]
+        if len(hits) >= RESEARCH_REUSE_MIN_RESULTS:
+            return hits
+    return None
+
+
+def _store_or_fallback(query: str, results: Any) -> Any:
+    store = get_research_store()
+    if isinstance(results, list):
+        store.put_results(query, results)
+        return results
+    # Tavily reports some failures as a string; use indexed evidence if any
+    return store.search_snippets(query, k=SEARCH_MAX_RESULTS) or results
+
+
+def _search(query: str) -> Any:
+    local = _local_results(query)
+    if local is not None:
+        return local
+    tavily_limiter = get_rate_limiter("tavily")
+    if tavily_limiter is not None:
+        tavily_limiter.acquire()
+    try:
+        results = search_tool().invoke({"query": query})
+    except Exception:
+        fallback = get_research_store().search_snippets(query, k=SEARCH_MAX_RESULTS)
+        if not fallback:
+            raise
+        return fallback
+    return _store_or_fallback(query, results)
+
+
+async def _asearch(query: str) -> Any:
+    local = _local_results(query)
+    if local is not None:
+        return local
+    tavily_limiter = get_rate_limiter("tavily")
+    if tavily_limiter is not None:
+        await tavily_limiter.aacquire()
+    try:
+        results = await search_tool().ainvoke({"query": query})
+    except Exception:
+        fallback = get_research_store().search_snippets(query, k=SEARCH_MAX_RESULTS)
+        if not fallback:
+            raise
+        return fallback
+    return _store_or_fallback(query, results)
+
+
+def _select_results(state: BlogState, queries: List[str], outcomes: List[Any]) -> str:
+    """
+    Dedupe and rank the fan-out results, then keep the chunks most relevant
+    to the topic and queries (BM25) within RESEARCH_TOKEN_BUDGET, grouped by
+    source in rank order. A failing query is dropped; if every query failed
+    the first error is raised.
+    """
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    if errors and len(errors) == len(outcomes):
+        raise errors[0]
+    results = rank_results(merge_results([o for o in outcomes if not isinstance(o, BaseException)]))
+    kept = rank_chunks(
+        [r["content"] for r in results],
+        " ".join([state["topic"], state.get("constraints", "")] + queries),
+        RESEARCH_TOKEN_BUDGET,
+        RESEARCH_CHUNK_TOKENS,
     )
+    return format_results([{**r, "content": "\n".join(chunks)} for r, chunks in zip(results, kept) if chunks])
+
 
-    messages = prompt.format_messages(
+get_prompt_registry().register(
+    "researcher",
+    system="researcher_system",
+    human=(
+        "Topic: {topic}\nTone: {tone}\nWord count target: {word_count}\n"
+        "Additional constraints: {constraints}\n\n"
+        "Web search results (deduplicated, most relevant first):\n{search_results}"
+    ),
+    variables=("topic", "tone", "word_count", "constraints", "search_results"),
+)
+
+
+def _build_messages(state: BlogState, search_results: Any):
+    topic = state["topic"]
+    constraints = state.get("constraints", "")
+    tone = state.get("tone", "")
+    word_count = state.get("word_count", 800)
+
+    return get_prompt_registry().get("researcher").format_messages(
         topic=topic,
         tone=tone,
         word_count=word_count,
@@ -50,7 +171,55 @@ def researcher_node(state: BlogState) -> BlogState:
         search_results=search_results,
     )
 
-    response = researcher_llm.invoke(messages)
 
-    state["research_notes"] = response.content
-    return state
+def _search_or_error(query: str) -> Any:
+    try:
+        return _search(query)
+    except Exception as e:
+        return e
+
+
+def researcher_node(state: BlogState) -> BlogState:
+    """
+    Run every planned query concurrently, merge the results, and summarize
+    them into research notes with a single LLM call. Fresh notes for the same
+    inputs, and cached / indexed results per query, skip the network; notes
+    already in the state (from an archived run) are kept.
+    """
+    if state.get("research_notes"):
+        return {}  # reused from an archived run (agents/archive.py)
+    store = get_research_store()
+    notes_key = research_notes_key(state)
+    cached_notes = store.get_notes(notes_key)
+    if cached_notes is not None:
+        return {"research_notes": cached_notes}
+
+    queries = _build_queries(state)
+    # Context-propagating pool so callbacks/tracing see the search calls
+    with ContextThreadPoolExecutor(max_workers=len(queries)) as pool:
+        outcomes = list(pool.map(_search_or_error, queries))
+    search_results = _select_results(state, queries, outcomes)
+
+    response = researcher_llm().invoke(_build_messages(state, search_results))
+
+    store.put_notes(notes_key, response.content)
+    return {"research_notes": response.content}
+
+
+async def researcher_node_async(state: BlogState) -> BlogState:
+    if state.get("research_notes"):
+        return {}  # reused from an archived run (agents/archive.py)
+    store = get_research_store()
+    notes_key = research_notes_key(state)
+    cached_notes = store.get_notes(notes_key)
+    if cached_notes is not None:
+        return {"research_notes": cached_notes}
+
+    queries = _build_queries(state)
+    outcomes = await asyncio.gather(*(_asearch(q) for q in queries), return_exceptions=True)
+    search_results = _select_results(state, queries, list(outcomes))
+
+    response = await researcher_llm().ainvoke(_build_messages(state, search_results))
+
+    store.put_notes(notes_key, response.content)
+    return {"research_notes": response.content}
@@ -1,47 +1,143 @@
-from langchain_core.prompts import ChatPromptTemplate
+from typing import List
 
-from config.settings import get_llm
-from utils.prompt_loader import load_prompt
+from pydantic import BaseModel, Field
+
+from config.settings import (
+    SEO_KEYWORD_DENSITY_MAX,
+    SEO_KEYWORD_DENSITY_MIN,
+    SEO_META_MAX_CHARS,
+    SEO_META_MIN_CHARS,
+    SEO_TITLE_MAX_CHARS,
+    get_llm,
+    get_prompt_registry,
+)
+from agents.generator import SectionEdit
+from utils.draft_sections import apply_section_edits, normalize_heading, rename_headings, split_sections
+from utils.seo_analyzer import SeoReport, analyze_seo
 from graph.state import BlogState
 
 
-seo_llm = get_llm(temperature=0.4)
+def seo_llm():
+    return get_llm(temperature=0.4, agent="seo")
 
 
-def seo_expert_node(state: BlogState) -> BlogState:
-    topic = state["topic"]
-    tone = state.get("tone", "")
-    constraints = state.get("constraints", "")
-    draft = state.get("draft", "")
-
-    system_prompt = load_prompt("seo_system")
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_prompt),
-            (
-                "human",
-                "Here is the current blog draft. Improve it for SEO.\n\n"
-                "Topic: {topic}\nTone: {tone}\nConstraints: {constraints}\n\n"
-                "Draft:\n{draft}",
-            ),
-        ]
+class HeadingChange(BaseModel):
+    old: str = Field(description="Heading exactly as it appears in the post.")
+    new: str = Field(description="New heading text, without '#'.")
+
+
+class SeoFixes(BaseModel):
+    """Targeted SEO fixes; the post and its metadata are kept apart."""
+    title: str = Field(default="", description="Improved H1 title, or empty to keep the current one.")
+    heading_changes: List[HeadingChange] = Field(default_factory=list, description="Headings to rename.")
+    edits: List[SectionEdit] = Field(
+        default_factory=list,
+        description="Only the sections whose body must change; unchanged sections are omitted.",
+    )
+    meta_description: str = Field(description="Meta description of 120-160 characters.")
+    secondary_keywords: List[str] = Field(default_factory=list, description="3-7 related keywords.")
+
+
+get_prompt_registry().register(
+    "seo",
+    system="seo_system",
+    human=(
+        "Fix the SEO problems of this blog post.\n\n"
+        "Topic: {topic}\nTone: {tone}\nConstraints: {constraints}\n"
+        "Primary keyword: {primary_keyword}\n"
+        "Other keywords: {keywords}\n"
+        "Current meta description: {meta_description}\n\n"
+        "Problems found by the analyzer:\n{issues}\n\n"
+        "Post:\n{draft}"
+    ),
+    variables=(
+        "topic", "tone", "constraints", "primary_keyword", "keywords",
+        "meta_description", "issues", "draft",
+    ),
+)
+
+
+def _analyze(state: BlogState, draft: str, meta_description=None) -> SeoReport:
+    return analyze_seo(
+        draft,
+        state.get("topic", ""),
+        state.get("constraints", ""),
+        meta_description=meta_description,
+        density_range=(SEO_KEYWORD_DENSITY_MIN, SEO_KEYWORD_DENSITY_MAX),
+        meta_range=(SEO_META_MIN_CHARS, SEO_META_MAX_CHARS),
+        title_max_chars=SEO_TITLE_MAX_CHARS,
     )
 
-    messages = prompt.format_messages(
-        topic=topic,
-        tone=tone,
-        constraints=constraints,
+
+def _build_messages(state: BlogState, draft: str, report: SeoReport):
+    return get_prompt_registry().get("seo").format_messages(
+        topic=state["topic"],
+        tone=state.get("tone", ""),
+        constraints=state.get("constraints", ""),
+        primary_keyword=report.primary_keyword or "(none)",
+        keywords=", ".join(k for k in report.keywords if k != report.primary_keyword) or "(none)",
+        meta_description=report.meta_description or "(none)",
+        issues="\n".join(f"- {issue}" for issue in report.issues),
         draft=draft,
     )
 
-    response = seo_llm.invoke(messages)
 
-    # Response should contain improved draft + SEO metadata.
-    state["seo_suggestions"] = response.content
+def _apply_fixes(draft: str, report: SeoReport, fixes: SeoFixes) -> str:
+    fixed = draft
+    title = fixes.title.strip().lstrip("#").strip()
+    if title and report.title:
+        fixed = rename_headings(fixed, [(report.title, title)])
+    elif title:
+        fixed = f"# {title}\n\n{fixed.lstrip()}"
+    fixed = rename_headings(fixed, [(c.old, c.new) for c in fixes.heading_changes])
+    # section edits may only replace existing sections, never append new ones
+    existing = {normalize_heading(h) for h, _ in split_sections(fixed)}
+    edits = [
+        (e.heading, e.content)
+        for e in fixes.edits
+        if normalize_heading(e.heading) in existing and e.content.strip()
+    ]
+    return apply_section_edits(fixed, edits) if edits else fixed
+
+
+def _seo_update(state: BlogState, draft: str, report: SeoReport, fixes: SeoFixes) -> BlogState:
+    meta = fixes.meta_description.strip() or report.meta_description
+    fixed = _apply_fixes(draft, report, fixes)
+    after = _analyze(state, fixed, meta)
+    if len(after.issues) > len(report.issues):
+        # the fixes made things worse: keep the post, take only the metadata
+        fixed, after = draft, _analyze(state, draft, meta)
+    seo = after.as_dict()
+    seo["secondary_keywords"] = [k.strip() for k in fixes.secondary_keywords if k.strip()]
+    seo["issues_before"] = report.issues
+    update: BlogState = {"seo": seo}
+    if fixed != draft:
+        update["best_draft"] = fixed
+    return update
+
+
+def _skip(state: BlogState) -> bool:
+    return not state.get("guardrails_valid", True) or not state.get("best_draft")
+
+
+def seo_expert_node(state: BlogState) -> BlogState:
+    """Runs once after the loop on best_draft; no model call when the analyzer finds nothing."""
+    if _skip(state):
+        return {}
+    draft = state["best_draft"]
+    report = _analyze(state, draft)
+    if not report.issues:
+        return {"seo": {**report.as_dict(), "secondary_keywords": [], "issues_before": []}}
+    fixes = seo_llm().with_structured_output(SeoFixes).invoke(_build_messages(state, draft, report))
+    return _seo_update(state, draft, report, fixes)
+
 
-    # Optionally: let SEO expert directly rewrite the draft.
-    # For simplicity, assume the first part of the response is the improved draft.
-    # You can change this logic based on how you design the prompt.
-    state["draft"] = response.content
-    return state
+async def seo_expert_node_async(state: BlogState) -> BlogState:
+    if _skip(state):
+        return {}
+    draft = state["best_draft"]
+    report = _analyze(state, draft)
+    if not report.issues:
+        return {"seo": {**report.as_dict(), "secondary_keywords": [], "issues_before": []}}
+    fixes = await seo_llm().with_structured_output(SeoFixes).ainvoke(_build_messages(state, draft, report))
+    return _seo_update(state, draft, report, fixes)
@@ -0,0 +1,249 @@
+# batch.py (batch blog generation across many topics)
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+from rich.console import Console
+
+from graph.results import result_record
+from graph.state import BlogState, make_initial_state
+from utils.tracing import export_chrome_trace, export_jsonl
+
+console = Console()
+
+
+def seed_id(seed: Dict[str, Any]) -> str:
+    """
+    Stable identifier for a seed: its explicit 'id' if given, otherwise a hash
+    of the user inputs so re-runs of the same file can be resumed.
+    """
+    if seed.get("id"):
+        return str(seed["id"])
+    key = json.dumps(
+        [seed.get("topic", ""), seed.get("tone", ""), seed.get("constraints", ""),
+         str(seed.get("word_count", ""))],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def load_seeds(path: Path) -> List[Dict[str, Any]]:
+    """Read BlogState seeds from a .jsonl or .csv file (one topic per row)."""
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            rows = [dict(row) for row in csv.DictReader(f)]
+    else:
+        with path.open(encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [row for row in rows if str(row.get("topic", "")).strip()]
+
+
+def seed_to_state(seed: Dict[str, Any], max_iterations: int) -> BlogState:
+    try:
+        word_count = int(seed.get("word_count") or 800)
+    except ValueError:
+        word_count = 800
+    try:
+        iterations = int(seed.get("max_iterations") or max_iterations)
+    except ValueError:
+        iterations = max_iterations
+    return make_initial_state(
+        topic=str(seed["topic"]).strip(),
+        word_count=word_count,
+        tone=str(seed.get("tone") or "").strip(),
+        constraints=str(seed.get("constraints") or "").strip(),
+        max_iterations=iterations,
+    )
+
+
+def completed_ids(output_path: Path) -> Set[str]:
+    """IDs that already have a successful record in the output file."""
+    done: Set[str] = set()
+    if not output_path.exists():
+        return done
+    with output_path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # partial line from an interrupted run
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+async def run_batch(
+    seeds: List[Dict[str, Any]],
+    output_path: Path,
+    concurrency: int = 8,
+    max_iterations: int = 5,
+    trace_dir: Optional[Path] = None,
+    fresh: bool = False,
+) -> Dict[str, int]:
+    """
+    Run the blog graph for every seed with at most `concurrency` pipelines in
+    flight. One JSON record is appended to `output_path` as each topic finishes.
+    Seeds that already have an 'ok' record, and repeats of an earlier seed
+    (same id), are skipped; seeds that
+    failed or were interrupted continue from their last checkpointed node
+    (thread_id = seed id) unless `fresh` is set.
+    With `trace_dir`, node spans go to spans.jsonl and <id>.trace.json there.
+    """
+    # Imported here so rate-limit env vars set by the CLI are seen by the agents
+    from config.settings import CHECKPOINT_KEEP_FINISHED, CHECKPOINT_PATH, get_checkpointer
+    from graph.builder import build_blog_graph
+
+    done = completed_ids(output_path)
+    # one run per seed id: duplicate rows would share (and clobber) one checkpoint thread
+    unique: Dict[str, Dict[str, Any]] = {}
+    for seed in seeds:
+        unique.setdefault(seed_id(seed), seed)
+    pending = [s for sid, s in unique.items() if sid not in done]
+    stats = {"total": len(seeds), "skipped": len(seeds) - len(pending), "ok": 0, "error": 0, "resumed": 0}
+    if not pending:
+        return stats
+
+    checkpointer = get_checkpointer() if CHECKPOINT_PATH else None
+    app = build_blog_graph(async_mode=True, checkpointer=checkpointer)
+
+    async def start(sid: str, seed: Dict[str, Any]) -> Dict[str, Any]:
+        if checkpointer is None:
+            return await app.ainvoke(seed_to_state(seed, max_iterations))
+        config = {"configurable": {"thread_id": sid}}
+        if fresh:
+            await checkpointer.adelete_thread(sid)
+        else:
+            snapshot = await app.aget_state(config)
+            if snapshot.values:
+                stats["resumed"] += 1
+                # finished before its record was written: nothing left to run
+                if not snapshot.next:
+                    return snapshot.values
+                return await app.ainvoke(None, config=config)
+        return await app.ainvoke(seed_to_state(seed, max_iterations), config=config)
+
+    # Any remaining sync work runs in the loop's executor; size it to the cap
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+
+    with output_path.open("a", encoding="utf-8") as out:
+
+        async def run_one(seed: Dict[str, Any]) -> None:
+            sid = seed_id(seed)
+            submitted = time.perf_counter()
+            async with semaphore:
+                started = time.perf_counter()
+                record: Dict[str, Any] = {"id": sid, "queued_s": round(started - submitted, 3)}
+                try:
+                    final_state = await start(sid, seed)
+                    record["status"] = "ok"
+                    record.update(result_record(final_state))
+                    trace = final_state.get("trace", [])
+                    if trace_dir is not None:
+                        export_jsonl(trace, trace_dir / "spans.jsonl", run_id=sid)
+                        export_chrome_trace(trace, trace_dir / f"{sid}.trace.json", run_id=sid)
+                    if checkpointer is not None and not CHECKPOINT_KEEP_FINISHED:
+                        await checkpointer.adelete_thread(sid)
+                except Exception as e:
+                    record["status"] = "error"
+                    record["topic"] = seed.get("topic", "")
+                    record["error"] = f"{type(e).__name__}: {e}"
+                record["elapsed_s"] = round(time.perf_counter() - started, 3)
+
+            async with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats[record["status"]] += 1
+
+            status_style = "green" if record["status"] == "ok" else "red"
+            console.print(
+                f"[{status_style}]{record['status']:>5}[/{status_style}] "
+                f"{sid}  {str(record.get('topic', ''))[:60]}  "
+                f"[dim]{record['elapsed_s']:.1f}s[/dim]"
+            )
+
+        await asyncio.gather(*(run_one(s) for s in pending))
+
+    return stats
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate blogs for many topics.")
+    parser.add_argument("input", type=Path, help="JSONL or CSV file of topic seeds")
+    parser.add_argument(
+        "-o", "--output", type=Path, default=None,
+        help="JSONL results file (default: <input>.results.jsonl); appended to on resume",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="Max pipelines in flight")
+    parser.add_argument("--max-iterations", type=int, default=5)
+    parser.add_argument("--groq-rps", type=float, default=None,
+                        help="Max Groq requests/second shared by all pipelines")
+    parser.add_argument("--tavily-rps", type=float, default=None,
+                        help="Max Tavily requests/second shared by all pipelines")
+    parser.add_argument("--trace-dir", type=Path, default=None,
+                        help="Write per-node spans (JSONL) and Chrome trace files here")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore checkpoints of interrupted seeds and start them over")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # .env first: settings are read from the environment when they are imported
+    load_dotenv()
+    if args.groq_rps is not None:
+        os.environ["GROQ_REQUESTS_PER_SECOND"] = str(args.groq_rps)
+    if args.tavily_rps is not None:
+        os.environ["TAVILY_REQUESTS_PER_SECOND"] = str(args.tavily_rps)
+
+    output_path = args.output or args.input.with_suffix(".results.jsonl")
+    seeds = load_seeds(args.input)
+
+    console.print(
+        f"[bold cyan]Batch blog generation[/bold cyan]: {len(seeds)} topic(s), "
+        f"concurrency {args.concurrency} → {output_path}"
+    )
+    started = time.perf_counter()
+    stats = asyncio.run(
+        run_batch(
+            seeds,
+            output_path,
+            concurrency=max(1, args.concurrency),
+            max_iterations=args.max_iterations,
+            trace_dir=args.trace_dir,
+            fresh=args.fresh,
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    console.print(
+        f"\n[bold]Done in {elapsed:.1f}s[/bold]: {stats['ok']} ok, {stats['error']} failed, "
+        f"{stats['skipped']} skipped (already completed), "
+        f"{stats['resumed']} resumed from a checkpoint"
+    )
+    from agents.guardrails import guardrails_stats
+
+    tiers = guardrails_stats()
+    if tiers:
+        console.print(
+            "[dim]Guardrails per tier: "
+            + ", ".join(f"{tier} {count}" for tier, count in sorted(tiers.items()))
+            + "[/dim]"
+        )
+
+
+if __name__ == "__main__":
+    main()
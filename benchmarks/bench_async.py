@@ -0,0 +1,79 @@
+"""
+Throughput of the sync graph (thread pool) vs the async graph (one event loop)
+against a fake LLM that injects fixed latency per call.
+
+    python -m benchmarks.bench_async --pipelines 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.common import use_fake_backends
+from graph.state import make_initial_state
+
+console = Console()
+
+
+def _states(n: int, max_iterations: int):
+    return [
+        make_initial_state(topic=f"benchmark topic {i}", max_iterations=max_iterations)
+        for i in range(n)
+    ]
+
+
+def bench_sync(pipelines: int, workers: int, max_iterations: int) -> float:
+    from graph.builder import build_blog_graph
+
+    app = build_blog_graph()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(app.invoke, _states(pipelines, max_iterations)))
+    return time.perf_counter() - started
+
+
+async def bench_async(pipelines: int, concurrency: int, max_iterations: int) -> float:
+    from graph.builder import build_blog_graph
+
+    app = build_blog_graph(async_mode=True)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(state):
+        async with semaphore:
+            await app.ainvoke(state)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(s) for s in _states(pipelines, max_iterations)))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pipelines", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake call")
+    parser.add_argument("--workers", type=int, default=32, help="Threads for the sync graph")
+    parser.add_argument("--concurrency", type=int, default=200, help="In-flight async pipelines")
+    parser.add_argument("--max-iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    # Constant critic score below the threshold: every pipeline runs all iterations
+    use_fake_backends(latency_s=args.latency, search_latency_s=args.latency, critic_scores=[0.7])
+
+    sync_s = bench_sync(args.pipelines, args.workers, args.max_iterations)
+    async_s = asyncio.run(bench_async(args.pipelines, args.concurrency, args.max_iterations))
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Graph", style="cyan")
+    table.add_column("In flight", justify="right")
+    table.add_column("Wall time", justify="right")
+    table.add_column("Pipelines/s", justify="right")
+    table.add_row("sync", str(args.workers), f"{sync_s:.2f}s", f"{args.pipelines / sync_s:.1f}")
+    table.add_row("async", str(args.concurrency), f"{async_s:.2f}s", f"{args.pipelines / async_s:.1f}")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Memory benchmark: many pipelines in flight on one event loop, measuring
+Python heap use (tracemalloc) while they run and what their final states
+retain afterwards.
+
+    python -m benchmarks.bench_memory                      # 1,000 concurrent states
+    python -m benchmarks.bench_memory --states 1000 --iterations 8 --topics 10
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.common import use_fake_backends
+from graph.state import make_initial_state
+
+console = Console()
+
+
+def _deep_size(obj: Any, seen: set) -> int:
+    """Bytes reachable from obj, counting each shared object once."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(v, seen) for v in obj)
+    return size
+
+
+async def run(app, states: int, topics: int, max_iterations: int) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    finals: List[Dict[str, Any]] = await asyncio.gather(
+        *(
+            app.ainvoke(
+                make_initial_state(topic=f"memory topic {i % topics}", max_iterations=max_iterations)
+            )
+            for i in range(states)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seen: set = set()
+    retained = sum(_deep_size(state, seen) for state in finals)
+    return {
+        "elapsed_s": elapsed,
+        "peak_mb": (peak - baseline) / 1e6,
+        "retained_mb": (current - baseline) / 1e6,
+        "state_kb": retained / len(finals) / 1e3,
+        "mistakes": sum(len(s.get("mistake_memory", [])) for s in finals) / len(finals),
+        "scores": sum(len(s.get("confidence_scores", [])) for s in finals) / len(finals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--states", type=int, default=1000, help="Pipelines in flight at once")
+    parser.add_argument("--topics", type=int, default=10, help="Distinct topics (research is shared)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.01, help="Fake LLM seconds per call")
+    args = parser.parse_args()
+
+    # low scores so every pipeline runs all its iterations
+    use_fake_backends(latency_s=args.latency, search_latency_s=args.latency, critic_scores=[0.5])
+    os.environ["STOP_POLICIES"] = "threshold,max_iterations"
+    from graph.builder import build_blog_graph
+
+    app = build_blog_graph(async_mode=True)
+    r = asyncio.run(run(app, args.states, args.topics, args.iterations))
+
+    table = Table(title=f"Memory ({args.states} concurrent states)", show_header=True, header_style="bold magenta")
+    for column in ("Wall", "Peak heap", "Retained", "Per state", "Mistakes/state", "Scores/state"):
+        table.add_column(column, justify="right")
+    table.add_row(
+        f"{r['elapsed_s']:.2f}s", f"{r['peak_mb']:.1f} MB", f"{r['retained_mb']:.1f} MB",
+        f"{r['state_kb']:.1f} KB", f"{r['mistakes']:.1f}", f"{r['scores']:.1f}",
+    )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+End-to-end pipeline benchmark on the offline fake backends (no network).
+
+For every (max_iterations, concurrency) pair it runs N pipelines on the async
+graph and reports pipelines/s, per-node latency percentiles from the traces,
+and peak Python memory (tracemalloc).
+
+    python -m benchmarks.bench_pipeline --pipelines 100 --iterations 2 3 5 --concurrency 1 16 64
+    python -m benchmarks.bench_pipeline --json bench.json   # machine-readable, for diffing runs
+    python -m benchmarks.bench_pipeline --candidates 3      # best-of-N drafts per round
+    python -m benchmarks.bench_pipeline --critic-mode ensemble  # one critic call per aspect, in parallel
+    python -m benchmarks.bench_pipeline --word-count 4000 --tokens-per-s 200 --sections 0
+                                                            # long posts written in one pass (0) vs. per section
+    python -m benchmarks.bench_pipeline --routing config/models.json --critic-scores 0.6 0.61 0.7
+                                                            # model cascade: escalate when scores stall
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.common import use_fake_backends
+from graph.state import make_initial_state
+
+console = Console()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+async def run_config(
+    app, pipelines: int, max_iterations: int, concurrency: int, memory: bool, word_count: int = 800
+) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    node_walls: Dict[str, List[float]] = {}
+    costs: List[float] = []
+    hops: List[int] = []
+
+    async def run(i: int) -> None:
+        async with semaphore:
+            state = await app.ainvoke(
+                make_initial_state(topic=f"bench topic {max_iterations}-{concurrency}-{i}",
+                                   word_count=word_count, max_iterations=max_iterations)
+            )
+        for span in state.get("trace", []):
+            node_walls.setdefault(span["node"], []).append(span["wall_ms"])
+        costs.append(sum(span["cost_usd"] for span in state.get("trace", [])))
+        hops.append(len(state.get("model_hops") or []))
+
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(pipelines)))
+    elapsed = time.perf_counter() - started
+    peak_mb = 0.0
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / 1e6
+
+    return {
+        "max_iterations": max_iterations,
+        "concurrency": concurrency,
+        "pipelines": pipelines,
+        "elapsed_s": elapsed,
+        "pipelines_per_s": pipelines / elapsed,
+        "peak_mem_mb": peak_mb,
+        "cost_usd_per_pipeline": sum(costs) / len(costs),
+        "model_hops_per_pipeline": sum(hops) / len(hops),
+        "nodes": {
+            node: {
+                "count": len(walls),
+                "p50_ms": _percentile(walls, 0.50),
+                "p95_ms": _percentile(walls, 0.95),
+                "max_ms": max(walls),
+            }
+            for node, walls in node_walls.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=100)
+    parser.add_argument("--iterations", type=int, nargs="+", default=[2, 3, 5])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake LLM seconds per call")
+    parser.add_argument("--search-latency", type=float, default=0.02)
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Fake LLM output rate (0 = instant)")
+    parser.add_argument("--candidates", type=int, default=1, help="Best-of-N drafts per round (GENERATOR_CANDIDATES)")
+    parser.add_argument("--critic-mode", choices=("single", "ensemble"), default=None, help="CRITIC_MODE")
+    parser.add_argument("--word-count", type=int, default=800, help="Target words per post")
+    parser.add_argument(
+        "--sections", type=int, default=None,
+        help="GENERATOR_SECTIONS_MIN_WORDS: write posts this long per section (0 = always one pass)",
+    )
+    parser.add_argument("--routing", default="", help="Model routing file (MODEL_ROUTING_PATH); default one model")
+    parser.add_argument(
+        "--critic-scores", type=float, nargs="+", default=[0.5], help="Fake critic score per iteration"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows the run)")
+    parser.add_argument("--json", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    # By default the critic never reaches the threshold and adaptive stopping is
+    # off, so runs use exactly max_iterations
+    use_fake_backends(
+        latency_s=args.latency,
+        search_latency_s=args.search_latency,
+        tokens_per_s=args.tokens_per_s,
+        critic_scores=args.critic_scores,
+        model_routing=args.routing,
+    )
+    os.environ["GENERATOR_CANDIDATES"] = str(args.candidates)
+    os.environ["STOP_POLICIES"] = "threshold,max_iterations"
+    if args.critic_mode:
+        os.environ["CRITIC_MODE"] = args.critic_mode
+    if args.sections is not None:
+        os.environ["GENERATOR_SECTIONS_MIN_WORDS"] = str(args.sections)
+    from graph.builder import build_blog_graph
+
+    app = build_blog_graph(async_mode=True)
+
+    results = []
+    for max_iterations in args.iterations:
+        for concurrency in args.concurrency:
+            results.append(
+                asyncio.run(run_config(
+                    app, args.pipelines, max_iterations, concurrency, not args.no_memory, args.word_count
+                ))
+            )
+
+    table = Table(title="Pipelines", show_header=True, header_style="bold magenta")
+    for column in ("Iterations", "Concurrency", "Wall", "Pipelines/s", "Cost/run", "Hops/run", "Peak mem"):
+        table.add_column(column, justify="right")
+    for r in results:
+        table.add_row(
+            str(r["max_iterations"]), str(r["concurrency"]), f"{r['elapsed_s']:.2f}s",
+            f"{r['pipelines_per_s']:.1f}", f"${r['cost_usd_per_pipeline']:.5f}",
+            f"{r['model_hops_per_pipeline']:.2f}", f"{r['peak_mem_mb']:.1f} MB" if r["peak_mem_mb"] else "-",
+        )
+    console.print(table)
+
+    nodes = Table(title="Per-node latency (ms)", show_header=True, header_style="bold magenta")
+    for column in ("Iterations", "Concurrency", "Node", "Runs", "p50", "p95", "max"):
+        nodes.add_column(column, justify="left" if column == "Node" else "right")
+    for r in results:
+        for node, stats in sorted(r["nodes"].items(), key=lambda item: -item[1]["p95_ms"]):
+            nodes.add_row(
+                str(r["max_iterations"]), str(r["concurrency"]), node, str(stats["count"]),
+                f"{stats['p50_ms']:.1f}", f"{stats['p95_ms']:.1f}", f"{stats['max_ms']:.1f}",
+            )
+    console.print(nodes)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        console.print(f"[dim]Results written to {args.json}[/dim]")
+
+
+if __name__ == "__main__":
+    main()
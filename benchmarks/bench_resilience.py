@@ -0,0 +1,117 @@
+"""
+Resilience benchmark: pipelines against a fake LLM that injects errors and
+slow calls, reporting completion rate, pipeline latency percentiles and the
+retries / hedges / fallbacks the call layer (utils/resilience.py) needed.
+
+    python -m benchmarks.bench_resilience --error-rate 0.2 --retry-after 0.1
+    python -m benchmarks.bench_resilience --slow-rate 0.1 --slow-latency 1.0
+    python -m benchmarks.bench_resilience --slow-rate 0.1 --slow-latency 1.0 --hedge-quantile 0.9
+    python -m benchmarks.bench_resilience --error-rate 0.2 --max-retries 0   # no retries: failures
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.common import use_fake_backends
+from graph.state import make_initial_state
+
+console = Console()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+async def run(app, pipelines: int, concurrency: int, max_iterations: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    walls: List[float] = []
+    totals = {"ok": 0, "failed": 0, "llm_calls": 0, "retries": 0, "hedges": 0, "fallbacks": 0}
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                state = await app.ainvoke(
+                    make_initial_state(topic=f"resilience topic {i}", max_iterations=max_iterations)
+                )
+            except Exception:
+                totals["failed"] += 1
+                return
+            walls.append(time.perf_counter() - started)
+        totals["ok"] += 1
+        for span in state.get("trace", []):
+            for key in ("llm_calls", "retries", "hedges", "fallbacks"):
+                totals[key] += span.get(key, 0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(pipelines)))
+    totals["elapsed_s"] = time.perf_counter() - started
+    totals["p50_s"] = _percentile(walls, 0.50)
+    totals["p95_s"] = _percentile(walls, 0.95)
+    totals["max_s"] = max(walls) if walls else 0.0
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM seconds per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing")
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=0.0, help="retry-after header on failures (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of calls that are slow")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Extra seconds for a slow call")
+    parser.add_argument("--max-retries", type=int, default=4)
+    parser.add_argument("--backoff-base", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=0.0, help="Per-call timeout (0 = none)")
+    parser.add_argument("--hedge-quantile", type=float, default=0.0, help="Hedge past this latency quantile")
+    parser.add_argument("--fallback", default="llama-3.3-70b-versatile", help="Fallback model ('' = none)")
+    args = parser.parse_args()
+
+    use_fake_backends(latency_s=args.latency, search_latency_s=args.latency, critic_scores=[0.5])
+    os.environ.update(
+        {
+            "STOP_POLICIES": "threshold,max_iterations",
+            "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+            "FAKE_LLM_ERROR_STATUS": str(args.error_status),
+            "FAKE_LLM_RETRY_AFTER_S": str(args.retry_after),
+            "FAKE_LLM_SLOW_RATE": str(args.slow_rate),
+            "FAKE_LLM_SLOW_LATENCY_S": str(args.slow_latency),
+            "LLM_MAX_RETRIES": str(args.max_retries),
+            "LLM_BACKOFF_BASE_S": str(args.backoff_base),
+            "LLM_CALL_TIMEOUT_S": str(args.timeout),
+            "LLM_HEDGE_QUANTILE": str(args.hedge_quantile),
+            "LLM_HEDGE_MIN_SAMPLES": "10",
+            "LLM_FALLBACK_MODEL": args.fallback,
+            # every call has to reach the (faulty) model
+            "LLM_CACHE_AGENTS": "",
+        }
+    )
+    from graph.builder import build_blog_graph
+
+    app = build_blog_graph(async_mode=True)
+    r = asyncio.run(run(app, args.pipelines, args.concurrency, args.iterations))
+
+    table = Table(title="Resilience", show_header=True, header_style="bold magenta")
+    for column in ("OK", "Failed", "Wall", "p50", "p95", "max", "LLM calls", "Retries", "Hedges", "Fallbacks"):
+        table.add_column(column, justify="right")
+    table.add_row(
+        str(r["ok"]), str(r["failed"]), f"{r['elapsed_s']:.2f}s", f"{r['p50_s']:.2f}s",
+        f"{r['p95_s']:.2f}s", f"{r['max_s']:.2f}s", str(r["llm_calls"]), str(r["retries"]),
+        str(r["hedges"]), str(r["fallbacks"]),
+    )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Research retrieval (utils/research_chunks) on notes of increasing size: cost
+of chunking + indexing and of one BM25 query, and the research tokens a
+revision prompt carries with top-k chunks versus the whole notes compressed
+to the same budget. No network or LLM involved.
+
+    python -m benchmarks.bench_retrieval --words 1000 10000 100000 --repeat 200
+"""
+import argparse
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.bench_text_metrics import make_draft
+from utils.prompt_budget import compress_text
+from utils.research import estimate_tokens
+from utils.research_chunks import ChunkIndex, chunk_text, relevant_chunks
+
+console = Console()
+
+FEEDBACK = "Depth: add concrete python testing examples and benchmark evidence to the deployment section."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=1500, help="Research token budget of the prompt")
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--chunk-tokens", type=int, default=120)
+    args = parser.parse_args()
+
+    table = Table(title="Research retrieval", show_header=True, header_style="bold magenta")
+    for column in ("Words", "Notes", "Chunks", "Index build", "Per query", "Compressed", "Top-k"):
+        table.add_column(column, justify="right")
+
+    for words in args.words:
+        notes = make_draft(words, seed=1)
+        started = time.perf_counter()
+        index = ChunkIndex(chunk_text(notes, args.chunk_tokens))
+        build = time.perf_counter() - started
+
+        repeat = max(1, args.repeat * 1000 // max(words, 1000))
+        started = time.perf_counter()
+        for _ in range(repeat):
+            index.top(FEEDBACK, args.top_k, args.budget)
+        per_query = (time.perf_counter() - started) / repeat
+
+        compressed = compress_text(notes, args.budget)
+        top_k = relevant_chunks(notes, FEEDBACK, args.budget, args.top_k, args.chunk_tokens)
+        table.add_row(
+            f"{words:,}", f"{estimate_tokens(notes):,} tok", f"{len(index.chunks):,}",
+            f"{build * 1e3:,.1f} ms", f"{per_query * 1e6:,.0f} µs",
+            f"{estimate_tokens(compressed):,} tok", f"{estimate_tokens(top_k):,} tok",
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
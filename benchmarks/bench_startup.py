@@ -0,0 +1,83 @@
+"""
+CLI startup cost: `python -X importtime` of a module in a fresh interpreter
+(median of several runs), the slowest imports, and whether any provider SDK
+was imported. Exits non-zero when the median exceeds --budget-ms.
+
+    python -m benchmarks.bench_startup                  # import graph.builder
+    python -m benchmarks.bench_startup --module main --budget-ms 1200
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# Imported lazily on the first real LLM / search call, never at startup
+PROVIDER_MODULES = ("langchain_groq", "groq", "langchain_community", "tavily")
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """Total import time (ms) of `module` and (name, cumulative ms) per top-level import."""
+    # no API keys: importing must not need them
+    env = {k: v for k, v in os.environ.items() if k not in ("GROQ_API_KEY", "TAVILY_API_KEY")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    modules: Dict[str, float] = {}
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        depth = len(match.group(3)) // 2
+        modules[match.group(4)] = cumulative_ms
+        if depth == 0:
+            total += cumulative_ms
+    return total, sorted(modules.items(), key=lambda item: -item[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="graph.builder")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=1200.0)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(total for total, _ in runs)
+    _, modules = runs[-1]
+
+    table = Table(title=f"import {args.module}", show_header=True, header_style="bold magenta")
+    table.add_column("Module")
+    table.add_column("Cumulative", justify="right")
+    for name, ms in modules[: args.top]:
+        table.add_row(name, f"{ms:.1f} ms")
+    console.print(table)
+
+    loaded = [name for name, _ in modules if name.split(".")[0] in PROVIDER_MODULES]
+    if loaded:
+        console.print(f"[yellow]Provider SDKs imported at startup: {', '.join(sorted(set(loaded))[:5])}[/yellow]")
+
+    over = median_ms > args.budget_ms
+    style = "red" if over else "green"
+    console.print(f"[{style}]median {median_ms:.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)[/{style}]")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
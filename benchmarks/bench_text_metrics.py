@@ -0,0 +1,69 @@
+"""
+Throughput of the critic's local pre-scoring (utils/text_metrics) on drafts of
+increasing size. No network or LLM involved.
+
+    python -m benchmarks.bench_text_metrics --words 800 5000 50000 --repeat 200
+"""
+import argparse
+import random
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from utils.text_metrics import extract_keywords, prescore
+
+console = Console()
+
+_VOCABULARY = (
+    "pipeline latency model research draft reader example practice pattern strategy data "
+    "insight workflow quality signal context benchmark approach detail result evidence guide "
+    "team metric structure python testing deployment monitoring"
+).split()
+
+
+def make_draft(words: int, seed: int = 0) -> str:
+    """Markdown draft of about `words` words: a title, ~150-word sections, 12-word sentences."""
+    rng = random.Random(seed)
+    parts = ["# Python Testing Guide"]
+    remaining, section = words, 1
+    while remaining > 0:
+        size = min(150, remaining)
+        sentences = []
+        for start in range(0, size, 12):
+            sentence = " ".join(rng.choice(_VOCABULARY) for _ in range(min(12, size - start)))
+            sentences.append(sentence.capitalize() + ".")
+        parts.append(f"## Section {section}\n" + " ".join(sentences))
+        remaining -= size
+        section += 1
+    return "\n\n".join(parts) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[800, 5000, 50000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    keywords = extract_keywords("python testing guide", "SEO terms: pytest, ci pipeline; audience: developers")
+    table = Table(title="Critic pre-scoring", show_header=True, header_style="bold magenta")
+    for column in ("Words", "Draft size", "Per call", "Drafts/s", "MB/s"):
+        table.add_column(column, justify="right")
+
+    for words in args.words:
+        draft = make_draft(words)
+        repeat = max(1, args.repeat * 800 // max(words, 800))
+        prescore(draft, words, keywords)  # warm up regex / numpy paths
+        started = time.perf_counter()
+        for _ in range(repeat):
+            prescore(draft, words, keywords)
+        per_call = (time.perf_counter() - started) / repeat
+        table.add_row(
+            f"{words:,}", f"{len(draft) / 1024:.0f} KB", f"{per_call * 1e6:,.0f} µs",
+            f"{1 / per_call:,.0f}", f"{len(draft) / per_call / 1e6:.1f}",
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
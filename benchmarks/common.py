@@ -0,0 +1,40 @@
+"""Shared setup for the offline benchmarks (must run before importing config.settings)."""
+import os
+import tempfile
+from typing import Iterable
+
+
+def use_fake_backends(
+    latency_s: float = 0.05,
+    search_latency_s: float = 0.05,
+    tokens_per_s: float = 0.0,
+    critic_scores: Iterable[float] = (0.7,),
+    archive_reuse: str = "",
+    model_routing: str = "",
+) -> None:
+    """
+    Point the backend registry at the offline fakes and give this process its
+    own empty research store and LLM cache, so runs are reproducible. Runs
+    are archived, but only reuse archived drafts / research if `archive_reuse`
+    says so (ARCHIVE_REUSE), since benchmark topics are near-duplicates.
+    Every agent uses one model unless `model_routing` names a routing file
+    (MODEL_ROUTING_PATH, e.g. config/models.json).
+    """
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.environ.update(
+        {
+            "LLM_BACKEND": "fake",
+            "SEARCH_BACKEND": "fake",
+            "FAKE_LLM_LATENCY_S": str(latency_s),
+            "FAKE_LLM_TOKENS_PER_S": str(tokens_per_s),
+            "FAKE_SEARCH_LATENCY_S": str(search_latency_s),
+            "FAKE_CRITIC_SCORES": ",".join(str(s) for s in critic_scores),
+            "RESEARCH_STORE_PATH": os.path.join(workdir, "research.sqlite"),
+            "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.sqlite"),
+            "CHECKPOINT_PATH": os.path.join(workdir, "checkpoints.sqlite"),
+            "CRITIC_CALIBRATION_PATH": os.path.join(workdir, "critic_calibration.sqlite"),
+            "ARCHIVE_PATH": os.path.join(workdir, "archive.sqlite"),
+            "ARCHIVE_REUSE": archive_reuse,
+            "MODEL_ROUTING_PATH": model_routing,
+        }
+    )
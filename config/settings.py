@@ -1,49 +1,615 @@
+import json
 import os
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-load_dotenv()
+# Settings are read from the environment at import; the entry points (main.py,
+# batch.py, server.py) load .env before importing this module. LangChain is
+# only imported by the factories below, on first use.
 
+# Per-provider request rate limits (requests per second). Unset = unlimited.
+# Batch runs set these so N concurrent pipelines share one budget per provider.
+RATE_LIMIT_ENV_VARS: Dict[str, str] = {
+    "groq": "GROQ_REQUESTS_PER_SECOND",
+    "tavily": "TAVILY_REQUESTS_PER_SECOND",
+}
 
-def get_llm(temperature: float = 0.4) -> ChatGroq:
+_rate_limiters: Dict[str, Optional[Any]] = {}
+
+
+def get_rate_limiter(provider: str) -> Optional[Any]:
     """
-    Shared LLM for blog generation, research summarization, SEO, etc.
-    Uses Groq's LLaMA model.
+    Shared, process-wide rate limiter for a provider ("groq", "tavily").
+    Returns None when no limit is configured for that provider.
     """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise RuntimeError("GROQ_API_KEY is not set in .env")
-    return ChatGroq(
-        model="llama-3.1-8b-instant",
-        temperature=temperature,
-        api_key=api_key,
+    if provider not in _rate_limiters:
+        from langchain_core.rate_limiters import InMemoryRateLimiter
+
+        value = os.getenv(RATE_LIMIT_ENV_VARS.get(provider, ""), "").strip()
+        rps = float(value) if value else 0.0
+        _rate_limiters[provider] = (
+            InMemoryRateLimiter(requests_per_second=rps, max_bucket_size=max(1.0, rps))
+            if rps > 0
+            else None
+        )
+    return _rate_limiters[provider]
+
+
+# USD per 1M tokens, used by tracing to estimate cost per call. Prices live in
+# config/models.json ("pricing"); a routing file's own pricing is added on top
+# when the model router loads it.
+MODELS_FILE: Path = Path(__file__).with_name("models.json")
+MODEL_PRICING: Dict[str, Dict[str, float]] = json.loads(MODELS_FILE.read_text(encoding="utf-8")).get("pricing", {})
+TAVILY_COST_PER_SEARCH: float = float(os.getenv("TAVILY_COST_PER_SEARCH", "0.008"))
+
+# Model routing (utils/model_router.py): MODEL_ROUTING_PATH is a JSON file giving
+# each agent a cascade of models, cheapest first, plus the escalation rule and
+# extra pricing. Runs start on each cascade's first model and move one tier up
+# when the critic's scores stall below the confidence threshold. The critic
+# keeps one model by default so scores stay comparable across tiers. An empty
+# path routes every agent to DEFAULT_MODEL_ROLES without escalation.
+MODEL_ROUTING_PATH: str = os.getenv("MODEL_ROUTING_PATH", str(MODELS_FILE))
+DEFAULT_MODEL_ROLES: Dict[str, List[str]] = {
+    "default": ["llama-3.1-8b-instant"],
+    "llama_guard": ["llama-guard-3-1b"],
+}
+
+_model_router: Optional[Any] = None
+
+
+def get_model_router() -> Any:
+    """Process-wide model router; its pricing is added to MODEL_PRICING."""
+    global _model_router
+    if _model_router is None:
+        from utils.model_router import ModelRouter
+
+        router = (
+            ModelRouter.from_file(MODEL_ROUTING_PATH, DEFAULT_MODEL_ROLES)
+            if MODEL_ROUTING_PATH
+            else ModelRouter(DEFAULT_MODEL_ROLES)
+        )
+        MODEL_PRICING.update(router.pricing)
+        _model_router = router
+    return _model_router
+
+# If set, main.py writes per-node spans (JSONL) and a Chrome trace file here
+TRACE_DIR: str = os.getenv("TRACE_DIR", "")
+
+# Disk-backed LLM response cache. Agents opt in by name; deterministic agents
+# (critic, guardrails) are cached by default. Set LLM_CACHE_AGENTS="" to disable.
+LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_AGENTS = {
+    a.strip()
+    for a in os.getenv("LLM_CACHE_AGENTS", "critic,guardrails").split(",")
+    if a.strip()
+}
+
+_llm_cache: Optional[Any] = None
+
+# Max tokens of (deduplicated, ranked) search results sent to the research summarizer
+RESEARCH_TOKEN_BUDGET: int = int(os.getenv("RESEARCH_TOKEN_BUDGET", "3000"))
+
+# Research retrieval (utils/research_chunks.py): search results and research
+# notes are cut into chunks of about RESEARCH_CHUNK_TOKENS and ranked with BM25.
+# The summarizer gets the search-result chunks most relevant to the topic and
+# planned queries; revisions, long-form sections and the critic get only the
+# RESEARCH_TOP_K note chunks most relevant to the feedback, section or draft at
+# hand. CRITIC_RESEARCH_TOKEN_BUDGET=0 keeps the notes out of the critic.
+RESEARCH_CHUNK_TOKENS: int = max(20, int(os.getenv("RESEARCH_CHUNK_TOKENS", "120")))
+RESEARCH_TOP_K: int = max(1, int(os.getenv("RESEARCH_TOP_K", "6")))
+CRITIC_RESEARCH_TOKEN_BUDGET: int = int(os.getenv("CRITIC_RESEARCH_TOKEN_BUDGET", "400"))
+
+# Generator prompt budgets (estimated tokens) and revision mode:
+# "patch" asks for section-level edits applied locally, "rewrite" for a full new draft.
+GENERATOR_RESEARCH_TOKEN_BUDGET: int = int(os.getenv("GENERATOR_RESEARCH_TOKEN_BUDGET", "1500"))
+GENERATOR_FEEDBACK_TOKEN_BUDGET: int = int(os.getenv("GENERATOR_FEEDBACK_TOKEN_BUDGET", "300"))
+GENERATOR_REVISION_MODE: str = os.getenv("GENERATOR_REVISION_MODE", "patch").strip().lower()
+
+# Local pre-scoring in the critic (utils/text_metrics.py): drafts that fail hard
+# checks are scored locally without an LLM call, and unchanged drafts reuse the
+# previous verdict. Measured metrics are otherwise included in the critic prompt.
+CRITIC_PRESCORE: bool = os.getenv("CRITIC_PRESCORE", "1").lower() in ("1", "true", "yes")
+PRESCORE_MIN_LENGTH_RATIO: float = float(os.getenv("PRESCORE_MIN_LENGTH_RATIO", "0.5"))
+PRESCORE_MAX_LENGTH_RATIO: float = float(os.getenv("PRESCORE_MAX_LENGTH_RATIO", "2.0"))
+PRESCORE_MIN_KEYWORD_COVERAGE: float = float(os.getenv("PRESCORE_MIN_KEYWORD_COVERAGE", "0.5"))
+PRESCORE_MAX_REPETITION: float = float(os.getenv("PRESCORE_MAX_REPETITION", "0.25"))
+
+# Critic mode: "single" scores every aspect in one structured call; "ensemble"
+# runs one small call per aspect (grammar, depth, structure, seo_alignment)
+# concurrently, each on an excerpt of at most CRITIC_EXCERPT_TOKEN_BUDGET
+# tokens, and combines them with CRITIC_ASPECT_WEIGHTS. With CRITIC_CALIBRATION
+# set (opt-in), each aspect's bias is removed using the kept drafts' recorded
+# scores (utils/score_calibration.py) once CRITIC_CALIBRATION_MIN_SAMPLES are stored.
+CRITIC_MODE: str = os.getenv("CRITIC_MODE", "single").strip().lower()
+CRITIC_ASPECT_WEIGHTS: Dict[str, float] = {
+    name.strip(): float(weight)
+    for name, weight in (
+        item.split("=", 1)
+        for item in os.getenv(
+            "CRITIC_ASPECT_WEIGHTS", "grammar=1,depth=1.5,structure=1,seo_alignment=0.75"
+        ).split(",")
+        if "=" in item
     )
+}
+CRITIC_EXCERPT_TOKEN_BUDGET: int = int(os.getenv("CRITIC_EXCERPT_TOKEN_BUDGET", "800"))
+CRITIC_CALIBRATION: bool = os.getenv("CRITIC_CALIBRATION", "").lower() in ("1", "true", "yes")
+CRITIC_CALIBRATION_PATH: str = os.getenv("CRITIC_CALIBRATION_PATH", ".cache/critic_calibration.sqlite")
+CRITIC_CALIBRATION_WINDOW: int = int(os.getenv("CRITIC_CALIBRATION_WINDOW", "500"))
+CRITIC_CALIBRATION_MIN_SAMPLES: int = int(os.getenv("CRITIC_CALIBRATION_MIN_SAMPLES", "20"))
+
+_score_calibration: Optional[Any] = None
+
+
+def get_score_calibration() -> Any:
+    """Process-wide history of critic aspect scores."""
+    global _score_calibration
+    if _score_calibration is None:
+        from utils.score_calibration import ScoreCalibration
+
+        _score_calibration = ScoreCalibration(
+            CRITIC_CALIBRATION_PATH,
+            window=CRITIC_CALIBRATION_WINDOW,
+            min_samples=CRITIC_CALIBRATION_MIN_SAMPLES,
+        )
+    return _score_calibration
+
+
+# Best-of-N: each round the generator writes GENERATOR_CANDIDATES drafts (varied
+# temperature and angle, at most GENERATOR_CANDIDATE_CONCURRENCY at once) and the
+# critic scores them in parallel, keeping the best. 1 = one draft per round.
+GENERATOR_CANDIDATES: int = max(1, int(os.getenv("GENERATOR_CANDIDATES", "1")))
+GENERATOR_CANDIDATE_CONCURRENCY: int = max(1, int(os.getenv("GENERATOR_CANDIDATE_CONCURRENCY", "4")))
+GENERATOR_CANDIDATE_TEMPERATURES: List[float] = [
+    float(x) for x in os.getenv("GENERATOR_CANDIDATE_TEMPERATURES", "0.7,0.9,0.5").split(",") if x.strip()
+]
+
+# Long-form mode: posts of at least GENERATOR_SECTIONS_MIN_WORDS words (0 = off)
+# are outlined first, then each section is written concurrently (at most
+# GENERATOR_SECTION_CONCURRENCY at once) with its own slice of the research
+# notes, and the sections are stitched with generated transitions. Revisions
+# rewrite only the sections the critic flagged.
+GENERATOR_SECTIONS_MIN_WORDS: int = int(os.getenv("GENERATOR_SECTIONS_MIN_WORDS", "2000"))
+GENERATOR_SECTION_CONCURRENCY: int = max(1, int(os.getenv("GENERATOR_SECTION_CONCURRENCY", "6")))
+GENERATOR_SECTION_RESEARCH_TOKEN_BUDGET: int = int(os.getenv("GENERATOR_SECTION_RESEARCH_TOKEN_BUDGET", "500"))
+GENERATOR_SECTION_TRANSITIONS: bool = os.getenv("GENERATOR_SECTION_TRANSITIONS", "1").lower() in ("1", "true", "yes")
+
+# SEO stage: after the loop the best draft is analyzed locally
+# (utils/seo_analyzer.py: keyword density per 100 words, keyword placement,
+# title and meta-description length, slug); the LLM is asked for structured
+# fixes only when issues are found. SEO_STAGE=0 skips the stage.
+SEO_STAGE: bool = os.getenv("SEO_STAGE", "1").lower() in ("1", "true", "yes")
+SEO_KEYWORD_DENSITY_MIN: float = float(os.getenv("SEO_KEYWORD_DENSITY_MIN", "0.5"))
+SEO_KEYWORD_DENSITY_MAX: float = float(os.getenv("SEO_KEYWORD_DENSITY_MAX", "2.5"))
+SEO_META_MIN_CHARS: int = int(os.getenv("SEO_META_MIN_CHARS", "120"))
+SEO_META_MAX_CHARS: int = int(os.getenv("SEO_META_MAX_CHARS", "160"))
+SEO_TITLE_MAX_CHARS: int = int(os.getenv("SEO_TITLE_MAX_CHARS", "60"))
+
+# Orchestrator stopping policies, checked in order; the first that fires ends the
+# run and its reason goes to state['stop_reason'] (see utils/stopping.py).
+# Budgets / deadline of 0 are disabled; a caller may also set state['deadline'].
+STOP_POLICIES: List[str] = [
+    p.strip()
+    for p in os.getenv(
+        "STOP_POLICIES", "threshold,max_iterations,plateau,expected_gain,budget,deadline"
+    ).split(",")
+    if p.strip()
+]
+STOP_PLATEAU_WINDOW: int = int(os.getenv("STOP_PLATEAU_WINDOW", "2"))
+STOP_PLATEAU_MIN_DELTA: float = float(os.getenv("STOP_PLATEAU_MIN_DELTA", "0.01"))
+STOP_MIN_EXPECTED_GAIN: float = float(os.getenv("STOP_MIN_EXPECTED_GAIN", "0.005"))
+RUN_LATENCY_BUDGET_S: float = float(os.getenv("RUN_LATENCY_BUDGET_S", "0"))
+RUN_TOKEN_BUDGET: int = int(os.getenv("RUN_TOKEN_BUDGET", "0"))
+RUN_DEADLINE_S: float = float(os.getenv("RUN_DEADLINE_S", "0"))
+
+# Bounds on the state the loop accumulates (reducers in graph/state.py): score
+# history length, mistake-memory size, and the word-overlap (Jaccard) at which
+# two critic complaints count as the same mistake. Text fields of at least
+# SHARED_TEXT_MIN_CHARS are kept once per process (utils/text_store.py).
+SCORE_HISTORY_SIZE: int = max(1, int(os.getenv("SCORE_HISTORY_SIZE", "50")))
+MISTAKE_MEMORY_SIZE: int = max(1, int(os.getenv("MISTAKE_MEMORY_SIZE", "8")))
+MISTAKE_MEMORY_SIMILARITY: float = float(os.getenv("MISTAKE_MEMORY_SIMILARITY", "0.6"))
+SHARED_TEXT_MIN_CHARS: int = int(os.getenv("SHARED_TEXT_MIN_CHARS", "512"))
+
+# Guardrails tiers: local rules decide clear cases; only escalated inputs reach a
+# model. GUARDRAILS_MODEL picks it: "llama_guard" (safe/unsafe classifier via
+# get_guardrails_llm) or "llm" (structured validate-and-sanitize via get_critic_llm).
+GUARDRAILS_MODEL: str = os.getenv("GUARDRAILS_MODEL", "llama_guard").strip().lower()
+GUARDRAILS_EXTRA_BANNED_TERMS: List[str] = [
+    t.strip().lower() for t in os.getenv("GUARDRAILS_BANNED_TERMS", "").split(",") if t.strip()
+]
+GUARDRAILS_MAX_TOPIC_CHARS: int = int(os.getenv("GUARDRAILS_MAX_TOPIC_CHARS", "200"))
+GUARDRAILS_MAX_CONSTRAINTS_CHARS: int = int(os.getenv("GUARDRAILS_MAX_CONSTRAINTS_CHARS", "1000"))
+GUARDRAILS_MEMO_SIZE: int = int(os.getenv("GUARDRAILS_MEMO_SIZE", "1024"))
+
+# Local research store: cached search results / notes + BM25 index over snippets.
+# RESEARCH_OFFLINE=1 never calls the search API and answers from the index only.
+# A query skips the network when the index already holds RESEARCH_REUSE_MIN_RESULTS
+# snippets covering >= RESEARCH_REUSE_MIN_COVERAGE of its terms (0 disables reuse).
+RESEARCH_STORE_PATH: str = os.getenv("RESEARCH_STORE_PATH", ".cache/research.sqlite")
+RESEARCH_TTL_SECONDS: float = float(os.getenv("RESEARCH_TTL_SECONDS", str(24 * 3600)))
+RESEARCH_OFFLINE: bool = os.getenv("RESEARCH_OFFLINE", "").lower() in ("1", "true", "yes")
+RESEARCH_REUSE_MIN_RESULTS: int = int(os.getenv("RESEARCH_REUSE_MIN_RESULTS", "3"))
+RESEARCH_REUSE_MIN_COVERAGE: float = float(os.getenv("RESEARCH_REUSE_MIN_COVERAGE", "0.8"))
+
+_research_store: Optional[Any] = None
+
+
+def get_research_store() -> Any:
+    """Process-wide research store shared by all pipelines."""
+    global _research_store
+    if _research_store is None:
+        from utils.research_store import ResearchStore
+
+        _research_store = ResearchStore(RESEARCH_STORE_PATH, ttl_seconds=RESEARCH_TTL_SECONDS)
+    return _research_store
+
+
+# HTTP service (server.py): jobs go to a SQLite queue drained by SERVICE_WORKERS
+# pipelines sharing one compiled graph. Submissions are refused (429) once
+# SERVICE_MAX_QUEUED jobs wait or a client has SERVICE_CLIENT_MAX_PENDING jobs
+# queued or running; at most SERVICE_CLIENT_MAX_RUNNING of a client's jobs run
+# at once. Finished jobs are purged after SERVICE_JOB_RETENTION_S.
+SERVICE_QUEUE_PATH: str = os.getenv("SERVICE_QUEUE_PATH", ".cache/jobs.sqlite")
+SERVICE_WORKERS: int = max(1, int(os.getenv("SERVICE_WORKERS", "4")))
+SERVICE_MAX_QUEUED: int = int(os.getenv("SERVICE_MAX_QUEUED", "100"))
+SERVICE_CLIENT_MAX_RUNNING: int = int(os.getenv("SERVICE_CLIENT_MAX_RUNNING", "2"))
+SERVICE_CLIENT_MAX_PENDING: int = int(os.getenv("SERVICE_CLIENT_MAX_PENDING", "20"))
+SERVICE_MAX_ITERATIONS: int = int(os.getenv("SERVICE_MAX_ITERATIONS", "10"))
+SERVICE_JOB_RETENTION_S: float = float(os.getenv("SERVICE_JOB_RETENTION_S", str(7 * 24 * 3600)))
+
+# Archive of finished runs (utils/draft_archive.py, TF-IDF index over topic,
+# constraints and headings). At the start of a run the nearest archived run is
+# looked up: with similarity >= ARCHIVE_SEED_MIN_SIMILARITY and a score of at
+# least ARCHIVE_SEED_MIN_SCORE its draft seeds the first iteration; with
+# similarity >= ARCHIVE_RESEARCH_MIN_SIMILARITY its research notes are reused
+# and planning / search are skipped. ARCHIVE_REUSE picks which of "draft" and
+# "research" apply; an empty ARCHIVE_PATH disables the archive.
+ARCHIVE_PATH: str = os.getenv("ARCHIVE_PATH", ".cache/archive.sqlite")
+ARCHIVE_REUSE: List[str] = [
+    r.strip() for r in os.getenv("ARCHIVE_REUSE", "draft,research").split(",") if r.strip()
+]
+ARCHIVE_SEED_MIN_SIMILARITY: float = float(os.getenv("ARCHIVE_SEED_MIN_SIMILARITY", "0.6"))
+ARCHIVE_SEED_MIN_SCORE: float = float(os.getenv("ARCHIVE_SEED_MIN_SCORE", "0.75"))
+ARCHIVE_RESEARCH_MIN_SIMILARITY: float = float(os.getenv("ARCHIVE_RESEARCH_MIN_SIMILARITY", "0.85"))
+
+_draft_archive: Optional[Any] = None
+
+
+def get_draft_archive() -> Any:
+    """Process-wide archive of finished runs."""
+    global _draft_archive
+    if _draft_archive is None:
+        from utils.draft_archive import DraftArchive
+
+        _draft_archive = DraftArchive(ARCHIVE_PATH)
+    return _draft_archive
+
+
+# Prompt registry (utils/prompt_registry.py): prompts/ is compiled once; a
+# long-running service can set PROMPT_RELOAD_INTERVAL_S to pick up edited
+# prompt files (checked at most that often; 0 = never).
+PROMPT_RELOAD_INTERVAL_S: float = float(os.getenv("PROMPT_RELOAD_INTERVAL_S", "0"))
+
+_prompt_registry: Optional[Any] = None
+
+
+def get_prompt_registry() -> Any:
+    """Process-wide registry of compiled prompts (agents register theirs at import)."""
+    global _prompt_registry
+    if _prompt_registry is None:
+        from utils.prompt_registry import PromptRegistry
+
+        _prompt_registry = PromptRegistry(reload_interval_s=PROMPT_RELOAD_INTERVAL_S)
+    return _prompt_registry
+
+
+# Durable graph checkpoints (utils/checkpoint_store.py), keyed by run ID, so
+# main.py --resume and batch re-runs continue from the last completed node.
+# Finished runs are deleted unless CHECKPOINT_KEEP_FINISHED is set.
+CHECKPOINT_PATH: str = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite")
+CHECKPOINT_KEEP_FINISHED: bool = os.getenv("CHECKPOINT_KEEP_FINISHED", "").lower() in ("1", "true", "yes")
+
+_checkpointer: Optional[Any] = None
+
+
+def get_checkpointer() -> Any:
+    """Process-wide SQLite checkpointer shared by every pipeline (one thread per run ID)."""
+    global _checkpointer
+    if _checkpointer is None:
+        from utils.checkpoint_store import SQLiteCheckpointSaver
+
+        _checkpointer = SQLiteCheckpointSaver(CHECKPOINT_PATH)
+    return _checkpointer
+
+
+def get_llm_cache() -> Any:
+    """Process-wide response cache shared by every cached agent."""
+    global _llm_cache
+    if _llm_cache is None:
+        from utils.llm_cache import SQLiteLLMCache
+
+        _llm_cache = SQLiteLLMCache(
+            LLM_CACHE_PATH,
+            ttl_seconds=LLM_CACHE_TTL_SECONDS,
+            max_entries=LLM_CACHE_MAX_ENTRIES,
+        )
+    return _llm_cache
+
+
+def llm_cache_stats() -> Optional[Dict[str, Any]]:
+    """Hit/miss counters for this process, or None if no agent uses the cache."""
+    return _llm_cache.stats() if _llm_cache is not None else None
+
+
+def _cache_for(agent: Optional[str]) -> Any:
+    # False (not None) so an uncached agent never falls back to a global cache
+    if agent and agent in LLM_CACHE_AGENTS:
+        return get_llm_cache()
+    return False
+
+
+# --- Backend registry -------------------------------------------------------
+# LLM_BACKEND / SEARCH_BACKEND pick the implementation behind get_llm() and
+# get_search_tool(). "fake" backends run fully offline (tests, benchmarks, CI).
+LLM_BACKEND: str = os.getenv("LLM_BACKEND", "groq").strip().lower()
+SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "tavily").strip().lower()
 
+FAKE_LLM_LATENCY_S: float = float(os.getenv("FAKE_LLM_LATENCY_S", "0"))
+FAKE_LLM_TOKENS_PER_S: float = float(os.getenv("FAKE_LLM_TOKENS_PER_S", "0"))
+FAKE_LLM_SEED: int = int(os.getenv("FAKE_LLM_SEED", "0"))
+FAKE_CRITIC_SCORES: List[float] = [
+    float(x) for x in os.getenv("FAKE_CRITIC_SCORES", "0.62,0.71,0.78,0.84").split(",") if x.strip()
+]
+FAKE_SEARCH_LATENCY_S: float = float(os.getenv("FAKE_SEARCH_LATENCY_S", "0"))
+# Fault injection for the fake chat model: share of calls failing with
+# FAKE_LLM_ERROR_STATUS (and a retry-after header), and of calls that are slow.
+FAKE_LLM_ERROR_RATE: float = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_ERROR_STATUS: int = int(os.getenv("FAKE_LLM_ERROR_STATUS", "429"))
+FAKE_LLM_RETRY_AFTER_S: float = float(os.getenv("FAKE_LLM_RETRY_AFTER_S", "0"))
+FAKE_LLM_SLOW_RATE: float = float(os.getenv("FAKE_LLM_SLOW_RATE", "0"))
+FAKE_LLM_SLOW_LATENCY_S: float = float(os.getenv("FAKE_LLM_SLOW_LATENCY_S", "1"))
 
-def get_critic_llm(temperature: float = 0.0) -> ChatGroq:
+# Resilient call layer (utils/resilience.py) around every chat model: retries
+# with jittered backoff / retry-after, a shared tokens-per-minute bucket, a
+# per-call timeout (LLM_CALL_TIMEOUT_S, given to the model's HTTP client; 0 =
+# HTTP_TIMEOUT_S only), hedged async requests past the LLM_HEDGE_QUANTILE latency (0 = off)
+# and, once retries are exhausted, LLM_FALLBACK_MODEL (opt-in; "" = none, since a
+# fallback model can cost more than the one it stands in for).
+LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_S: float = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_MAX_S: float = float(os.getenv("LLM_BACKOFF_MAX_S", "20"))
+LLM_CALL_TIMEOUT_S: float = float(os.getenv("LLM_CALL_TIMEOUT_S", "45"))
+LLM_HEDGE_QUANTILE: float = float(os.getenv("LLM_HEDGE_QUANTILE", "0"))
+LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_FALLBACK_MODEL: str = os.getenv("LLM_FALLBACK_MODEL", "").strip()
+GROQ_TOKENS_PER_MINUTE: float = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "0"))
+
+
+# Connection pool shared by every Groq client in the process (all agents and
+# temperatures), so concurrent pipelines reuse keep-alive connections.
+HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_TIMEOUT_S: float = float(os.getenv("HTTP_TIMEOUT_S", "60"))
+
+_http_clients: Dict[str, Any] = {}
+_clients_lock = threading.RLock()
+
+
+def _http_client_kwargs() -> Dict[str, Any]:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT_S),
+    }
+
+
+def get_http_client() -> Any:
+    """Process-wide pooled httpx.Client."""
+    with _clients_lock:
+        if "sync" not in _http_clients:
+            import httpx
+
+            _http_clients["sync"] = httpx.Client(**_http_client_kwargs())
+        return _http_clients["sync"]
+
+
+def get_async_http_client() -> Any:
     """
-    More deterministic LLM for scoring / critic.
+    Process-wide pooled httpx.AsyncClient. Its connections belong to the event
+    loop that first uses them, so use one loop per process (as batch.py does).
     """
+    with _clients_lock:
+        if "async" not in _http_clients:
+            import httpx
+
+            _http_clients["async"] = httpx.AsyncClient(**_http_client_kwargs())
+        return _http_clients["async"]
+
+
+def _groq_chat_model(model: str, temperature: float, **kwargs: Any) -> Any:
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         raise RuntimeError("GROQ_API_KEY is not set in .env")
+    from langchain_groq import ChatGroq
+
     return ChatGroq(
-        model="llama-3.1-8b-instant",
+        model=model,
         temperature=temperature,
         api_key=api_key,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        **kwargs,
+    )
+
+
+def _fake_chat_model(model: str, temperature: float, **kwargs: Any) -> Any:
+    from utils.fake_backends import FakeChatModel
+
+    return FakeChatModel(
+        model_name=model,
+        temperature=temperature,
+        seed=FAKE_LLM_SEED,
+        latency_s=FAKE_LLM_LATENCY_S,
+        tokens_per_s=FAKE_LLM_TOKENS_PER_S,
+        critic_scores=FAKE_CRITIC_SCORES,
+        error_rate=FAKE_LLM_ERROR_RATE,
+        error_status=FAKE_LLM_ERROR_STATUS,
+        retry_after_s=FAKE_LLM_RETRY_AFTER_S,
+        slow_rate=FAKE_LLM_SLOW_RATE,
+        slow_latency_s=FAKE_LLM_SLOW_LATENCY_S,
+        **kwargs,
+    )
+
+
+def _tavily_search_tool(max_results: int) -> Any:
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(max_results=max_results, include_answer=True)
+
+
+def _fake_search_tool(max_results: int) -> Any:
+    from utils.fake_backends import FakeSearchTool
+
+    return FakeSearchTool(max_results=max_results, latency_s=FAKE_SEARCH_LATENCY_S, seed=FAKE_LLM_SEED)
+
+
+LLM_BACKENDS: Dict[str, Callable[..., Any]] = {
+    "groq": _groq_chat_model,
+    "fake": _fake_chat_model,
+}
+SEARCH_BACKENDS: Dict[str, Callable[[int], Any]] = {
+    "tavily": _tavily_search_tool,
+    "fake": _fake_search_tool,
+}
+
+
+def register_llm_backend(name: str, factory: Callable[..., Any]) -> None:
+    """factory(model=..., temperature=..., **chat_model_kwargs) -> chat model"""
+    LLM_BACKENDS[name] = factory
+
+
+def register_search_backend(name: str, factory: Callable[[int], Any]) -> None:
+    """factory(max_results) -> object with invoke/ainvoke({"query": ...})"""
+    SEARCH_BACKENDS[name] = factory
+
+
+# Clients are built on first use and memoized, so importing the agents or the
+# graph neither imports a provider SDK nor needs API keys.
+_chat_models: Dict[Tuple[str, str, float, bool], Any] = {}
+_resilient_models: Dict[Tuple[str, str, str, float, bool], Any] = {}
+_model_stats: Dict[Tuple[str, str], Any] = {}
+_token_buckets: Dict[str, Any] = {}
+_search_tools: Dict[Tuple[str, int], Any] = {}
+
+
+def get_token_bucket(provider: str = "groq") -> Any:
+    """Process-wide tokens-per-minute bucket for a provider (unlimited when unset)."""
+    from utils.resilience import TokenBucket
+
+    with _clients_lock:
+        if provider not in _token_buckets:
+            _token_buckets[provider] = TokenBucket(GROQ_TOKENS_PER_MINUTE if provider == "groq" else 0.0)
+        return _token_buckets[provider]
+
+
+def get_call_policy() -> Any:
+    from utils.resilience import CallPolicy
+
+    return CallPolicy(
+        max_retries=LLM_MAX_RETRIES,
+        backoff_base_s=LLM_BACKOFF_BASE_S,
+        backoff_max_s=LLM_BACKOFF_MAX_S,
+        timeout_s=LLM_CALL_TIMEOUT_S,
+        hedge_quantile=LLM_HEDGE_QUANTILE,
+        hedge_min_samples=LLM_HEDGE_MIN_SAMPLES,
     )
 
 
-def get_guardrails_llm(temperature: float = 0.0) -> ChatGroq:
+def _base_chat_model(model: str, temperature: float, cache: Any) -> Any:
+    key = (LLM_BACKEND, model, temperature, cache is not False)
+    with _clients_lock:
+        if key not in _chat_models:
+            _chat_models[key] = LLM_BACKENDS[LLM_BACKEND](
+                model=model,
+                temperature=temperature,
+                rate_limiter=get_rate_limiter("groq"),
+                cache=cache,
+                timeout=LLM_CALL_TIMEOUT_S or None,
+            )
+        return _chat_models[key]
+
+
+def _stats_for(model: str) -> Any:
+    # latency / cooldown are properties of the model, shared across temperatures
+    from utils.resilience import ModelStats
+
+    with _clients_lock:
+        return _model_stats.setdefault((LLM_BACKEND, model), ModelStats())
+
+
+def _make_chat_model(
+    model: str, temperature: float, agent: Optional[str], fallback: str = ""
+) -> Any:
+    if LLM_BACKEND not in LLM_BACKENDS:
+        raise RuntimeError(f"Unknown LLM_BACKEND {LLM_BACKEND!r} (known: {', '.join(LLM_BACKENDS)})")
+    from utils.resilience import ResilientModel
+
+    cache = _cache_for(agent)
+    names = [model] + ([fallback] if fallback and fallback != model else [])
+    key = (LLM_BACKEND, model, fallback, temperature, cache is not False)
+    with _clients_lock:
+        if key not in _resilient_models:
+            _resilient_models[key] = ResilientModel(
+                [_base_chat_model(name, temperature, cache) for name in names],
+                [_stats_for(name) for name in names],
+                get_call_policy(),
+                get_token_bucket("groq"),
+            )
+        return _resilient_models[key]
+
+
+def get_search_tool(max_results: int = 5) -> Any:
+    """Web search tool for the researcher (Tavily, or the offline fake)."""
+    if SEARCH_BACKEND not in SEARCH_BACKENDS:
+        raise RuntimeError(
+            f"Unknown SEARCH_BACKEND {SEARCH_BACKEND!r} (known: {', '.join(SEARCH_BACKENDS)})"
+        )
+    key = (SEARCH_BACKEND, max_results)
+    with _clients_lock:
+        if key not in _search_tools:
+            _search_tools[key] = SEARCH_BACKENDS[SEARCH_BACKEND](max_results)
+        return _search_tools[key]
+
+
+def get_llm(temperature: float = 0.4, agent: Optional[str] = None, tier: int = 0) -> Any:
+    """
+    Shared LLM for blog generation, research summarization, SEO, etc.
+    The model is the agent's cascade entry at `tier` (config/models.json);
+    `agent` also names the caller for cache opt-in.
+    Calls are retried, then fall back to LLM_FALLBACK_MODEL if set (utils/resilience.py).
+    """
+    model = get_model_router().model_for(agent, tier)
+    return _make_chat_model(model, temperature, agent, LLM_FALLBACK_MODEL)
+
+
+def get_critic_llm(temperature: float = 0.0, agent: Optional[str] = None, tier: int = 0) -> Any:
+    """
+    More deterministic LLM for scoring / critic.
+    """
+    model = get_model_router().model_for(agent, tier)
+    return _make_chat_model(model, temperature, agent, LLM_FALLBACK_MODEL)
+
+
+def get_guardrails_llm(temperature: float = 0.0, agent: Optional[str] = None) -> Any:
     """
     LLaMA Guard model for safety validation and input filtering.
     Perfect for using in the Guardrails Agent.
     """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise RuntimeError("GROQ_API_KEY is not set in .env")
-    return ChatGroq(
-        model="llama-guard-3-1b",
-        temperature=temperature,
-        api_key=api_key,
-    )
\ No newline at end of file
+    return _make_chat_model(get_model_router().model_for("llama_guard"), temperature, agent)
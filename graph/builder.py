@@ -2,13 +2,18 @@
 from langgraph.graph import StateGraph, END
 
 from .state import BlogState
+from config.settings import ARCHIVE_PATH, ARCHIVE_REUSE, MODEL_PRICING, SEO_STAGE, TAVILY_COST_PER_SEARCH
+from utils.tracing import traced_node
 
 # agents
-from agents.guardrails import guardrails_node   # NEW: guardrails node
-from agents.researcher import researcher_node
-from agents.generator import generator_node
-from agents.critic import critic_node
+from agents.guardrails import guardrails_node, guardrails_node_async   # NEW: guardrails node
+from agents.planner import planner_node, planner_node_async
+from agents.researcher import researcher_node, researcher_node_async
+from agents.generator import generator_node, generator_node_async
+from agents.critic import critic_node, critic_node_async
 from agents.orchestrator import orchestrator_node
+from agents.archive import archive_node, recall_node
+from agents.seo_expert import seo_expert_node, seo_expert_node_async
 
 
 def orchestrator_router(state: BlogState) -> str:
@@ -18,43 +23,74 @@ def orchestrator_router(state: BlogState) -> str:
     if route == "done":
         return "done"
     
-    # Only do research on the first iteration
+    # Only plan + research on the first iteration (after an archive lookup)
     iteration = state.get("iteration", 0)
     if iteration <= 1:
-        return "researcher"
+        return "recall" if ARCHIVE_PATH and ARCHIVE_REUSE else "planner"
     else:
         # Skip research, go directly to generator for refinement
         return "generator"
 
 
-def build_blog_graph():
+def build_blog_graph(async_mode: bool = False, checkpointer=None):
+    """
+    Compile the blog pipeline.
+
+    async_mode=True registers the `async def` node variants (ainvoke on LLM and
+    Tavily), so many pipelines can be multiplexed on one event loop via
+    `app.ainvoke(...)` without a thread per run.
+
+    With a checkpointer (e.g. config.settings.get_checkpointer()) every node
+    transition is persisted; runs then need a `thread_id` in their config and
+    an interrupted run resumes by invoking again with `None` as input.
+    """
     graph = StateGraph(BlogState)
 
-    # Register nodes
-    graph.add_node("guardrails", guardrails_node)   # entry point: validate inputs inside graph
-    graph.add_node("orchestrator", orchestrator_node)
-    graph.add_node("researcher", researcher_node)
-    graph.add_node("generator", generator_node)
-    graph.add_node("critic", critic_node)
+    def add_node(name, fn):
+        # every node records a span (latency, tokens, cost) into state["trace"]
+        graph.add_node(name, traced_node(name, fn, MODEL_PRICING, TAVILY_COST_PER_SEARCH))
+
+    # Register nodes (orchestrator is pure Python, shared by both modes)
+    if async_mode:
+        add_node("guardrails", guardrails_node_async)
+        add_node("planner", planner_node_async)
+        add_node("researcher", researcher_node_async)
+        add_node("generator", generator_node_async)
+        add_node("critic", critic_node_async)
+        add_node("seo", seo_expert_node_async)
+    else:
+        add_node("guardrails", guardrails_node)   # entry point: validate inputs inside graph
+        add_node("planner", planner_node)
+        add_node("researcher", researcher_node)
+        add_node("generator", generator_node)
+        add_node("critic", critic_node)
+        add_node("seo", seo_expert_node)
+    add_node("orchestrator", orchestrator_node)
+    if ARCHIVE_PATH:
+        add_node("recall", recall_node)
+        add_node("archive", archive_node)
 
     # Start with guardrails
     graph.set_entry_point("guardrails")
 
-    # Linear flow: guardrails -> orchestrator -> (researcher|generator) -> critic -> orchestrator
+    # Linear flow: guardrails -> orchestrator -> ([recall ->] planner -> researcher | generator) -> critic
+    # -> orchestrator, then seo and archive once the orchestrator is done
     graph.add_edge("guardrails", "orchestrator")
 
-    graph.add_conditional_edges(
-        "orchestrator",
-        orchestrator_router,
-        {
-            "researcher": "researcher",
-            "generator": "generator",
-            "done": END,
-        },
-    )
+    # after the loop: SEO stage once on the best draft, then the run is archived
+    finish = "archive" if ARCHIVE_PATH else END
+    routes = {"planner": "planner", "generator": "generator", "done": "seo" if SEO_STAGE else finish}
+    if ARCHIVE_PATH:
+        routes["recall"] = "recall"
+    graph.add_conditional_edges("orchestrator", orchestrator_router, routes)
 
+    graph.add_edge("planner", "researcher")
     graph.add_edge("researcher", "generator")
     graph.add_edge("generator", "critic")
     graph.add_edge("critic", "orchestrator")
+    graph.add_edge("seo", finish)
+    if ARCHIVE_PATH:
+        graph.add_edge("recall", "planner")
+        graph.add_edge("archive", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,35 @@
+# graph/results.py (the record kept for a finished run, shared by batch.py and server.py)
+from typing import Any, Dict
+
+from utils.tracing import summarize_trace
+
+from .state import BlogState
+
+# Keys copied from the final state into each result record
+RESULT_KEYS = (
+    "topic",
+    "tone",
+    "constraints",
+    "word_count",
+    "best_draft",
+    "best_score",
+    "seo",
+    "confidence_scores",
+    "iteration",
+    "stop_reason",
+    "stop_policy",
+    "model_hops",
+    "guardrails_valid",
+    "guardrails_issues",
+    "guardrails_tier",
+)
+
+
+def result_record(final_state: BlogState) -> Dict[str, Any]:
+    """RESULT_KEYS of a finished run plus its token usage and estimated cost."""
+    record: Dict[str, Any] = {k: final_state.get(k) for k in RESULT_KEYS}
+    nodes = summarize_trace(final_state.get("trace", []))
+    record["prompt_tokens"] = sum(n["prompt_tokens"] for n in nodes.values())
+    record["completion_tokens"] = sum(n["completion_tokens"] for n in nodes.values())
+    record["cost_usd"] = round(sum(n["cost_usd"] for n in nodes.values()), 6)
+    return record
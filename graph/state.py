@@ -1,6 +1,40 @@
-from typing import TypedDict, List, Literal
+import operator
+from typing import Any, Annotated, TypedDict, Dict, List, Literal, Optional
 from typing_extensions import NotRequired
 
+from utils.feedback_memory import merge_feedback
+from utils.text_store import share_text
+
+# Nodes return only the keys they change; LangGraph merges each update into the
+# state with the reducer annotated on the key (plain keys are overwritten).
+# Limits are read on first use so benchmarks can set the environment after
+# importing this module.
+
+
+def shared_text(_old: Optional[str], new: Optional[str]) -> Optional[str]:
+    """Overwrite, keeping large texts once per process (utils/text_store.py)."""
+    from config.settings import SHARED_TEXT_MIN_CHARS
+
+    return share_text(new, SHARED_TEXT_MIN_CHARS)
+
+
+def shared_texts(_old: Optional[List[str]], new: Optional[List[str]]) -> List[str]:
+    return [shared_text(None, text) for text in new or []]
+
+
+def recent_scores(old: Optional[List[float]], new: Optional[List[float]]) -> List[float]:
+    """Append, keeping the last SCORE_HISTORY_SIZE scores."""
+    from config.settings import SCORE_HISTORY_SIZE
+
+    return (list(old or []) + list(new or []))[-SCORE_HISTORY_SIZE:]
+
+
+def merge_mistakes(old: Optional[List[str]], new: Optional[List[str]]) -> List[str]:
+    """Append, collapsing near-duplicate feedback and keeping MISTAKE_MEMORY_SIZE items."""
+    from config.settings import MISTAKE_MEMORY_SIMILARITY, MISTAKE_MEMORY_SIZE
+
+    return merge_feedback(old or [], new or [], MISTAKE_MEMORY_SIZE, MISTAKE_MEMORY_SIMILARITY)
+
 
 class BlogState(TypedDict, total=False):
     # User inputs
@@ -9,24 +43,81 @@ class BlogState(TypedDict, total=False):
     tone: str
     constraints: str
 
+    # Guardrails verdict
+    guardrails_valid: bool
+    guardrails_issues: List[str]
+    guardrails_action: str
+    guardrails_tier: str  # which tier decided: "rules", "memo", "llama_guard", "llm" or "error"
+
+    # Nearest archived run (agents/archive.py): draft to adapt in the first
+    # iteration, and {"id", "topic", "similarity", "best_score", "research_from"}
+    seed_draft: Annotated[str, shared_text]
+    archive_match: Dict[str, Any]
+
     # Data produced by agents
-    research_notes: str
-    draft: str
+    search_queries: List[str]  # planner output, run concurrently by the researcher
+    research_notes: Annotated[str, shared_text]
+    draft: Annotated[str, shared_text]
     critic_feedback: str
+    critic_sections: List[str]        # headings the critic flagged as weakest
+    critic_source: str                 # "llm", "prescore" (hard fail) or "unchanged"
+    draft_metrics: Dict[str, Any]      # local text metrics of the last scored draft
+    draft_fingerprint: str             # word hash of the last scored draft
+    candidate_drafts: Annotated[List[str], shared_texts]    # best-of-N drafts awaiting the critic (cleared after selection)
+    candidate_scores: List[float]  # critic scores of the last round's candidates
+    prompt_token_counts: Dict[str, int]  # estimated tokens per generator prompt section
+    outline: Dict[str, Any]  # long-form mode: {"title", "sections": [{"heading", "key_points", "words"}]}
 
     # Loop control
     iteration: int
     max_iterations: int
     route: NotRequired[Literal["continue", "done"]]
     stop_reason: str
+    stop_policy: str  # which stopping policy ended the run (utils/stopping.py)
+    deadline: float   # optional absolute deadline (epoch seconds) for the run
+
+    # Model routing (utils/model_router.py): current tier of the agents' model
+    # cascades, and one record per escalation
+    # {"iteration", "from_tier", "to_tier", "models", "best_score", "reason"}
+    model_tier: int
+    model_hops: Annotated[List[Dict[str, Any]], operator.add]
 
     # Scoring (simplified)
     last_score: float  # 0-1 scale, set by critic
     best_score: float  # 0-1 scale, highest score achieved
-    best_draft: str    # draft with the best score
-    
-    # History tracking (for display/debugging)
-    confidence_scores: List[float]  # 0-1 scale
-    
-    # Memory of mistakes across iterations
-    mistake_memory: List[str]
\ No newline at end of file
+    best_draft: Annotated[str, shared_text]    # draft with the best score (SEO-fixed by the seo stage)
+
+    # SEO stage (after the loop): analyzer report and metadata, kept out of the draft
+    # {"title", "slug", "meta_description", "primary_keyword", "secondary_keywords",
+    #  "density", "heading_coverage", "issues", "issues_before", ...}
+    seo: Dict[str, Any]
+
+    # History tracking (for display/debugging); nodes return only the new scores
+    confidence_scores: Annotated[List[float], recent_scores]  # 0-1 scale
+
+    # Memory of mistakes across iterations (deduplicated, bounded)
+    mistake_memory: Annotated[List[str], merge_mistakes]
+
+    # Per-node spans (latency, tokens, cache hits, cost) from utils.tracing;
+    # each node appends its own span
+    trace: Annotated[List[Dict[str, Any]], operator.add]
+
+
+def make_initial_state(
+    topic: str,
+    word_count: int = 800,
+    tone: str = "",
+    constraints: str = "",
+    max_iterations: int = 5,
+) -> BlogState:
+    """Seed state for one pipeline run (shared by the CLI and batch runner)."""
+    return {
+        "topic": topic,
+        "word_count": word_count,
+        "tone": tone,
+        "constraints": constraints,
+        "iteration": 0,
+        "max_iterations": max_iterations,
+        "best_score": 0.0,
+        "confidence_scores": [],
+    }
@@ -0,0 +1,79 @@
+# graph/streaming.py (live events from a running blog graph)
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from langgraph.config import get_config, get_stream_writer
+
+from .state import BlogState
+
+# Event dicts emitted while the graph runs:
+#   {"type": "node", "node": name, "update": {...}}          node finished
+#   {"type": "token", "node": "generator", "iteration": n, "text": chunk}
+#   {"type": "draft", "node": "generator", "iteration": n, "draft": full_text}
+#   {"type": "final", "state": final_state}                   always last
+STREAM_MODES = ["updates", "custom", "values"]
+
+# Set by stream_blog/astream_blog; nodes only stream tokens when a caller listens,
+# so plain invoke/ainvoke runs (batch, benchmarks) skip per-token overhead.
+STREAM_TOKENS_KEY = "stream_tokens"
+
+
+def get_event_writer() -> Callable[[Dict[str, Any]], None]:
+    """
+    Writer for custom stream events from inside a node. Outside a graph run
+    (e.g. a node called directly) events are dropped.
+    """
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda event: None
+
+
+def tokens_requested() -> bool:
+    """True when the current graph run was started by stream_blog/astream_blog."""
+    try:
+        return bool(get_config().get("configurable", {}).get(STREAM_TOKENS_KEY))
+    except RuntimeError:
+        return False
+
+
+def _to_events(mode: str, payload: Any, final: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    if mode == "custom":
+        yield payload
+    elif mode == "updates":
+        for node, update in payload.items():
+            yield {"type": "node", "node": node, "update": update}
+    elif mode == "values":
+        final["state"] = payload
+
+
+def _stream_config(config: Optional[Dict[str, Any]], tokens: bool = True) -> Dict[str, Any]:
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), STREAM_TOKENS_KEY: tokens}
+    return config
+
+
+def stream_blog(
+    app, state: Optional[BlogState], config: Optional[Dict[str, Any]] = None, tokens: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run a compiled blog graph, yielding node/token/draft events as they happen.
+    `config` carries e.g. the checkpoint thread_id; state=None resumes that run.
+    tokens=False skips per-token events (node and draft events still arrive).
+    """
+    final: Dict[str, Any] = {"state": state}
+    config = _stream_config(config, tokens)
+    for mode, payload in app.stream(state, config=config, stream_mode=STREAM_MODES):
+        yield from _to_events(mode, payload, final)
+    yield {"type": "final", "state": final["state"]}
+
+
+async def astream_blog(
+    app, state: Optional[BlogState], config: Optional[Dict[str, Any]] = None, tokens: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """Async variant of stream_blog (use with build_blog_graph(async_mode=True))."""
+    final: Dict[str, Any] = {"state": state}
+    config = _stream_config(config, tokens)
+    async for mode, payload in app.astream(state, config=config, stream_mode=STREAM_MODES):
+        for event in _to_events(mode, payload, final):
+            yield event
+    yield {"type": "final", "state": final["state"]}
@@ -1,13 +1,21 @@
 # main.py (complete)
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 from dotenv import load_dotenv
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
 
-from graph.builder import build_blog_graph
-from graph.state import BlogState
+from graph.state import BlogState, make_initial_state
+from graph.streaming import stream_blog
+from utils.model_router import tier_summary
+from utils.tracing import export_chrome_trace, export_jsonl, trace_summary_table
 
-# Guardrails agent (pre-flight validation)
-from agents.guardrails import guardrails_node  # ensure this file exists
 console = Console()
 
 
@@ -24,49 +32,144 @@ def get_user_input() -> BlogState:
     except ValueError:
         word_count = 800
 
-    initial_state: BlogState = {
-        "topic": topic,
-        "word_count": word_count,
-        "tone": tone,
-        "constraints": constraints,
-        "iteration": 0,
-        "max_iterations": 5,
-        "best_score": 0.0,
-        "confidence_scores": [],
-    }
+    initial_state: BlogState = make_initial_state(
+        topic=topic,
+        word_count=word_count,
+        tone=tone,
+        constraints=constraints,
+    )
     return initial_state
 
 
+# Lines of the in-progress draft shown in the live panel
+LIVE_DRAFT_LINES = 20
+
+
+def run_with_live_output(app, state: Optional[BlogState], config: Optional[Dict[str, Any]] = None) -> BlogState:
+    """
+    Drive the graph with streaming: node completions update a status line and
+    generator tokens are rendered into a live draft panel as they arrive.
+    state=None resumes the checkpointed run named in `config`.
+    """
+    status = Text("Starting...", style="dim")
+    draft = Text()
+    title = "Draft"
+    final_state: BlogState = state
+
+    def render():
+        tail = "\n".join(draft.plain.splitlines()[-LIVE_DRAFT_LINES:])
+        return Group(status, Panel(tail or "[dim]waiting for generator...[/dim]", title=title))
+
+    with Live(render(), console=console, refresh_per_second=12, transient=True) as live:
+        for event in stream_blog(app, state, config):
+            kind = event["type"]
+            if kind == "token":
+                if title != f"Draft · iteration {event['iteration']}":
+                    title = f"Draft · iteration {event['iteration']}"
+                    draft = Text()
+                draft.append(event["text"])
+            elif kind == "draft":
+                title = f"Draft · iteration {event['iteration']}"
+                draft = Text(event["draft"])
+            elif kind == "node":
+                update = event["update"] or {}
+                line = f"✓ {event['node']}"
+                if event["node"] == "critic" and "last_score" in update:
+                    line += f" — score {update['last_score'] * 100:.1f}%"
+                elif event["node"] == "orchestrator" and update.get("stop_reason"):
+                    line += f" — {update['stop_reason']}"
+                console.print(f"[dim]{line}[/dim]")
+                status = Text(f"Last step: {event['node']}", style="dim")
+            elif kind == "final":
+                final_state = event["state"]
+            live.update(render())
+
+    return final_state
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate one blog interactively.")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                        help="Continue an interrupted run from its last completed node")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    # .env first: settings are read from the environment when they are imported
     load_dotenv()
-    state = get_user_input()
+    from config.settings import (
+        CHECKPOINT_KEEP_FINISHED,
+        CHECKPOINT_PATH,
+        TRACE_DIR,
+        get_checkpointer,
+        llm_cache_stats,
+    )
+    from graph.builder import build_blog_graph
+
+    # Build graph and run pipeline (guardrails is its entry node); with
+    # checkpoints on, every node transition is saved under the run ID
+    checkpointer = get_checkpointer() if CHECKPOINT_PATH else None
+    app = build_blog_graph(checkpointer=checkpointer)
+
+    state: Optional[BlogState] = None
+    finished: Optional[BlogState] = None
+    if args.resume:
+        if checkpointer is None:
+            console.print("[bold red]Checkpoints are disabled (CHECKPOINT_PATH is empty).[/bold red]")
+            return
+        run_id = args.resume
+        snapshot = app.get_state({"configurable": {"thread_id": run_id}})
+        if not snapshot.values:
+            console.print(f"[bold red]No checkpoint found for run {run_id}.[/bold red]")
+            return
+        if not snapshot.next:
+            # nothing left to run: report the saved final state
+            finished = snapshot.values
+        console.print(
+            f"[bold cyan]Resuming run {run_id}[/bold cyan] "
+            f"[dim]({len(snapshot.values.get('trace', []))} node(s) done, "
+            f"next: {', '.join(snapshot.next) or 'none'})[/dim]"
+        )
+    else:
+        state = get_user_input()
+        run_id = time.strftime("run-%Y%m%d-%H%M%S")
+    config = {"configurable": {"thread_id": run_id}} if checkpointer is not None else None
+
+    console.print("\n[bold yellow]Running multi-agent blog generator...[/bold yellow]\n")
+    console.print("[dim]Note: Research is performed only once in the first iteration[/dim]")
+    console.print("[dim]Subsequent iterations refine the blog based on critic feedback[/dim]\n")
+
+    try:
+        final_state: BlogState = finished or run_with_live_output(app, state, config)
+    except KeyboardInterrupt:
+        console.print(f"\n[bold red]Run {run_id} interrupted.[/bold red]")
+        if config is not None:
+            console.print(f"Resume it with: [bold]python main.py --resume {run_id}[/bold]")
+        raise SystemExit(130)
+    except Exception as e:
+        console.print_exception()
+        console.print(f"\n[bold red]Run {run_id} stopped: {type(e).__name__}: {e}[/bold red]")
+        if config is not None:
+            console.print(f"Resume it with: [bold]python main.py --resume {run_id}[/bold]")
+        raise SystemExit(1) from e
 
-    # --- RUN GUARDRAILS BEFORE BUILDING/INVOKING GRAPH ---
-    console.print("[dim]Running guardrails on inputs...[/dim]")
-    state = guardrails_node(state)
+    if checkpointer is not None and not CHECKPOINT_KEEP_FINISHED:
+        checkpointer.delete_thread(run_id)
 
-    if not state.get("guardrails_valid", True):
+    if not final_state.get("guardrails_valid", True):
         console.print("\n[bold red]Input failed guardrails validation.[/bold red]\n")
-        issues = state.get("guardrails_issues", [])
+        issues = final_state.get("guardrails_issues", [])
         if issues:
             console.print("[bold]Detected issues:[/bold]")
             for i, it in enumerate(issues, 1):
                 console.print(f"  {i}. {it}")
-        action = state.get("guardrails_action", "")
+        action = final_state.get("guardrails_action", "")
         if action:
             console.print(f"\n[yellow]Action: {action}[/yellow]\n")
         console.print("[bold]Please re-run with corrected inputs.[/bold]")
         return  # abort early
 
-    # Build graph and run pipeline
-    app = build_blog_graph()
-
-    console.print("\n[bold yellow]Running multi-agent blog generator...[/bold yellow]\n")
-    console.print("[dim]Note: Research is performed only once in the first iteration[/dim]")
-    console.print("[dim]Subsequent iterations refine the blog based on critic feedback[/dim]\n")
-
-    final_state: BlogState = app.invoke(state)
-
     best_draft = final_state.get("best_draft", "")
     best_score = final_state.get("best_score", 0.0)
     scores = final_state.get("confidence_scores", [])
@@ -75,6 +178,19 @@ def main():
     console.print("\n[bold green]=== BEST BLOG (HIGHEST CONFIDENCE) ===[/bold green]\n")
     console.print(best_draft or "[dim]No draft produced[/dim]")
 
+    seo = final_state.get("seo")
+    if seo:
+        console.print("\n[bold magenta]=== SEO ===[/bold magenta]")
+        console.print(f"Slug: {seo['slug']}")
+        console.print(f"Meta description ({len(seo['meta_description'])} chars): {seo['meta_description']}")
+        keywords = [seo["primary_keyword"]] + seo.get("secondary_keywords", [])
+        console.print(f"Keywords: {', '.join(k for k in keywords if k)}")
+        console.print(
+            f"Issues fixed: {len(seo['issues_before']) - len(seo['issues'])} of {len(seo['issues_before'])}"
+        )
+        for issue in seo["issues"]:
+            console.print(f"  [yellow]• {issue}[/yellow]")
+
     console.print("\n[bold magenta]=== METRICS ===[/bold magenta]")
     console.print(f"Final confidence: {scores[-1] * 100:.1f}%" if scores else "N/A")
     if scores:
@@ -87,6 +203,28 @@ def main():
     console.print(f"Best score: {best_score:.3f} ({best_score * 100:.1f}%)")
     console.print(f"Total iterations: {final_state.get('iteration', 0)}")
     console.print(f"Stop reason: {stop_reason}")
+    hops = final_state.get("model_hops") or []
+    for hop in hops:
+        models = ", ".join(f"{role} → {model}" for role, model in hop["models"].items())
+        console.print(
+            f"[yellow]Model escalation at iteration {hop['iteration']} "
+            f"(tier {hop['from_tier']} → {hop['to_tier']}): {models}[/yellow]"
+        )
+    if hops:
+        for tier in tier_summary(final_state.get("trace", []), hops, best_score):
+            console.print(
+                f"  Tier {tier['tier']}: {tier['rounds']} round(s), {tier['wall_ms'] / 1000:.2f}s, "
+                f"{tier['llm_calls']} LLM call(s), ${tier['cost_usd']:.4f}, "
+                f"best score {tier['best_score'] * 100:.1f}%"
+            )
+
+    cache_stats = llm_cache_stats()
+    if cache_stats:
+        console.print(
+            f"LLM cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es) "
+            f"({cache_stats['entries']} entries on disk)"
+        )
+    console.print(f"Guardrails decided by: {final_state.get('guardrails_tier', 'n/a')}")
     
     # Show efficiency gain
     iterations_used = final_state.get("iteration", 0)
@@ -96,6 +234,16 @@ def main():
             f"{final_state.get('max_iterations', 5) - iterations_used} iteration(s)[/green]"
         )
 
+    # TABLE: per-node latency / tokens / cost
+    trace = final_state.get("trace", [])
+    if trace:
+        console.print("\n[bold cyan]⏱  Per-node latency, tokens and cost:[/bold cyan]")
+        console.print(trace_summary_table(trace))
+        if TRACE_DIR:
+            export_jsonl(trace, Path(TRACE_DIR) / "spans.jsonl", run_id=run_id)
+            export_chrome_trace(trace, Path(TRACE_DIR) / f"{run_id}.trace.json", run_id=run_id)
+            console.print(f"[dim]Trace written to {TRACE_DIR}/{run_id}.trace.json[/dim]")
+
     # TABLE: per-iteration confidence
     if scores:
         console.print("\n[bold cyan]📊 Score Progression per Iteration:[/bold cyan]")
@@ -104,8 +252,10 @@ def main():
         table.add_column("Iteration", style="cyan", justify="center")
         table.add_column("Confidence", justify="center")
 
-        for i, score in enumerate(scores):
-            iteration_num = i + 1
+        # only the last SCORE_HISTORY_SIZE scores are kept; the newest is from
+        # the round before the orchestrator's final (stopping) iteration
+        first_iteration = max(1, final_state.get("iteration", len(scores) + 1) - len(scores))
+        for iteration_num, score in enumerate(scores, first_iteration):
             score_pct = score * 100.0
             table.add_row(str(iteration_num), f"{score_pct:.1f}%")
 
@@ -0,0 +1,524 @@
+# server.py (HTTP service: persistent job queue + worker pool around one compiled graph)
+"""
+Long-running blog generation service, as a plain ASGI application (no web
+framework), so any ASGI server can host it:
+
+    python server.py --port 8000 --workers 8      # uses uvicorn if installed
+    uvicorn server:app --port 8000
+
+Endpoints (JSON unless noted; clients identify themselves with X-Client-Id):
+
+    POST /jobs               {"topic", "word_count", "tone", "constraints", "max_iterations"}
+                             -> 202 {"id", "status"}; 429 + Retry-After when the queue
+                             or the client's quota is full; 400 on invalid input
+    GET  /jobs/{id}          status, progress (node, iteration, score) and result when done
+    GET  /jobs/{id}/events   server-sent events: node / draft / final, until the job ends
+    GET  /jobs/{id}/result   200 result, 202 while pending, 404 unknown
+    GET  /metrics            queue depth, job counters, wait / run latency percentiles
+    GET  /healthz
+
+Jobs are persisted (utils/job_queue.py) and drained by SERVICE_WORKERS
+workers that share one compiled async graph and the process-wide LLM
+clients. Every job is checkpointed under its ID, so jobs interrupted by a
+restart are re-queued and continue from their last completed node.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Largest request body accepted (bytes)
+MAX_BODY_BYTES = 64 * 1024
+# Progress events kept per job for pollers and late SSE subscribers
+PROGRESS_EVENTS = 64
+# Finished jobs whose progress stays in memory (older ones are served from the queue)
+PROGRESS_JOBS = 1024
+# Seconds between SSE keep-alive comments, and between idle queue polls
+KEEPALIVE_S = 15.0
+IDLE_POLL_S = 1.0
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+class JobProgress:
+    """Live progress of one job: latest status plus recent events for subscribers."""
+
+    def __init__(self, status: str):
+        self.status = status
+        self.node: Optional[str] = None
+        self.iteration = 0
+        self.last_score: Optional[float] = None
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=PROGRESS_EVENTS)
+        self.seq = 0
+        self._changed = asyncio.Condition()
+
+    def summary(self) -> Dict[str, Any]:
+        return {"node": self.node, "iteration": self.iteration, "last_score": self.last_score}
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        self.seq += 1
+        self.events.append({"seq": self.seq, **event})
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Buffered then live events until the final one; None marks an idle keep-alive."""
+        seen = 0
+        while True:
+            async with self._changed:
+                # checked under the lock, so a publish cannot slip in before the wait
+                if not any(e["seq"] > seen for e in self.events):
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), KEEPALIVE_S)
+                    except asyncio.TimeoutError:
+                        pass
+                pending = [e for e in self.events if e["seq"] > seen]
+            if not pending:
+                yield None
+            for event in pending:
+                seen = event["seq"]
+                yield event
+                if event["type"] == "final":
+                    return
+
+
+class BlogService:
+    def __init__(self):
+        from config.settings import (
+            SERVICE_CLIENT_MAX_PENDING,
+            SERVICE_CLIENT_MAX_RUNNING,
+            SERVICE_MAX_ITERATIONS,
+            SERVICE_MAX_QUEUED,
+            SERVICE_QUEUE_PATH,
+            SERVICE_WORKERS,
+        )
+        from utils.job_queue import JobQueue
+
+        self.queue = JobQueue(SERVICE_QUEUE_PATH)
+        self.workers = SERVICE_WORKERS
+        self.max_queued = SERVICE_MAX_QUEUED
+        self.client_max_running = SERVICE_CLIENT_MAX_RUNNING
+        self.client_max_pending = SERVICE_CLIENT_MAX_PENDING
+        self.max_iterations = SERVICE_MAX_ITERATIONS
+        self.app = None
+        self.checkpointer = None
+        self.busy = 0
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "resumed": 0}
+        self.rejected = {"queue_full": 0, "client_limit": 0, "invalid": 0}
+        self.waits: Deque[float] = deque(maxlen=1000)
+        self.runs: Deque[float] = deque(maxlen=1000)
+        self._progress: "OrderedDict[str, JobProgress]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self.started_at = time.time()
+
+    # --- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        """Compile the graph once, warm the LLM clients and start the workers."""
+        from config.settings import CHECKPOINT_PATH, SERVICE_JOB_RETENTION_S, get_checkpointer
+        from graph.builder import build_blog_graph
+
+        self.checkpointer = get_checkpointer() if CHECKPOINT_PATH else None
+        self.app = build_blog_graph(async_mode=True, checkpointer=self.checkpointer)
+        _warm_clients()
+        self.queue.purge(SERVICE_JOB_RETENTION_S)
+        self.counters["resumed"] += self.queue.requeue_running()
+        # sync work inside nodes runs in the loop's executor; size it to the pool
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.workers))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        # running jobs stay 'running' in the queue and resume on the next start;
+        # the flag covers a cancel swallowed by wait_for racing the wakeup
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- submission ----------------------------------------------------------
+
+    def _parse(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        topic = str(body.get("topic") or "").strip()
+        if not topic:
+            raise ValueError("'topic' is required")
+        try:
+            word_count = int(body.get("word_count") or 800)
+            max_iterations = int(body.get("max_iterations") or 5)
+        except (TypeError, ValueError):
+            raise ValueError("'word_count' and 'max_iterations' must be integers")
+        if word_count <= 0 or max_iterations <= 0:
+            raise ValueError("'word_count' and 'max_iterations' must be positive")
+        return {
+            "topic": topic,
+            "word_count": word_count,
+            "tone": str(body.get("tone") or "").strip(),
+            "constraints": str(body.get("constraints") or "").strip(),
+            "max_iterations": min(max_iterations, self.max_iterations),
+        }
+
+    def _retry_after(self, queued: int) -> int:
+        """Seconds until a slot is likely free, from recent run times."""
+        typical = _percentile(list(self.runs), 0.5) or 30.0
+        return max(1, math.ceil(typical * max(1, queued) / self.workers))
+
+    def submit(self, client_id: str, body: Any) -> Tuple[int, Dict[str, Any], List[Tuple[str, str]]]:
+        """(HTTP status, payload, extra headers) for a job submission."""
+        try:
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+            request = self._parse(body)
+        except ValueError as e:
+            self.rejected["invalid"] += 1
+            return 400, {"error": str(e)}, []
+
+        queued = self.queue.counts()["queued"]
+        if self.max_queued and queued >= self.max_queued:
+            self.rejected["queue_full"] += 1
+            return 429, {"error": f"queue full ({queued} jobs waiting)"}, [
+                ("retry-after", str(self._retry_after(queued)))
+            ]
+        mine = self.queue.counts(client_id)
+        if self.client_max_pending and mine["queued"] + mine["running"] >= self.client_max_pending:
+            self.rejected["client_limit"] += 1
+            return 429, {"error": f"client {client_id} has {self.client_max_pending} jobs pending"}, [
+                ("retry-after", str(self._retry_after(mine["queued"] + 1)))
+            ]
+
+        job_id = self.queue.submit(client_id, request)
+        self.counters["submitted"] += 1
+        self.track(job_id, "queued")
+        self._wakeup.set()
+        return 202, {"id": job_id, "status": "queued"}, [("location", f"/jobs/{job_id}")]
+
+    # --- progress ------------------------------------------------------------
+
+    def track(self, job_id: str, status: str) -> JobProgress:
+        progress = self._progress.get(job_id)
+        if progress is None:
+            progress = self._progress[job_id] = JobProgress(status)
+            while len(self._progress) > PROGRESS_JOBS:
+                oldest, old = next(iter(self._progress.items()))
+                if old.status in ("queued", "running"):
+                    break
+                self._progress.pop(oldest)
+        progress.status = status
+        self._progress.move_to_end(job_id)
+        return progress
+
+    def progress(self, job_id: str) -> Optional[JobProgress]:
+        return self._progress.get(job_id)
+
+    def job_view(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        view = {
+            "id": job["id"],
+            "status": job["status"],
+            "request": job["request"],
+            "attempts": job["attempts"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+        progress = self.progress(job["id"])
+        if progress is not None:
+            view["progress"] = progress.summary()
+        if job["status"] == "done":
+            view["result"] = job["result"]
+        elif job["status"] == "failed":
+            view["error"] = job["error"]
+        return view
+
+    # --- workers -------------------------------------------------------------
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            job = self.queue.claim(self.client_max_running)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), IDLE_POLL_S)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.busy += 1
+            try:
+                await self._run(job)
+            finally:
+                self.busy -= 1
+                # a finished job may free its client's running slot
+                self._wakeup.set()
+
+    async def _start_input(self, job: Dict[str, Any], config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Initial state, or None to resume the job's checkpoint after a restart."""
+        from graph.state import make_initial_state
+
+        if config is not None and job["attempts"] > 1:
+            snapshot = await self.app.aget_state(config)
+            if snapshot.values and snapshot.next:
+                return None
+        return make_initial_state(**job["request"])
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        from config.settings import CHECKPOINT_KEEP_FINISHED
+        from graph.results import result_record
+        from graph.streaming import astream_blog
+
+        job_id = job["id"]
+        progress = self.track(job_id, "running")
+        self.waits.append(time.time() - job["created_at"])
+        started = time.perf_counter()
+        config = {"configurable": {"thread_id": job_id}} if self.checkpointer is not None else None
+        try:
+            state = await self._start_input(job, config)
+            final_state: Dict[str, Any] = {}
+            async for event in astream_blog(self.app, state, config, tokens=False):
+                if event["type"] == "final":
+                    final_state = event["state"] or {}
+                elif event["type"] == "node":
+                    update = event["update"] or {}
+                    progress.node = event["node"]
+                    progress.iteration = update.get("iteration", progress.iteration)
+                    if "last_score" in update:
+                        progress.last_score = update["last_score"]
+                    await progress.publish(
+                        {
+                            "type": "node",
+                            "node": event["node"],
+                            "iteration": progress.iteration,
+                            "last_score": update.get("last_score"),
+                            "stop_reason": update.get("stop_reason"),
+                        }
+                    )
+                elif event["type"] == "draft":
+                    await progress.publish(event)
+            result = result_record(final_state)
+            self.queue.finish(job_id, result)
+            if self.checkpointer is not None and not CHECKPOINT_KEEP_FINISHED:
+                await self.checkpointer.adelete_thread(job_id)
+            self.counters["completed"] += 1
+            progress.status = "done"
+            await progress.publish({"type": "final", "status": "done", "result": result})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            self.queue.fail(job_id, error)
+            self.counters["failed"] += 1
+            progress.status = "failed"
+            await progress.publish({"type": "final", "status": "failed", "error": error})
+        finally:
+            self.runs.append(time.perf_counter() - started)
+
+    # --- metrics -------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        from config.settings import llm_cache_stats
+
+        waits, runs = list(self.waits), list(self.runs)
+        return {
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "workers": self.workers,
+            "busy": self.busy,
+            "queue": self.queue.counts(),
+            "jobs": dict(self.counters),
+            "rejected": dict(self.rejected),
+            "queue_wait_s": {"p50": _percentile(waits, 0.5), "p95": _percentile(waits, 0.95)},
+            "run_s": {
+                "p50": _percentile(runs, 0.5),
+                "p95": _percentile(runs, 0.95),
+                "max": max(runs) if runs else 0.0,
+            },
+            "llm_cache": llm_cache_stats(),
+        }
+
+
+def _warm_clients() -> None:
+    """Build every agent's (memoized) chat model now rather than on the first job."""
+    from agents.critic import critic_llm
+    from agents.generator import generator_llm
+    from agents.guardrails import guard_llm, llama_guard_llm
+    from agents.planner import planner_llm
+    from agents.researcher import researcher_llm
+    from agents.seo_expert import seo_llm
+
+    for factory in (critic_llm, generator_llm, guard_llm, llama_guard_llm, planner_llm, researcher_llm, seo_llm):
+        factory()
+
+
+# --- ASGI ---------------------------------------------------------------------
+
+
+async def _send_json(send, status: int, payload: Any, headers: List[Tuple[str, str]] = ()) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(k.encode(), v.encode()) for k, v in headers]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(receive) -> bytes:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise OverflowError
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _sse(event: Optional[Dict[str, Any]]) -> bytes:
+    if event is None:
+        return b": keep-alive\n\n"
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+class ServiceApp:
+    """ASGI entry point; the service starts on lifespan startup (or the first request)."""
+
+    def __init__(self):
+        self.service: Optional[BlogService] = None
+        self._starting = None
+
+    async def _ensure_started(self) -> BlogService:
+        if self.service is None:
+            if self._starting is None:
+                self._starting = asyncio.ensure_future(self._start())
+            await self._starting
+        return self.service
+
+    async def _start(self) -> None:
+        # .env first: settings are read from the environment when they are imported
+        load_dotenv()
+        service = BlogService()
+        await service.start()
+        self.service = service
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self._ensure_started()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": f"{type(e).__name__}: {e}"})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.service is not None:
+                    await self.service.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send) -> None:
+        service = await self._ensure_started()
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        client_id = headers.get("x-client-id", "").strip() or "anonymous"
+        parts = path.strip("/").split("/")
+
+        if path == "/healthz" and method == "GET":
+            return await _send_json(send, 200, {"ok": True})
+        if path == "/metrics" and method == "GET":
+            return await _send_json(send, 200, service.metrics())
+        if path == "/jobs" and method == "POST":
+            try:
+                body = json.loads(await _read_body(receive) or b"null")
+            except OverflowError:
+                return await _send_json(send, 413, {"error": f"body over {MAX_BODY_BYTES} bytes"})
+            except (ValueError, UnicodeDecodeError):
+                return await _send_json(send, 400, {"error": "body is not valid JSON"})
+            status, payload, extra = service.submit(client_id, body)
+            return await _send_json(send, status, payload, extra)
+        if parts[0] == "jobs" and len(parts) in (2, 3) and method == "GET":
+            job = service.queue.get(parts[1])
+            if job is None:
+                return await _send_json(send, 404, {"error": f"unknown job {parts[1]}"})
+            action = parts[2] if len(parts) == 3 else ""
+            if action == "":
+                return await _send_json(send, 200, service.job_view(job))
+            if action == "result":
+                if job["status"] == "done":
+                    return await _send_json(send, 200, job["result"])
+                if job["status"] == "failed":
+                    return await _send_json(send, 500, {"error": job["error"]})
+                return await _send_json(send, 202, {"id": job["id"], "status": job["status"]})
+            if action == "events":
+                return await self._events(service, job, send)
+        return await _send_json(send, 404, {"error": f"no route for {method} {path}"})
+
+    async def _events(self, service: BlogService, job: Dict[str, Any], send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+            }
+        )
+        progress = service.progress(job["id"])
+        if progress is None and job["status"] in ("queued", "running"):
+            progress = service.track(job["id"], job["status"])
+        if progress is None:
+            # finished long ago: only the outcome is left
+            final = {"type": "final", "status": job["status"]}
+            final.update({"result": job["result"]} if job["status"] == "done" else {"error": job["error"]})
+            await send({"type": "http.response.body", "body": _sse(final)})
+            return
+        async for event in progress.follow():
+            await send({"type": "http.response.body", "body": _sse(event), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+app = ServiceApp()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve blog generation jobs over HTTP (ASGI).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Pipelines run at once (SERVICE_WORKERS)")
+    parser.add_argument("--groq-rps", type=float, default=None,
+                        help="Max Groq requests/second shared by all workers")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # settings are read when the service starts, after these overrides
+    if args.workers is not None:
+        os.environ["SERVICE_WORKERS"] = str(args.workers)
+    if args.groq_rps is not None:
+        os.environ["GROQ_REQUESTS_PER_SECOND"] = str(args.groq_rps)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed; run `server:app` with any ASGI server instead")
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""Tests run offline: the fake LLM / search backends and a throwaway cache directory."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import use_fake_backends  # noqa: E402
+
+# before anything imports config.settings
+use_fake_backends(latency_s=0.0, search_latency_s=0.0, archive_reuse="draft,research")
+os.environ.pop("LLM_FALLBACK_MODEL", None)
@@ -0,0 +1,24 @@
+import asyncio
+import json
+
+from batch import run_batch
+
+SEEDS = [
+    {"topic": "Sourdough at home", "word_count": 300},
+    {"topic": "Sourdough at home", "word_count": 300},
+    {"id": "k8s", "topic": "Kubernetes autoscaling", "word_count": 300},
+    {"id": "k8s", "topic": "Kubernetes autoscaling, again", "word_count": 300},
+]
+
+
+def test_duplicate_seeds_run_once(tmp_path):
+    output = tmp_path / "results.jsonl"
+
+    stats = asyncio.run(run_batch(SEEDS, output, concurrency=4, max_iterations=2))
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert stats["ok"] == 2 and stats["skipped"] == 2
+    assert sorted(r["topic"] for r in records) == ["Kubernetes autoscaling", "Sourdough at home"]
+
+    rerun = asyncio.run(run_batch(SEEDS, output, concurrency=4, max_iterations=2))
+    assert rerun["skipped"] == 4 and rerun["ok"] == 0
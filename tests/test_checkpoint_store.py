@@ -0,0 +1,109 @@
+import asyncio
+import sqlite3
+import threading
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from utils.checkpoint_store import SQLiteCheckpointSaver
+
+SHARED = "research notes " * 200
+
+
+def _put(saver, thread_id, values, checkpoint_id="1"):
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = checkpoint_id
+    checkpoint["channel_values"] = values
+    checkpoint["channel_versions"] = {channel: 1 for channel in values}
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    saved = saver.put(config, checkpoint, {}, checkpoint["channel_versions"])
+    saver.put_writes(saved, [("draft", f"{thread_id} pending")], task_id="t1")
+    return saved
+
+
+def _refs(saver):
+    """Stored counts next to a full recount of the rows pointing at each value."""
+    return saver._conn.execute(
+        "SELECT refs, (SELECT COUNT(*) FROM channel_versions WHERE hash = b.hash) + "
+        "(SELECT COUNT(*) FROM writes WHERE hash = b.hash) FROM blobs b"
+    ).fetchall()
+
+
+def test_delete_thread_keeps_values_other_threads_use(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "cp.sqlite"))
+    _put(saver, "a", {"research_notes": SHARED, "topic": "a"})
+    _put(saver, "b", {"research_notes": SHARED, "topic": "b"})
+
+    saver.delete_thread("a")
+
+    values = saver.get_tuple({"configurable": {"thread_id": "b"}}).checkpoint["channel_values"]
+    assert values == {"research_notes": SHARED, "topic": "b"}
+    assert all(stored == counted for stored, counted in _refs(saver))
+
+    saver.delete_thread("b")
+    assert saver.stats()["blobs"] == 0
+
+
+def test_replaced_rows_release_their_values(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "cp.sqlite"))
+    saved = _put(saver, "a", {"topic": "first"})
+    # the same channel version written again with a new value, and an error write replaced
+    _put(saver, "a", {"topic": "second"})
+    saver.put_writes(saved, [("__error__", "boom")], task_id="t1")
+    saver.put_writes(saved, [("__error__", "boom again")], task_id="t1")
+
+    assert all(stored == counted for stored, counted in _refs(saver))
+    saver.delete_thread("a")
+    assert saver.stats()["blobs"] == 0
+
+
+def test_older_files_get_their_counts_filled_in(tmp_path):
+    path = str(tmp_path / "cp.sqlite")
+    SQLiteCheckpointSaver(path)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        DROP TRIGGER channel_versions_ref; DROP TRIGGER channel_versions_unref;
+        DROP TRIGGER writes_ref; DROP TRIGGER writes_unref;
+        DROP INDEX blobs_unreferenced; DROP TABLE blobs;
+        CREATE TABLE blobs (hash TEXT PRIMARY KEY, type TEXT NOT NULL, value BLOB NOT NULL);
+        INSERT INTO blobs VALUES ('h1', 'str', 'x'), ('h2', 'str', 'y');
+        INSERT INTO channel_versions VALUES ('a', '', 'topic', '1', 'h1'), ('b', '', 'topic', '1', 'h1');
+        INSERT INTO writes VALUES ('a', '', '1', 't', 0, 'draft', 'h2', '');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    saver = SQLiteCheckpointSaver(path)
+
+    assert dict(saver._conn.execute("SELECT hash, refs FROM blobs")) == {"h1": 2, "h2": 1}
+    saver.delete_thread("a")
+    assert [row[0] for row in saver._conn.execute("SELECT hash FROM blobs")] == ["h1"]
+
+
+def test_async_api_runs_off_the_event_loop(tmp_path, monkeypatch):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "cp.sqlite"))
+    threads = []
+    put = saver.put
+
+    def recording_put(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return put(*args, **kwargs)
+
+    monkeypatch.setattr(saver, "put", recording_put)
+
+    async def run():
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"topic": "a"}
+        checkpoint["channel_versions"] = {"topic": 1}
+        config = {"configurable": {"thread_id": "a", "checkpoint_ns": ""}}
+        await saver.aput(config, checkpoint, {}, {"topic": 1})
+        listed = [item async for item in saver.alist({"configurable": {"thread_id": "a"}})]
+        await saver.adelete_thread("a")
+        return threading.get_ident(), listed
+
+    loop_thread, listed = asyncio.run(run())
+
+    assert threads and threads[0] != loop_thread
+    assert listed[0].checkpoint["channel_values"] == {"topic": "a"}
+    assert saver.thread_ids() == []
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import agents.critic as critic
+from agents.orchestrator import CONFIDENCE_THRESHOLD
+from utils.score_calibration import ScoreCalibration
+
+STATE = {"topic": "Vector databases", "constraints": "", "word_count": 300, "iteration": 1}
+
+
+@pytest.fixture
+def calibration(tmp_path, monkeypatch):
+    recorded = []
+
+    class Recording(ScoreCalibration):
+        def record(self, scores):
+            recorded.append(dict(scores))
+            super().record(scores)
+
+    store = Recording(str(tmp_path / "calibration.sqlite"))
+    monkeypatch.setattr(critic, "get_score_calibration", lambda: store)
+    monkeypatch.setattr(critic, "CRITIC_MODE", "ensemble")
+    monkeypatch.setattr(critic, "CRITIC_CALIBRATION", True)
+    monkeypatch.setattr(critic, "_prescore", lambda state, draft: None)
+    return recorded
+
+
+def _candidates(n):
+    return [f"# Vector databases\n\n## Part {i}\nDraft {i} body." for i in range(n)]
+
+
+def test_best_of_n_records_only_the_kept_draft(calibration):
+    update = critic.critic_node({**STATE, "candidate_drafts": _candidates(3)})
+
+    assert len(calibration) == 1
+    assert set(calibration[0]) == set(critic.ASPECTS)
+    assert all(1 <= points <= 10 for points in calibration[0].values())
+    assert update["draft"] in _candidates(3)
+
+
+def test_async_best_of_n_records_once(calibration):
+    asyncio.run(critic.critic_node_async({**STATE, "candidate_drafts": _candidates(4)}))
+
+    assert len(calibration) == 1
+
+
+def test_single_draft_records_once(calibration):
+    critic.critic_node({**STATE, "draft": _candidates(1)[0]})
+
+    assert len(calibration) == 1
+
+
+def test_constant_scores_keep_crossing_the_threshold(tmp_path, monkeypatch):
+    # a lenient grammar judge and a harsh SEO judge, the same draft quality every round
+    store = ScoreCalibration(str(tmp_path / "calibration.sqlite"), min_samples=20)
+    monkeypatch.setattr(critic, "get_score_calibration", lambda: store)
+    monkeypatch.setattr(critic, "CRITIC_CALIBRATION", True)
+    points = {"grammar": 10, "depth": 8, "structure": 8, "seo_alignment": 7}
+    results = {a: critic.AspectScore(score=p, feedback="ok") for a, p in points.items()}
+
+    overall = []
+    for _ in range(60):
+        verdict = critic._combine(results)
+        store.record(points)
+        overall.append(verdict.overall_score)
+
+    assert len(store._history["grammar"]) > store.min_samples
+    assert all(score >= CONFIDENCE_THRESHOLD for score in overall)
+    # the history only shifts each aspect by its bias, it does not raise the bar
+    assert overall[-1] == overall[30]
+
+
+def test_calibration_is_opt_in(calibration, monkeypatch):
+    monkeypatch.setattr(critic, "CRITIC_CALIBRATION", False)
+
+    critic.critic_node({**STATE, "draft": _candidates(1)[0]})
+
+    assert calibration == []
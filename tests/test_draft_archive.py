@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+import agents.archive as archive
+from config.settings import ARCHIVE_RESEARCH_MIN_SIMILARITY, ARCHIVE_SEED_MIN_SIMILARITY
+from utils.draft_archive import DraftArchive
+
+TOPIC = "How to bake sourdough bread at home"
+CONSTRAINTS = "audience: beginners; keywords: sourdough starter, oven spring"
+
+
+def _draft(headings: int) -> str:
+    sections = "\n\n".join(f"## Step {i}: shaping, proofing and scoring {i}\nBody {i}." for i in range(headings))
+    return f"# {TOPIC}\n\n{sections}\n"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DraftArchive(str(tmp_path / "archive.sqlite"))
+    store.add("Kubernetes autoscaling explained", "", "", 800, _draft(3), 0.9, "k8s notes")
+    store.add("Vector databases for search", "", "keywords: hnsw", 800, _draft(4), 0.85, "vector notes")
+    return store
+
+
+@pytest.mark.parametrize("headings", [5, 8])
+def test_identical_rerun_reaches_seed_and_research_thresholds(store, headings):
+    store.add(TOPIC, "friendly", CONSTRAINTS, 1200, _draft(headings), 0.82, "sourdough notes")
+
+    hits = store.similar(TOPIC, CONSTRAINTS, k=3)
+
+    assert hits[0]["topic"] == TOPIC
+    assert hits[0]["similarity"] >= ARCHIVE_SEED_MIN_SIMILARITY
+    assert hits[0]["similarity"] >= ARCHIVE_RESEARCH_MIN_SIMILARITY
+
+
+def test_recall_seeds_and_reuses_fresh_research(store, monkeypatch):
+    store.add(TOPIC, "", CONSTRAINTS, 1200, _draft(5), 0.82, "sourdough notes")
+    monkeypatch.setattr(archive, "get_draft_archive", lambda: store)
+
+    update = archive.recall_node({"topic": TOPIC, "constraints": CONSTRAINTS})
+
+    assert update["seed_draft"] == _draft(5)
+    assert update["research_notes"] == "sourdough notes"
+    assert update["archive_match"]["research_from"] == update["archive_match"]["id"]
+
+
+def test_recall_skips_stale_research(store, monkeypatch):
+    run_id = store.add(TOPIC, "", CONSTRAINTS, 1200, _draft(5), 0.82, "sourdough notes")
+    stale = time.time() - archive.RESEARCH_TTL_SECONDS - 60
+    store._conn.execute("UPDATE runs SET created_at = ? WHERE id = ?", (stale, run_id))
+    monkeypatch.setattr(archive, "get_draft_archive", lambda: store)
+
+    update = archive.recall_node({"topic": TOPIC, "constraints": CONSTRAINTS})
+
+    assert update["seed_draft"] == _draft(5)
+    assert "research_notes" not in update
@@ -0,0 +1,73 @@
+import asyncio
+import re
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agents.critic import CriticScore
+from agents.guardrails import GuardrailsOutput
+from utils.fake_backends import FakeAPIError, FakeChatModel, FakeSearchTool
+
+PROMPT = [HumanMessage(content="Topic: vector databases\nTarget word count: 600\nWrite the blog.")]
+
+
+def test_chat_is_deterministic_per_prompt():
+    model = FakeChatModel(seed=3)
+
+    first = model.invoke(PROMPT).content
+    assert model.invoke(PROMPT).content == first
+    assert FakeChatModel(seed=4).invoke(PROMPT).content != first
+
+
+def test_chat_writes_a_markdown_blog_near_the_target():
+    reply = FakeChatModel().invoke(PROMPT)
+
+    assert reply.content.startswith("# Vector Databases")
+    assert len(re.findall(r"^## ", reply.content, re.MULTILINE)) == 5
+    assert 400 <= len(reply.content.split()) <= 800
+    assert reply.usage_metadata["output_tokens"] > 0
+
+
+def test_stream_matches_invoke():
+    model = FakeChatModel()
+
+    assert "".join(chunk.content for chunk in model.stream(PROMPT)) == model.invoke(PROMPT).content
+
+
+def test_llama_guard_answers_safe():
+    assert FakeChatModel(model_name="llama-guard-3-1b").invoke(PROMPT).content == "safe"
+
+
+def test_critic_scores_follow_the_iteration():
+    model = FakeChatModel(critic_scores=[0.5, 0.9]).with_structured_output(CriticScore)
+
+    assert model.invoke("Iteration: 1\nDraft").overall_score == 0.5
+    assert model.invoke("Iteration: 2\nDraft").overall_score == 0.9
+    assert model.invoke("Iteration: 7\nDraft").overall_score == 0.9
+
+
+def test_guardrails_output_echoes_inputs():
+    result = FakeChatModel().with_structured_output(GuardrailsOutput).invoke(
+        "Topic: Rust async\n\nConstraints: audience: beginners"
+    )
+
+    assert result.valid
+    assert (result.topic, result.constraints) == ("Rust async", "audience: beginners")
+
+
+def test_injected_errors_look_like_provider_errors():
+    model = FakeChatModel(error_rate=1.0, error_status=503, retry_after_s=2)
+
+    with pytest.raises(FakeAPIError) as raised:
+        model.invoke(PROMPT)
+    assert raised.value.status_code == 503
+    assert raised.value.response.headers["retry-after"] == "2"
+
+
+def test_search_is_deterministic():
+    tool = FakeSearchTool(max_results=3)
+
+    results = tool.invoke({"query": "hnsw index"})
+    assert [r["url"] for r in results] == [f"https://example.com/hnsw-index/{i}" for i in range(3)]
+    assert results == asyncio.run(tool.ainvoke({"query": "hnsw index"}))
+    assert results != tool.invoke({"query": "ivf index"})
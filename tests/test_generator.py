@@ -0,0 +1,73 @@
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+import agents.generator as generator
+from utils.fake_backends import FakeChatModel
+from utils.tracing import traced_node
+
+DRAFT = "# Vector Databases\n\n## Introduction\nOld intro.\n\n## Conclusion\nOld ending.\n"
+
+
+class FailingStructured:
+    """FakeChatModel whose structured calls for `schema_name` raise `error`."""
+
+    def __init__(self, schema_name, error):
+        self.model = FakeChatModel()
+        self.schema_name = schema_name
+        self.error = error
+
+    def _raise(self, _input):
+        raise self.error
+
+    def with_structured_output(self, schema, **kwargs):
+        if schema.__name__ == self.schema_name:
+            return RunnableLambda(self._raise)
+        return self.model.with_structured_output(schema, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def _run(monkeypatch, llm, **state):
+    monkeypatch.setattr(generator, "generator_llm", lambda *args, **kwargs: llm)
+    state = {"topic": "Vector databases", "constraints": "", "iteration": 1, "research_notes": "", **state}
+    update = traced_node("generator", generator.generator_node, {})(state)
+    return update, update["trace"][0]["degraded"]
+
+
+def test_outline_failure_falls_back_to_a_single_pass(monkeypatch):
+    llm = FailingStructured("BlogOutline", ValueError("no tool call in reply"))
+
+    update, degraded = _run(monkeypatch, llm, word_count=3000)
+
+    assert "outline" not in update
+    assert update["draft"].startswith("# Vector Databases")
+    assert [(d["step"], d["fallback"]) for d in degraded] == [("outline", "a single-pass draft")]
+    assert degraded[0]["error"] == "ValueError: no tool call in reply"
+
+
+def test_transition_failure_keeps_the_stitched_sections(monkeypatch):
+    llm = FailingStructured("SectionTransitions", TimeoutError("slow"))
+
+    update, degraded = _run(monkeypatch, llm, word_count=3000)
+
+    assert update["outline"]
+    assert [d["step"] for d in degraded] == ["section transitions"]
+
+
+def test_patch_failure_falls_back_to_a_full_rewrite(monkeypatch):
+    llm = FailingStructured("DraftRevision", ValueError("bad edits"))
+
+    update, degraded = _run(
+        monkeypatch, llm, word_count=600, iteration=2, draft=DRAFT, critic_feedback="Depth: add examples."
+    )
+
+    assert update["draft"] != DRAFT
+    assert [(d["step"], d["fallback"]) for d in degraded] == [("patch revision", "a full rewrite")]
+
+
+def test_programming_errors_are_not_swallowed(monkeypatch):
+    llm = FailingStructured("BlogOutline", TypeError("bug"))
+
+    with pytest.raises(TypeError):
+        _run(monkeypatch, llm, word_count=3000)
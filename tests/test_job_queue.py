@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from utils.job_queue import JobQueue
+
+# claim() is an UPDATE ... RETURNING
+pytestmark = pytest.mark.skipif(sqlite3.sqlite_version_info < (3, 35), reason="needs SQLite 3.35+")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+def test_claim_respects_the_per_client_limit(queue):
+    a1 = queue.submit("a", {"topic": "a1"})
+    a2 = queue.submit("a", {"topic": "a2"})
+    b1 = queue.submit("b", {"topic": "b1"})
+
+    first = queue.claim(max_running_per_client=1)
+    assert (first["id"], first["status"], first["attempts"]) == (a1, "running", 1)
+    # a is at its limit, so its second job is passed over for b's
+    assert queue.claim(max_running_per_client=1)["id"] == b1
+    assert queue.claim(max_running_per_client=1) is None
+
+    queue.finish(a1, {"best_score": 0.9})
+    assert queue.claim(max_running_per_client=1)["id"] == a2
+    assert queue.counts("a") == {"queued": 0, "running": 1, "done": 1, "failed": 0}
+
+
+def test_claim_without_a_limit_takes_jobs_in_order(queue):
+    ids = [queue.submit("a", {"topic": str(i)}) for i in range(3)]
+
+    assert [queue.claim()["id"] for _ in ids] == ids
+    assert queue.claim() is None
+
+
+def test_requeue_running_after_a_restart(queue):
+    job_id = queue.submit("a", {"topic": "t"})
+    queue.claim()
+
+    assert queue.requeue_running() == 1
+    job = queue.get(job_id)
+    assert (job["status"], job["started_at"]) == ("queued", None)
+    # the next claim is the job's second attempt, so the worker resumes its checkpoint
+    assert queue.claim()["attempts"] == 2
+    assert queue.requeue_running() == 1 and queue.requeue_running() == 0
+
+
+def test_purge_deletes_only_old_finished_jobs(queue):
+    done = queue.submit("a", {"topic": "done"})
+    failed = queue.submit("a", {"topic": "failed"})
+    waiting = queue.submit("a", {"topic": "waiting"})
+    queue.claim()
+    queue.claim()
+    queue.finish(done, {"best_score": 0.9})
+    queue.fail(failed, "RuntimeError: boom")
+
+    assert queue.purge(older_than_s=3600) == 0
+    assert queue.purge(older_than_s=0) == 2
+    assert queue.get(done) is None and queue.get(failed) is None
+    assert queue.get(waiting)["status"] == "queued"
@@ -0,0 +1,234 @@
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+import utils.resilience as resilience
+from utils.fake_backends import FakeAPIError
+from utils.resilience import CallPolicy, ModelStats, ResilientModel, backoff_delay, is_retryable, retry_after
+
+FAST = CallPolicy(max_retries=3, backoff_base_s=0.001, backoff_max_s=0.01)
+
+
+class Flaky:
+    """Fails with `errors` in turn, then answers `reply`; counts calls."""
+
+    def __init__(self, reply, errors=()):
+        self.reply = reply
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, _input):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.reply
+
+    async def acall(self, _input):
+        return self(_input)
+
+    def runnable(self):
+        return RunnableLambda(self, afunc=self.acall)
+
+
+def _model(*flakies, policy=FAST):
+    return ResilientModel([f.runnable() for f in flakies], [ModelStats() for _ in flakies], policy)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the call layer's sleeps instead of sleeping."""
+    slept = []
+    monkeypatch.setattr(resilience.time, "sleep", slept.append)
+    return slept
+
+
+# --- backoff ------------------------------------------------------------------
+
+
+def test_backoff_is_full_jitter_capped_at_max():
+    policy = CallPolicy(backoff_base_s=0.5, backoff_max_s=4.0)
+    rng = random.Random(0)
+    for attempt in range(8):
+        ceiling = min(policy.backoff_max_s, policy.backoff_base_s * 2 ** attempt)
+        delays = [backoff_delay(attempt, policy, rng) for _ in range(200)]
+        assert all(0.0 <= d <= ceiling for d in delays)
+        assert max(delays) > 0.5 * ceiling
+
+
+def test_retryable_errors():
+    assert is_retryable(FakeAPIError(429))
+    assert is_retryable(FakeAPIError(503))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(FakeAPIError(400))
+    assert not is_retryable(ValueError("bad JSON"))
+
+
+def test_retry_after_header():
+    assert retry_after(FakeAPIError(429, retry_after_s=2.5)) == 2.5
+    assert retry_after(FakeAPIError(429)) is None
+
+
+# --- retries ------------------------------------------------------------------
+
+
+def test_retries_transient_errors_then_succeeds(sleeps):
+    flaky = Flaky("ok", [FakeAPIError(503), FakeAPIError(429)])
+
+    assert _model(flaky).invoke("prompt") == "ok"
+    assert flaky.calls == 3
+    assert len([s for s in sleeps if s > 0]) <= 2
+
+
+def test_non_retryable_error_is_raised_at_once(sleeps):
+    flaky = Flaky("ok", [FakeAPIError(400)])
+
+    with pytest.raises(FakeAPIError):
+        _model(flaky).invoke("prompt")
+    assert flaky.calls == 1
+
+
+def test_gives_up_after_max_retries(sleeps):
+    flaky = Flaky("ok", [FakeAPIError(503)] * 10)
+
+    with pytest.raises(FakeAPIError):
+        _model(flaky).invoke("prompt")
+    assert flaky.calls == FAST.max_retries + 1
+
+
+def test_retry_waits_at_least_retry_after(sleeps):
+    flaky = Flaky("ok", [FakeAPIError(429, retry_after_s=0.008)])
+
+    assert _model(flaky).invoke("prompt") == "ok"
+    assert max(sleeps) >= 0.008
+
+
+def test_async_retries_transient_errors():
+    flaky = Flaky("ok", [FakeAPIError(503), FakeAPIError(503)])
+
+    assert asyncio.run(_model(flaky).ainvoke("prompt")) == "ok"
+    assert flaky.calls == 3
+
+
+def test_stream_is_retried_before_the_first_chunk(sleeps):
+    flaky = Flaky("streamed", [FakeAPIError(502)])
+
+    assert "".join(_model(flaky).stream("prompt")) == "streamed"
+    assert flaky.calls == 2
+
+
+# --- fallback -----------------------------------------------------------------
+
+
+def test_falls_back_once_retries_are_exhausted(sleeps):
+    primary = Flaky("primary", [FakeAPIError(503)] * 10)
+    fallback = Flaky("fallback")
+
+    assert _model(primary, fallback).invoke("prompt") == "fallback"
+    assert primary.calls == FAST.max_retries + 1
+    assert fallback.calls == 1
+
+
+def test_no_fallback_for_non_retryable_errors(sleeps):
+    primary = Flaky("primary", [FakeAPIError(400)])
+    fallback = Flaky("fallback")
+
+    with pytest.raises(FakeAPIError):
+        _model(primary, fallback).invoke("prompt")
+    assert fallback.calls == 0
+
+
+def test_fallback_is_opt_in():
+    from config.settings import LLM_FALLBACK_MODEL, get_llm
+
+    assert LLM_FALLBACK_MODEL == ""
+    assert len(get_llm(agent="generator").models) == 1
+
+
+# --- circuit breaker (retry-after cooldown) -------------------------------------
+
+
+def test_long_retry_after_opens_the_circuit():
+    # a retry-after past backoff_max_s skips the model, and keeps skipping it
+    # for every caller until the cooldown is over
+    primary = Flaky("primary", [FakeAPIError(429, retry_after_s=30)])
+    fallback = Flaky("fallback")
+    model = _model(primary, fallback)
+
+    assert model.invoke("first") == "fallback"
+    assert model.invoke("second") == "fallback"
+    assert primary.calls == 1
+    assert model.stats[0].cooldown_remaining() > 25
+
+
+def test_circuit_half_opens_after_the_cooldown():
+    primary = Flaky("primary", [FakeAPIError(429, retry_after_s=0.05)])
+    fallback = Flaky("fallback")
+    model = _model(primary, fallback)
+
+    assert model.invoke("first") == "fallback"
+    assert model.invoke("during cooldown") == "fallback"
+    time.sleep(0.06)
+    # the next call tries the primary again and, as it succeeds, stays on it
+    assert model.invoke("after cooldown") == "primary"
+    assert model.invoke("closed") == "primary"
+    assert primary.calls == 3
+
+
+def test_last_model_waits_out_its_cooldown(sleeps):
+    only = Flaky("ok", [FakeAPIError(429, retry_after_s=30)])
+
+    assert _model(only).invoke("prompt") == "ok"
+    assert max(sleeps) >= 29
+
+
+# --- timeouts -------------------------------------------------------------------
+
+
+def test_hung_sync_calls_time_out_in_the_client_without_a_pool():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from utils.fake_backends import FakeChatModel, FakeTimeout
+
+    hung = FakeChatModel(latency_s=30, timeout=0.05)
+    model = ResilientModel([hung], [ModelStats()], CallPolicy(max_retries=0, timeout_s=0.05))
+    started = time.monotonic()
+
+    # far more hung calls than the old 32-thread call pool, all at once
+    with ThreadPoolExecutor(max_workers=64) as callers:
+        outcomes = list(callers.map(lambda i: _outcome(model, f"prompt {i}"), range(64)))
+
+    assert all(isinstance(o, FakeTimeout) for o in outcomes)
+    assert time.monotonic() - started < 5
+    assert not [t for t in threading.enumerate() if t.name.startswith("llm-call")]
+    healthy = ResilientModel([FakeChatModel()], [ModelStats()], FAST)
+    assert healthy.invoke("after the slowdown").content
+
+
+def _outcome(model, prompt):
+    try:
+        return model.invoke(prompt)
+    except Exception as e:
+        return e
+
+
+def test_async_hedge_cancels_the_slow_request():
+    calls = []
+
+    async def reply(_input):
+        calls.append(time.monotonic())
+        await asyncio.sleep(5 if len(calls) == 1 else 0)
+        return "hedged"
+
+    stats = ModelStats()
+    for _ in range(5):
+        stats.record(0.01)
+    policy = CallPolicy(max_retries=0, hedge_quantile=0.5, hedge_min_samples=5)
+    model = ResilientModel([RunnableLambda(lambda x: x, afunc=reply)], [stats], policy)
+    started = time.monotonic()
+
+    assert asyncio.run(model.ainvoke("prompt")) == "hedged"
+    assert len(calls) == 2 and time.monotonic() - started < 1
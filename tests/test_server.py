@@ -0,0 +1,63 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import config.settings as settings
+from server import ServiceApp
+
+
+@pytest.fixture
+def service_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SERVICE_QUEUE_PATH", str(tmp_path / "jobs.sqlite"))
+    monkeypatch.setattr(settings, "SERVICE_WORKERS", 2)
+    return ServiceApp()
+
+
+async def _request(app, method, path, body=None):
+    """One HTTP exchange through the ASGI app: (status, headers, JSON payload)."""
+    incoming = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": [(b"x-client-id", b"tests")]}
+    await app(scope, receive, send)
+    start, body_parts = sent[0], [m.get("body", b"") for m in sent[1:]]
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], headers, json.loads(b"".join(body_parts))
+
+
+def test_submit_poll_and_fetch_the_result(service_app):
+    async def scenario():
+        status, headers, job = await _request(
+            service_app, "POST", "/jobs", {"topic": "Sourdough at home", "word_count": 300, "max_iterations": 2}
+        )
+        assert status == 202 and job["status"] == "queued"
+        assert headers["location"] == f"/jobs/{job['id']}"
+
+        deadline = time.monotonic() + 30
+        while True:
+            status, _, view = await _request(service_app, "GET", f"/jobs/{job['id']}")
+            assert status == 200
+            if view["status"] not in ("queued", "running"):
+                break
+            assert time.monotonic() < deadline, view
+            await asyncio.sleep(0.02)
+
+        assert view["status"] == "done"
+        assert view["progress"]["node"]
+        status, _, result = await _request(service_app, "GET", f"/jobs/{job['id']}/result")
+        assert status == 200 and result == view["result"]
+        assert result["topic"] == "Sourdough at home" and result["best_draft"]
+
+        assert (await _request(service_app, "GET", "/jobs/missing"))[0] == 404
+        assert (await _request(service_app, "POST", "/jobs", {"word_count": 300}))[0] == 400
+        await service_app.service.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,21 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from config.settings import MODEL_PRICING, MODELS_FILE
+
+
+def test_pricing_comes_from_models_json():
+    assert MODEL_PRICING == json.loads(MODELS_FILE.read_text(encoding="utf-8"))["pricing"]
+
+
+def test_settings_import_leaves_the_stores_unloaded():
+    code = (
+        "import sys, config.settings; "
+        "print(any(m in sys.modules for m in ('utils.llm_cache', 'utils.research_store')))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=Path(__file__).parents[1]
+    )
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,22 @@
+from utils.stopping import _last_round
+from utils.tracing import ONE_OFF_NODES
+
+
+def _span(node, iteration, wall_ms, tokens=0):
+    return {"node": node, "iteration": iteration, "wall_ms": wall_ms, "start": 0.0,
+            "prompt_tokens": tokens, "completion_tokens": 0, "cost_usd": 0.0}
+
+
+def test_one_off_nodes_are_not_counted_as_a_round():
+    trace = [
+        _span("guardrails", 0, 100),
+        _span("recall", 0, 100),
+        _span("generator", 1, 400, tokens=1000),
+        _span("critic", 1, 100, tokens=200),
+        # the SEO pass and archive run after the last round, at its iteration
+        _span("seo", 2, 5000, tokens=9000),
+        _span("archive", 2, 50),
+    ]
+
+    assert {"recall", "seo", "archive"} <= set(ONE_OFF_NODES)
+    assert _last_round({"trace": trace}) == {"seconds": 0.5, "tokens": 1200}
@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """
+    Durable LangGraph checkpointer in one SQLite file, keyed by thread_id
+    (the run ID), so an interrupted run resumes from its last completed node.
+
+    Writes are incremental: channel values and task writes are stored once per
+    distinct content (sha1 of the serialized value) and checkpoints only point
+    at them. Nodes that return the whole state re-send unchanged keys every
+    step; those cost one small index row, not another copy of the value.
+    Each value counts the rows pointing at it (kept by triggers), so deleting
+    a thread frees exactly the values no other thread still uses.
+    """
+
+    def __init__(self, path: str, serde: Any = None):
+        super().__init__(serde=serde)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_id TEXT,
+                checkpoint_type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                value BLOB NOT NULL,
+                refs INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS channel_versions (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                hash TEXT,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                task_path TEXT NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+        self._migrate()
+        # REPLACE removes the old row through its delete trigger only with this on
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS blobs_unreferenced ON blobs (hash) WHERE refs <= 0;
+            CREATE TRIGGER IF NOT EXISTS channel_versions_ref AFTER INSERT ON channel_versions
+                WHEN NEW.hash IS NOT NULL
+                BEGIN UPDATE blobs SET refs = refs + 1 WHERE hash = NEW.hash; END;
+            CREATE TRIGGER IF NOT EXISTS channel_versions_unref AFTER DELETE ON channel_versions
+                WHEN OLD.hash IS NOT NULL
+                BEGIN UPDATE blobs SET refs = refs - 1 WHERE hash = OLD.hash; END;
+            CREATE TRIGGER IF NOT EXISTS writes_ref AFTER INSERT ON writes
+                BEGIN UPDATE blobs SET refs = refs + 1 WHERE hash = NEW.hash; END;
+            CREATE TRIGGER IF NOT EXISTS writes_unref AFTER DELETE ON writes
+                BEGIN UPDATE blobs SET refs = refs - 1 WHERE hash = OLD.hash; END;
+            """
+        )
+        self._conn.commit()
+
+        # bytes actually written vs. skipped because the content was already stored
+        self.bytes_written = 0
+        self.bytes_deduplicated = 0
+
+    def _migrate(self) -> None:
+        """Files written before values were reference-counted: add and fill the count once."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(blobs)")]
+        if "refs" in columns:
+            return
+        with self._conn:
+            self._conn.execute("ALTER TABLE blobs ADD COLUMN refs INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "UPDATE blobs SET refs = "
+                "(SELECT COUNT(*) FROM channel_versions WHERE hash = blobs.hash) + "
+                "(SELECT COUNT(*) FROM writes WHERE hash = blobs.hash)"
+            )
+
+    # --- storage helpers (callers hold self._lock) ---------------------------
+
+    def _store(self, value: Any) -> str:
+        type_, data = self.serde.dumps_typed(value)
+        digest = hashlib.sha1(type_.encode("utf-8") + b"\x00" + data).hexdigest()
+        cur = self._conn.execute(
+            "INSERT OR IGNORE INTO blobs (hash, type, value) VALUES (?, ?, ?)",
+            (digest, type_, data),
+        )
+        if cur.rowcount:
+            self.bytes_written += len(data)
+        else:
+            self.bytes_deduplicated += len(data)
+        return digest
+
+    def _load(self, digest: str) -> Any:
+        row = self._conn.execute("SELECT type, value FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return self.serde.loads_typed((row[0], row[1]))
+
+    def _channel_values(self, thread_id: str, ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = self._conn.execute(
+                "SELECT b.type, b.value FROM channel_versions cv JOIN blobs b ON b.hash = cv.hash "
+                "WHERE cv.thread_id = ? AND cv.checkpoint_ns = ? AND cv.channel = ? AND cv.version = ?",
+                (thread_id, ns, channel, str(version)),
+            ).fetchone()
+            if row is not None:  # no row / NULL hash = empty channel
+                values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _pending_writes(self, thread_id: str, ns: str, checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        rows = self._conn.execute(
+            "SELECT w.task_id, w.channel, b.type, b.value FROM writes w JOIN blobs b ON b.hash = w.hash "
+            "WHERE w.thread_id = ? AND w.checkpoint_ns = ? AND w.checkpoint_id = ? "
+            "ORDER BY w.task_path, w.task_id, w.idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        return [(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in rows]
+
+    def _tuple(self, thread_id: str, ns: str, row: Tuple) -> CheckpointTuple:
+        checkpoint_id, parent_id, cp_type, cp_data, md_type, md_data = row
+        checkpoint = self.serde.loads_typed((cp_type, cp_data))
+        checkpoint["channel_values"] = self._channel_values(thread_id, ns, checkpoint["channel_versions"])
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((md_type, md_data)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=self._pending_writes(thread_id, ns, checkpoint_id),
+        )
+
+    # --- BaseCheckpointSaver --------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, ns),
+                ).fetchone()
+            return self._tuple(thread_id, ns, row) if row is not None else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            results = []
+            for thread_id, ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[4], row[5]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                results.append(self._tuple(thread_id, ns, tuple(row)))
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        cp_type, cp_data = self.serde.dumps_typed(c)
+        md_type, md_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock, self._conn:
+            # only channels updated since the parent checkpoint get new versions
+            for channel, version in new_versions.items():
+                digest = self._store(values[channel]) if channel in values else None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO channel_versions VALUES (?, ?, ?, ?, ?)",
+                    (thread_id, ns, channel, str(version), digest),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    cp_type, cp_data, md_type, md_data, time.time(),
+                ),
+            )
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock, self._conn:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # regular writes are kept from the first attempt; special ones (errors...) replace
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                self._conn.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, checkpoint_id, task_id, idx, channel, self._store(value), task_path),
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._conn:
+            for table in ("checkpoints", "channel_versions", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            # values are shared across threads; the triggers have dropped the
+            # counts of this thread's rows, so only its orphans are left at 0
+            self._conn.execute("DELETE FROM blobs WHERE refs <= 0")
+
+    def thread_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "bytes_written": self.bytes_written,
+                "bytes_deduplicated": self.bytes_deduplicated,
+                "blobs": self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0],
+                "checkpoints": self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0],
+            }
+
+    # The async API runs the SQLite calls in a worker thread, off the event loop.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,160 @@
+"""
+Local archive of finished runs with a TF-IDF similarity index (SQLite + numpy).
+
+Every finished run (topic, tone, constraints, best draft and score, research
+notes) is stored. A new run looks up the nearest archived run by cosine
+similarity of TF-IDF vectors over topic and constraints: the inputs both
+sides have (a new run has no draft yet), so an identical rerun scores 1.0.
+The index is kept as flat numpy arrays (one entry per term of
+each run) and rebuilt lazily after inserts; a lookup is a few vectorized
+passes over those arrays, so it stays well under a millisecond for
+thousands of runs and needs no external service.
+"""
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.research_store import tokenize
+
+_COLUMNS = (
+    "id", "topic", "tone", "constraints", "word_count",
+    "best_draft", "best_score", "research_notes", "created_at",
+)
+
+
+def run_terms(topic: str, constraints: str = "") -> Counter:
+    """Index terms of a run: the topic counts twice, then the constraints."""
+    return Counter(tokenize(topic) * 2 + tokenize(constraints or ""))
+
+
+class DraftArchive:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                tone TEXT NOT NULL,
+                constraints TEXT NOT NULL,
+                word_count INTEGER NOT NULL,
+                best_draft TEXT NOT NULL,
+                best_score REAL NOT NULL,
+                research_notes TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+        # index: row i <-> self._ids[i]; flat (doc, term, tf) entries
+        self._ids: List[str] = []
+        self._terms: Dict[str, int] = {}
+        self._entries: Dict[str, Counter] = {}
+        self._index: Optional[Dict[str, np.ndarray]] = None
+        for run_id, topic, constraints in self._conn.execute("SELECT id, topic, constraints FROM runs"):
+            self._entries[run_id] = run_terms(topic, constraints)
+
+    @staticmethod
+    def run_id(topic: str, tone: str, constraints: str, word_count: int) -> str:
+        """Runs with the same inputs share an entry (a better score replaces it)."""
+        key = "\0".join(
+            [" ".join(tokenize(topic)), tone.strip().lower(), constraints.strip().lower(), str(word_count)]
+        )
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def add(
+        self,
+        topic: str,
+        tone: str,
+        constraints: str,
+        word_count: int,
+        best_draft: str,
+        best_score: float,
+        research_notes: str = "",
+    ) -> str:
+        """Store a finished run; an existing entry for the same inputs is kept if it scored higher."""
+        run_id = self.run_id(topic, tone, constraints, word_count)
+        with self._lock:
+            changed = self._conn.execute(
+                "INSERT INTO runs (id, topic, tone, constraints, word_count, best_draft, best_score,"
+                " research_notes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET best_draft = excluded.best_draft,"
+                " best_score = excluded.best_score, research_notes = excluded.research_notes,"
+                " created_at = excluded.created_at WHERE excluded.best_score >= runs.best_score",
+                (run_id, topic, tone, constraints, word_count, best_draft, float(best_score),
+                 research_notes, time.time()),
+            ).rowcount
+            self._conn.commit()
+            if changed:
+                self._entries[run_id] = run_terms(topic, constraints)
+                self._index = None
+        return run_id
+
+    def _build_index(self) -> Dict[str, np.ndarray]:
+        self._ids = list(self._entries)
+        docs, terms, tfs = [], [], []
+        for row, counts in enumerate(self._entries.values()):
+            for term, tf in counts.items():
+                docs.append(row)
+                terms.append(self._terms.setdefault(term, len(self._terms)))
+                tfs.append(1.0 + math.log(tf))
+        docs_a = np.array(docs, dtype=np.int32)
+        terms_a = np.array(terms, dtype=np.int32)
+        n = len(self._ids)
+        df = np.bincount(terms_a, minlength=len(self._terms)).astype(np.float32)
+        idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+        weights = np.array(tfs, dtype=np.float32) * idf[terms_a]
+        norms = np.sqrt(np.bincount(docs_a, weights=weights * weights, minlength=n))
+        return {"docs": docs_a, "terms": terms_a, "weights": weights, "idf": idf, "norms": norms}
+
+    def similar(
+        self, topic: str, constraints: str = "", k: int = 1, min_similarity: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """The k most similar archived runs (best first), each with a 'similarity' in [0, 1]."""
+        query = run_terms(topic, constraints)
+        with self._lock:
+            if not self._entries:
+                return []
+            if self._index is None:
+                self._index = self._build_index()
+            index, ids = self._index, self._ids
+            known = {self._terms[t]: 1.0 + math.log(tf) for t, tf in query.items() if t in self._terms}
+            # query terms absent from the archive still count towards its norm
+            unknown = sum((1.0 + math.log(tf)) ** 2 for t, tf in query.items() if t not in self._terms)
+        if not known:
+            return []
+        q_ids = np.fromiter(known, dtype=np.int32, count=len(known))
+        q_weights = np.zeros(len(index["idf"]), dtype=np.float32)
+        q_weights[q_ids] = np.fromiter(known.values(), dtype=np.float32, count=len(known)) * index["idf"][q_ids]
+        q_norm = math.sqrt(float((q_weights ** 2).sum()) + unknown)
+        mask = q_weights[index["terms"]] > 0
+        scores = np.bincount(
+            index["docs"][mask],
+            weights=index["weights"][mask] * q_weights[index["terms"][mask]],
+            minlength=len(ids),
+        ) / np.maximum(index["norms"] * q_norm, 1e-9)
+        best = np.argsort(-scores)[:k]
+        hits = [(ids[i], float(scores[i])) for i in best if scores[i] > 0 and scores[i] >= min_similarity]
+        return [dict(self.get(run_id), similarity=round(sim, 4)) for run_id, sim in hits]
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"runs": len(self._entries), "terms": len(self._terms)}
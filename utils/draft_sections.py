@@ -0,0 +1,84 @@
+import re
+from typing import Iterable, List, Tuple
+
+_MD_HEADING_RE = re.compile(r"^#{1,6}\s+")
+
+
+def normalize_heading(heading: str) -> str:
+    """Heading text for matching: no '#' prefix, lower case, punctuation as spaces."""
+    return re.sub(r"[^a-z0-9]+", " ", _MD_HEADING_RE.sub("", heading).lower()).strip()
+
+
+def strip_heading(body: str, heading: str) -> str:
+    """Drop a leading line that repeats `heading` (models often echo it)."""
+    lines = body.strip("\n").splitlines()
+    if lines and lines[0].strip() and normalize_heading(lines[0]) == normalize_heading(heading):
+        lines = lines[1:]
+    return "\n".join(lines).strip("\n")
+
+
+def split_sections(draft: str) -> List[Tuple[str, str]]:
+    """
+    Split a markdown draft into (heading_line, body) pairs. Text before the
+    first heading is returned with an empty heading.
+    """
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    for line in draft.splitlines():
+        if _MD_HEADING_RE.match(line):
+            sections.append((line.strip(), []))
+        else:
+            sections[-1][1].append(line)
+    result = [(heading, "\n".join(body).strip("\n")) for heading, body in sections]
+    if not result[0][0] and not result[0][1].strip():
+        result = result[1:]
+    return result
+
+
+def join_sections(sections: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for heading, body in sections:
+        parts.append(f"{heading}\n{body}".strip("\n") if heading else body.strip("\n"))
+    return "\n\n".join(p for p in parts if p) + "\n"
+
+
+def apply_section_edits(draft: str, edits: Iterable[Tuple[str, str]]) -> str:
+    """
+    Replace the body of each section whose heading matches an edit (ignoring
+    '#' level, case and punctuation). Unmatched headings are appended as new
+    '##' sections; an empty heading targets the text before the first heading.
+    """
+    sections = split_sections(draft)
+    index = {normalize_heading(h): i for i, (h, _) in enumerate(sections)}
+
+    for heading, content in edits:
+        key = normalize_heading(heading)
+        content = content.strip("\n")
+        if key in index:
+            i = index[key]
+            sections[i] = (sections[i][0], content)
+        elif not key:
+            sections.insert(0, ("", content))
+            index = {normalize_heading(h): i for i, (h, _) in enumerate(sections)}
+        else:
+            line = heading.strip() if _MD_HEADING_RE.match(heading.strip()) else f"## {heading.strip()}"
+            sections.append((line, content))
+            index[key] = len(sections) - 1
+
+    return join_sections(sections)
+
+
+def rename_headings(draft: str, renames: Iterable[Tuple[str, str]]) -> str:
+    """
+    Change the text of each heading matching an (old, new) pair, keeping its
+    '#' level. Unmatched headings are ignored.
+    """
+    sections = split_sections(draft)
+    index = {normalize_heading(h): i for i, (h, _) in enumerate(sections) if h}
+    for old, new in renames:
+        i = index.get(normalize_heading(old))
+        new = _MD_HEADING_RE.sub("", new.strip()).strip()
+        if i is None or not new:
+            continue
+        level = _MD_HEADING_RE.match(sections[i][0]).group(0).strip()
+        sections[i] = (f"{level} {new}", sections[i][1])
+    return join_sections(sections)
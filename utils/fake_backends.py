@@ -0,0 +1,365 @@
+"""
+Offline stand-ins for the chat model and the web search tool.
+
+Both are deterministic (seeded by the prompt / query), sleep for a configurable
+latency instead of calling the network, and report token usage, so the full
+pipeline, its tracing and its benchmarks run with no API keys or network.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import typing
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+
+from utils.research import estimate_tokens
+
+_WORDS = (
+    "pipeline latency model research draft reader example practice pattern "
+    "strategy data insight workflow quality signal context benchmark trade-off "
+    "approach detail result evidence guide team metric structure"
+).split()
+
+# Structured output schemas seen by with_structured_output, by class name
+_SCHEMAS: Dict[str, typing.Type[BaseModel]] = {}
+
+# Injected faults are drawn per call from one seeded stream shared by every fake
+# model (not per prompt), so a retried call can succeed
+_FAULT_RNGS: Dict[int, random.Random] = {}
+
+
+def _fault_rng(seed: int) -> random.Random:
+    return _FAULT_RNGS.setdefault(seed, random.Random(seed))
+
+
+def _rng(seed: int, text: str) -> random.Random:
+    digest = hashlib.sha256(f"{seed}:{text}".encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    body = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return body[0].upper() + body[1:] + "."
+
+
+def _field(pattern: str, text: str, default: str = "") -> str:
+    match = re.search(pattern, text)
+    return match.group(1).strip() if match else default
+
+
+def _default_for(annotation: Any) -> Any:
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _default_for(args[0]) if args else None
+    if annotation is bool:
+        return True
+    if annotation is int:
+        return 7
+    if annotation is float:
+        return 0.7
+    if annotation is str:
+        return "ok"
+    if origin is list or annotation is list:
+        return []
+    return None
+
+
+class FakeAPIError(Exception):
+    """Shaped like provider SDK errors: `.status_code` and an httpx `.response` with headers."""
+
+    def __init__(self, status_code: int, retry_after_s: float = 0.0):
+        import httpx
+
+        headers = {"retry-after": f"{retry_after_s:g}"} if retry_after_s else {}
+        self.status_code = status_code
+        self.response = httpx.Response(status_code, headers=headers)
+        super().__init__(f"Error code: {status_code} (injected by the fake backend)")
+
+
+class FakeTimeout(TimeoutError):
+    """The HTTP client's read timeout: the call took longer than the model's `timeout`."""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model.
+
+    - Plain calls return a markdown blog (headings + paragraphs) near the
+      prompt's "Target word count", or a JSON array of queries when the prompt
+      asks for one; Llama Guard models answer "safe". `responses`, if
+      given, replace that text (one picked deterministically per prompt).
+    - Structured calls fill the schema: CriticScore follows `critic_scores`
+      indexed by the prompt's "Iteration:" (AspectScore too, with a per-aspect
+      bias and noise), GuardrailsOutput echoes the topic and constraints,
+      BlogOutline plans sections from the target word count (section prompts
+      get paragraphs only), other schemas get type defaults.
+    - Each call sleeps `latency_s` plus output tokens / `tokens_per_s`.
+    - Fault injection: `error_rate` of calls raise FakeAPIError(`error_status`,
+      retry-after `retry_after_s`) and `slow_rate` take `slow_latency_s` extra.
+    - A call (or a stream's first chunk) slower than `timeout` gives up after
+      `timeout` seconds with FakeTimeout, as the HTTP client would.
+    """
+
+    model_name: str = "fake-chat"
+    temperature: float = 0.0
+    seed: int = 0
+    latency_s: float = 0.0
+    tokens_per_s: float = 0.0
+    responses: List[str] = []
+    critic_scores: List[float] = [0.62, 0.71, 0.78, 0.84]
+    error_rate: float = 0.0
+    error_status: int = 429
+    retry_after_s: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency_s: float = 1.0
+    timeout: Optional[float] = None
+
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "temperature": self.temperature, "seed": self.seed}
+
+    def _get_ls_params(self, stop=None, **kwargs: Any):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_model_name"] = self.model_name
+        return params
+
+    # --- content ----------------------------------------------------------------
+
+    def _text_for(self, prompt: str, schema_name: Optional[str]) -> str:
+        if schema_name:
+            return json.dumps(self._structured_values(prompt, schema_name))
+        if self.responses:
+            index = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16) % len(self.responses)
+            return self.responses[index]
+
+        if self.model_name.startswith("llama-guard"):
+            return "safe"
+
+        rng = _rng(self.seed, prompt)
+        topic = _field(r"[Tt]opic: ?(.*)", prompt, "the topic")
+        if "JSON array" in prompt:
+            return json.dumps([f"{topic} {rng.choice(_WORDS)} {i}" for i in range(6)])
+
+        if "Section to write:" in prompt:
+            # one section body of a long-form post: paragraphs, no headings
+            words = int(_field(r"Section word count: ?(\d+)", prompt, "200"))
+            sentences = [_sentence(rng) for _ in range(max(1, words // 12))]
+            return "\n\n".join(" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)) + "\n"
+
+        target_words = int(_field(r"[Tt]arget word count: ?(\d+)", prompt, "300"))
+        sections = ["Introduction", "Background", "Key Ideas", "In Practice", "Conclusion"]
+        per_section = max(20, target_words // len(sections))
+        parts = [f"# {topic.title()}"]
+        for heading in sections:
+            sentences = [_sentence(rng) for _ in range(max(1, per_section // 12))]
+            parts.append(f"## {heading}\n" + " ".join(sentences))
+        return "\n\n".join(parts) + "\n"
+
+    def _structured_values(self, prompt: str, schema_name: str) -> Dict[str, Any]:
+        schema = _SCHEMAS[schema_name]
+        values = {name: _default_for(field.annotation) for name, field in schema.model_fields.items()}
+
+        if schema_name == "CriticScore":
+            iteration = int(_field(r"Iteration: ?(\d+)", prompt, "1") or 1)
+            score = self.critic_scores[min(max(iteration, 1), len(self.critic_scores)) - 1]
+            points = max(1, min(10, round(score * 10)))
+            values.update(
+                overall_score=score,
+                grammar_score=points,
+                depth_score=points,
+                structure_score=points,
+                seo_alignment_score=points,
+                short_feedback=f"Iteration {iteration}: add concrete examples and tighten the conclusion.",
+            )
+        elif schema_name == "AspectScore":
+            # a small model's per-aspect bias (lenient on grammar, harsh on SEO) plus noise
+            iteration = int(_field(r"Iteration: ?(\d+)", prompt, "1") or 1)
+            aspect = _field(r"Aspect: ?(\w+)", prompt, "overall")
+            score = self.critic_scores[min(max(iteration, 1), len(self.critic_scores)) - 1]
+            bias = {"grammar": 2, "seo_alignment": -2}.get(aspect, 0)
+            noise = _rng(self.seed, prompt).choice((-1, 0, 0, 1))
+            values.update(
+                score=max(1, min(10, round(score * 10) + bias + noise)),
+                feedback=f"Iteration {iteration}: {aspect.replace('_', ' ')} needs concrete examples.",
+            )
+        elif schema_name == "GuardrailsOutput":
+            values.update(
+                valid=True,
+                topic=_field(r"Topic: ?(.*)", prompt, "topic"),
+                constraints=_field(r"Constraints: ?(.*)", prompt, ""),
+                issues=[],
+                corrective_action="",
+            )
+        elif schema_name == "BlogOutline":
+            topic = _field(r"Topic: ?(.*)", prompt, "the topic")
+            target_words = int(_field(r"[Tt]arget word count: ?(\d+)", prompt, "2000"))
+            middle = ["Background", "Key Ideas", "How It Works", "In Practice", "Pitfalls", "Case Study"]
+            headings = ["Introduction"] + middle[: max(2, min(len(middle), target_words // 400 - 2))] + ["Conclusion"]
+            values.update(
+                title=topic.title(),
+                sections=[
+                    {"heading": h, "key_points": [f"{topic} {h.lower()}"], "words": target_words // len(headings)}
+                    for h in headings
+                ],
+            )
+        elif schema_name == "SeoFixes":
+            rng = _rng(self.seed, prompt)
+            topic = _field(r"Topic: ?(.*)", prompt, "the topic")
+            keyword = _field(r"Primary keyword: ?(.*)", prompt, topic)
+            meta = f"A practical guide to {keyword}: " + _sentence(rng, 14)
+            values.update(
+                title=f"{topic.title()}: A Practical Guide",
+                heading_changes=[],
+                edits=[{
+                    "heading": "Introduction",
+                    "content": f"This guide covers {keyword} in depth. "
+                               + " ".join(_sentence(rng) for _ in range(4)),
+                }],
+                meta_description=meta[:155],
+                secondary_keywords=[f"{keyword} {w}" for w in rng.sample(_WORDS, 4)],
+            )
+        elif "bridges" in values:
+            rng = _rng(self.seed, prompt)
+            values["bridges"] = [
+                _sentence(rng, 10) for _ in re.findall(r"^Boundary \d+:", prompt, re.MULTILINE)
+            ]
+        elif "edits" in values:
+            rng = _rng(self.seed, prompt)
+            values["edits"] = [
+                {"heading": "Introduction", "content": " ".join(_sentence(rng) for _ in range(3))}
+            ]
+        return values
+
+    def _message_for(self, messages: List[BaseMessage], schema_name: Optional[str]) -> AIMessage:
+        prompt = "\n".join(str(m.content) for m in messages)
+        text = self._text_for(prompt, schema_name)
+        return AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": estimate_tokens(prompt),
+                "output_tokens": estimate_tokens(text),
+                "total_tokens": estimate_tokens(prompt) + estimate_tokens(text),
+            },
+        )
+
+    def _fault(self) -> float:
+        """Raise an injected error, or return extra latency for this call."""
+        faults = _fault_rng(self.seed)
+        if self.error_rate and faults.random() < self.error_rate:
+            raise FakeAPIError(self.error_status, self.retry_after_s)
+        if self.slow_rate and faults.random() < self.slow_rate:
+            return self.slow_latency_s
+        return 0.0
+
+    def _delay(self, text: str) -> float:
+        rate = estimate_tokens(text) / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+        return self.latency_s + rate + self._fault()
+
+    def _timeout(self) -> FakeTimeout:
+        return FakeTimeout(f"Request timed out after {self.timeout:g}s (injected by the fake backend)")
+
+    def _wait(self, delay: float) -> None:
+        if self.timeout and delay > self.timeout:
+            time.sleep(self.timeout)
+            raise self._timeout()
+        time.sleep(delay)
+
+    async def _await(self, delay: float) -> None:
+        if self.timeout and delay > self.timeout:
+            await asyncio.sleep(self.timeout)
+            raise self._timeout()
+        await asyncio.sleep(delay)
+
+    # --- BaseChatModel hooks ----------------------------------------------------
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self._message_for(messages, kwargs.get("fake_schema"))
+        self._wait(self._delay(message.content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self._message_for(messages, kwargs.get("fake_schema"))
+        await self._await(self._delay(message.content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        message = self._message_for(messages, kwargs.get("fake_schema"))
+        self._wait(self.latency_s + self._fault())
+        per_token = 1 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+        for piece in self._chunks(message.content):
+            time.sleep(per_token * estimate_tokens(piece))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata))
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._message_for(messages, kwargs.get("fake_schema"))
+        await self._await(self.latency_s + self._fault())
+        per_token = 1 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+        for piece in self._chunks(message.content):
+            await asyncio.sleep(per_token * estimate_tokens(piece))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata))
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        """Bind the schema name (so it is part of cache keys) and parse the JSON reply."""
+        _SCHEMAS[schema.__name__] = schema
+        return self.bind(fake_schema=schema.__name__) | RunnableLambda(
+            lambda message: schema(**json.loads(message.content))
+        )
+
+
+class FakeSearchTool(BaseTool):
+    """
+    Tavily stand-in: invoke/ainvoke({"query": ...}) returns `max_results`
+    deterministic results (url, content, score) after `latency_s`.
+    """
+
+    name: str = "fake_search"
+    description: str = "Offline web search returning deterministic results."
+    max_results: int = 5
+    latency_s: float = 0.0
+    seed: int = 0
+
+    def _results(self, query: str) -> List[Dict[str, Any]]:
+        rng = _rng(self.seed, query)
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")[:40]
+        return [
+            {
+                "url": f"https://example.com/{slug}/{i}",
+                "content": f"{query}: " + " ".join(_sentence(rng) for _ in range(4)),
+                "score": round(1.0 - i / (self.max_results + 1), 3),
+            }
+            for i in range(self.max_results)
+        ]
+
+    def _run(self, query: str, run_manager=None) -> List[Dict[str, Any]]:
+        time.sleep(self.latency_s)
+        return self._results(query)
+
+    async def _arun(self, query: str, run_manager=None) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.latency_s)
+        return self._results(query)
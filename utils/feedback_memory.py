@@ -0,0 +1,37 @@
+"""
+Bounded, deduplicated memory of critic feedback across iterations.
+
+Each new complaint is compared with the remembered ones by word overlap
+(Jaccard over content words). Near-identical complaints form one cluster,
+kept as its most recent wording at the end of the list, so the generator's
+"recent mistakes" window is not filled with rephrasings of the same point.
+"""
+from typing import FrozenSet, List, Sequence
+
+from utils.research_store import tokenize
+
+
+def _terms(text: str) -> FrozenSet[str]:
+    # digits vary between otherwise identical complaints ("Iteration 2: ...")
+    return frozenset(t for t in tokenize(text) if not t.isdigit())
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = _terms(a), _terms(b)
+    if not ta or not tb:
+        return float(a.strip() == b.strip())
+    return len(ta & tb) / len(ta | tb)
+
+
+def merge_feedback(
+    memory: Sequence[str], new: Sequence[str], limit: int, threshold: float
+) -> List[str]:
+    """memory + new, collapsing near-duplicates and keeping the last `limit` clusters."""
+    merged = list(memory)
+    for item in new:
+        item = (item or "").strip()
+        if not item:
+            continue
+        merged = [m for m in merged if similarity(m, item) < threshold]
+        merged.append(item)
+    return merged[-limit:]
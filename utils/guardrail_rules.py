@@ -0,0 +1,164 @@
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Iterable, List, Literal, Tuple
+
+Decision = Literal["allow", "block", "escalate"]
+
+# Always rejected without asking a model (matched as whole words / phrases)
+BANNED_TERMS = (
+    "child pornography",
+    "child sexual abuse",
+    "csam",
+    "make a bomb",
+    "build a bomb",
+    "pipe bomb",
+    "nerve agent",
+    "ransomware builder",
+    "credit card dump",
+    "carding tutorial",
+    "buy stolen",
+    "ethnic cleansing",
+)
+
+# Topics that are often fine but need a model to judge intent
+SENSITIVE_TERMS = (
+    # health / finance / legal advice
+    "diagnosis", "dosage", "overdose", "prescription", "cure", "suicide", "self-harm", "self harm",
+    "invest", "investment", "stock tips", "crypto", "loan", "tax evasion", "lawsuit", "legal advice",
+    # violence / weapons / drugs / crime
+    "weapon", "firearm", "gun", "explosive", "kill", "attack", "drug", "cocaine", "heroin", "meth",
+    "hack", "hacking", "exploit", "malware", "phishing", "steal", "fraud", "counterfeit",
+    # hate / extremism / adult
+    "extremist", "terrorist", "terrorism", "racist", "nazi", "slur", "porn", "sexual", "nsfw",
+)
+
+# Attempts to steer the downstream agents rather than describe a blog
+INJECTION_PATTERNS = (
+    r"ignore (all |the )?(previous|prior|above) (instructions|prompts?)",
+    r"disregard (all |the )?(previous|prior|above)",
+    r"system prompt",
+    r"you are now",
+    r"jailbreak",
+)
+
+_EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+_PHONE_RE = re.compile(r"(?<![\w+])(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{3}\)|\d{3})[\s.-]\d{3}[\s.-]\d{4}(?!\w)")
+_SSN_RE = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+_CARD_RE = re.compile(r"\b(?:\d[ -]?){12,18}\d\b")
+_IPV4_RE = re.compile(r"\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b")
+_INJECTION_RE = re.compile("|".join(INJECTION_PATTERNS))
+
+# Escalation reason for injection phrases: only a model that can rewrite the
+# inputs (not a safe/unsafe classifier) can take the instructions back out
+INJECTION_REASON = "possible prompt injection"
+
+
+@dataclass
+class RuleVerdict:
+    """Outcome of the local rule tier. 'escalate' means a model has to decide."""
+    decision: Decision
+    topic: str
+    constraints: str
+    issues: List[str] = field(default_factory=list)
+    action: str = ""
+    reasons: List[str] = field(default_factory=list)  # why it was escalated
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip().lower()
+
+
+def input_key(topic: str, constraints: str) -> str:
+    """Hash of the normalized inputs; equal up to case/whitespace -> same key."""
+    raw = normalize_text(topic) + "\x00" + normalize_text(constraints)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _luhn_ok(digits: str) -> bool:
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        n = int(ch)
+        if i % 2:
+            n = n * 2 - 9 if n > 4 else n * 2
+        total += n
+    return total % 10 == 0
+
+
+def redact_pii(text: str) -> Tuple[str, List[str]]:
+    """Replace emails, phone numbers, SSNs, card numbers and IPs; return (text, kinds found)."""
+    found: List[str] = []
+
+    def sub(pattern: re.Pattern, label: str, text: str, check=None) -> str:
+        def repl(match: re.Match) -> str:
+            if check and not check(match.group(0)):
+                return match.group(0)
+            if label not in found:
+                found.append(label)
+            return f"[{label}]"
+        return pattern.sub(repl, text)
+
+    text = sub(_EMAIL_RE, "email", text)
+    text = sub(_SSN_RE, "ssn", text)
+    text = sub(_CARD_RE, "card number", text, check=lambda s: _luhn_ok(re.sub(r"\D", "", s)))
+    text = sub(_PHONE_RE, "phone", text)
+    text = sub(_IPV4_RE, "ip address", text)
+    return text, found
+
+
+def _matches(text: str, terms: Iterable[str]) -> List[str]:
+    return [t for t in terms if re.search(rf"(?<!\w){re.escape(t)}(?!\w)", text)]
+
+
+def check_inputs(
+    topic: str,
+    constraints: str,
+    banned_terms: Iterable[str] = BANNED_TERMS,
+    sensitive_terms: Iterable[str] = SENSITIVE_TERMS,
+    max_topic_chars: int = 200,
+    max_constraints_chars: int = 1000,
+) -> RuleVerdict:
+    """
+    Cheap deterministic checks, in order: length limits and banned terms
+    (block), PII (redacted in place), then sensitive terms, injection phrases
+    or mostly non-letter input (escalate). Anything left is allowed.
+    """
+    topic = (topic or "").strip()
+    constraints = (constraints or "").strip()
+
+    if len(re.sub(r"\W", "", topic)) < 3:
+        return RuleVerdict("block", topic, constraints, ["Topic is empty or too short."],
+                           "Please describe the blog topic in a few words.")
+    if len(topic) > max_topic_chars:
+        return RuleVerdict("block", topic, constraints, [f"Topic is longer than {max_topic_chars} characters."],
+                           "Please shorten the topic and move details into the constraints.")
+    if len(constraints) > max_constraints_chars:
+        return RuleVerdict("block", topic, constraints,
+                           [f"Constraints are longer than {max_constraints_chars} characters."],
+                           "Please shorten the constraints.")
+
+    text = normalize_text(f"{topic} {constraints}")
+    banned = _matches(text, banned_terms)
+    if banned:
+        return RuleVerdict("block", topic, constraints, [f"Disallowed content: {', '.join(banned)}."],
+                           "Please choose a different topic.")
+
+    topic, topic_pii = redact_pii(topic)
+    constraints, constraints_pii = redact_pii(constraints)
+    pii = list(dict.fromkeys(topic_pii + constraints_pii))
+    issues = [f"Removed personal data ({', '.join(pii)})."] if pii else []
+
+    reasons = []
+    sensitive = _matches(text, sensitive_terms)
+    if sensitive:
+        reasons.append(f"sensitive terms: {', '.join(sensitive[:5])}")
+    if _INJECTION_RE.search(text):
+        reasons.append(INJECTION_REASON)
+    remaining = re.sub(r"\[[a-z ]+\]|\s", "", normalize_text(f"{topic} {constraints}"))
+    if sum(ch.isalpha() for ch in remaining) < 0.5 * len(remaining):
+        reasons.append("mostly non-letter input")
+
+    if reasons:
+        return RuleVerdict("escalate", topic, constraints, issues, reasons=reasons)
+    return RuleVerdict("allow", topic, constraints, issues)
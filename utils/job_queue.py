@@ -0,0 +1,143 @@
+"""
+Persistent job queue for the HTTP service (server.py), in SQLite.
+
+A job moves queued -> running -> done | failed. Claiming is a single
+UPDATE ... RETURNING (SQLite 3.35+), so any number of workers can drain the
+queue. A job is only handed out while
+its client has fewer than `max_running_per_client` jobs running. Jobs left
+'running' by a crashed process are re-queued on startup; the worker then
+resumes them from their graph checkpoint (thread_id = job id).
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_COLUMNS = (
+    "id", "client_id", "status", "request", "result", "error",
+    "attempts", "created_at", "started_at", "finished_at",
+)
+
+
+class JobQueue:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                client_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+            CREATE INDEX IF NOT EXISTS jobs_by_client ON jobs (client_id, status);
+            """
+        )
+        self._conn.commit()
+
+    def _row(self, row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, client_id: str, request: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex[:16]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, client_id, status, request, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, client_id, QUEUED, json.dumps(request, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim(self, max_running_per_client: int = 0) -> Optional[Dict[str, Any]]:
+        """Mark the oldest eligible queued job running and return it (None if there is none)."""
+        limit = (
+            "AND client_id NOT IN (SELECT client_id FROM jobs WHERE status = 'running'"
+            " GROUP BY client_id HAVING COUNT(*) >= :limit)"
+            if max_running_per_client > 0 else ""
+        )
+        with self._lock:
+            row = self._conn.execute(
+                f"UPDATE jobs SET status = 'running', started_at = :now, attempts = attempts + 1"
+                f" WHERE id = (SELECT id FROM jobs WHERE status = 'queued' {limit}"
+                f" ORDER BY created_at LIMIT 1)"
+                f" RETURNING {', '.join(_COLUMNS)}",
+                {"now": time.time(), "limit": max_running_per_client},
+            ).fetchone()
+            self._conn.commit()
+        return self._row(row)
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def requeue_running(self) -> int:
+        """Return jobs interrupted by a restart to the queue; returns how many."""
+        with self._lock:
+            count = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            ).rowcount
+            self._conn.commit()
+        return count
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def counts(self, client_id: Optional[str] = None) -> Dict[str, int]:
+        """Jobs per status, for one client or overall."""
+        query = "SELECT status, COUNT(*) FROM jobs"
+        args: List[Any] = []
+        if client_id is not None:
+            query += " WHERE client_id = ?"
+            args.append(client_id)
+        with self._lock:
+            rows = self._conn.execute(query + " GROUP BY status", args).fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def purge(self, older_than_s: float) -> int:
+        """Delete finished jobs older than `older_than_s` seconds."""
+        with self._lock:
+            count = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - older_than_s,),
+            ).rowcount
+            self._conn.commit()
+        return count
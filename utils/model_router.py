@@ -0,0 +1,136 @@
+"""
+Per-agent model cascades with escalation on stalled scores.
+
+A routing file (JSON, see config/models.json) maps each agent to a cascade of
+models, cheapest first:
+
+    {
+      "roles": {
+        "default":   ["llama-3.1-8b-instant"],
+        "generator": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+        "llama_guard": ["llama-guard-3-1b"]
+      },
+      "escalation": {"window": 1, "min_gain": 0.02},
+      "pricing": {"llama-3.3-70b-versatile": {"input": 0.59, "output": 0.79}}
+    }
+
+Every run starts on tier 0, the first model of each cascade. When the best
+critic score has gained less than `min_gain` over the last `window` rounds
+while still below the confidence threshold, the orchestrator moves the run
+one tier up; agents with a longer cascade then use their next model, the
+others keep their last one. Each hop is recorded in state['model_hops'], and
+tier_summary() splits the run's latency and cost by tier.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.tracing import ONE_OFF_NODES
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        roles: Dict[str, List[str]],
+        window: int = 1,
+        min_gain: float = 0.02,
+        pricing: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        roles = {role: list(models) for role, models in roles.items() if models}
+        if "default" not in roles:
+            raise ValueError("Model routing needs a 'default' cascade")
+        self.roles = roles
+        self.window = max(1, window)
+        self.min_gain = min_gain
+        self.pricing = dict(pricing or {})
+
+    @classmethod
+    def from_file(cls, path: str, defaults: Dict[str, List[str]]) -> "ModelRouter":
+        """Routing file merged over `defaults` (roles it does not name keep their default)."""
+        config = json.loads(Path(path).read_text(encoding="utf-8"))
+        escalation = config.get("escalation", {})
+        return cls(
+            {**defaults, **config.get("roles", {})},
+            window=int(escalation.get("window", 1)),
+            min_gain=float(escalation.get("min_gain", 0.02)),
+            pricing=config.get("pricing"),
+        )
+
+    def cascade(self, role: Optional[str]) -> List[str]:
+        return self.roles.get(role or "default") or self.roles["default"]
+
+    def model_for(self, role: Optional[str], tier: int = 0) -> str:
+        """Model of `role` at `tier`; past the end of its cascade, its last model."""
+        cascade = self.cascade(role)
+        return cascade[min(max(tier, 0), len(cascade) - 1)]
+
+    @property
+    def max_tier(self) -> int:
+        return max(len(cascade) for cascade in self.roles.values()) - 1
+
+    def escalation(self, state: Dict[str, Any], threshold: float) -> Optional[Dict[str, Any]]:
+        """
+        The next hop if the run's scores stalled below `threshold` on its
+        current tier, else None. `state` is seen as the orchestrator leaves it
+        (iteration already advanced).
+        """
+        tier = state.get("model_tier", 0)
+        scores = state.get("confidence_scores") or []
+        if tier >= self.max_tier or state.get("best_score", 0.0) >= threshold or len(scores) <= self.window:
+            return None
+        hops = state.get("model_hops") or []
+        iteration = state.get("iteration", 0)
+        if hops and iteration - hops[-1]["iteration"] < self.window:
+            # give the new tier `window` rounds before judging it
+            return None
+        gain = max(scores[-self.window:]) - max(scores[: -self.window])
+        if gain >= self.min_gain:
+            return None
+        return {
+            "iteration": iteration,
+            "from_tier": tier,
+            "to_tier": tier + 1,
+            "models": {
+                role: self.model_for(role, tier + 1)
+                for role in self.roles
+                if self.model_for(role, tier + 1) != self.model_for(role, tier)
+            },
+            "best_score": state.get("best_score", 0.0),
+            "reason": (
+                f"Stalled: best score gained {max(0.0, gain) * 100:.1f} pts over the last "
+                f"{self.window} iteration(s) (min {self.min_gain * 100:.1f} pts) "
+                f"below {threshold * 100:.0f}%"
+            ),
+        }
+
+
+def tier_summary(
+    trace: Iterable[Dict[str, Any]], hops: List[Dict[str, Any]], best_score: float = 0.0
+) -> List[Dict[str, Any]]:
+    """
+    Rounds, wall time, LLM calls and cost per tier of a run, and the best score
+    each tier ended with. One-off nodes (guardrails, research, SEO, ...) are
+    left out: they do not escalate.
+    """
+    # tier t covers the rounds from its hop's iteration up to the next hop
+    starts = [0] + [hop["iteration"] for hop in hops]
+    ends = [hop["best_score"] for hop in hops] + [best_score]
+    tiers = [
+        {"tier": t, "rounds": 0, "wall_ms": 0.0, "llm_calls": 0, "cost_usd": 0.0, "models": {}, "best_score": ends[t]}
+        for t in range(len(starts))
+    ]
+    rounds: List[set] = [set() for _ in starts]
+    for span in trace:
+        if span["node"] in ONE_OFF_NODES or span["node"] == "orchestrator" or span["iteration"] <= 0:
+            continue
+        t = max(i for i, start in enumerate(starts) if span["iteration"] >= start)
+        rounds[t].add(span["iteration"])
+        tiers[t]["wall_ms"] += span["wall_ms"]
+        tiers[t]["llm_calls"] += span["llm_calls"]
+        tiers[t]["cost_usd"] += span["cost_usd"]
+        for call in span.get("calls", []):
+            if call["kind"] == "llm" and call.get("model"):
+                tiers[t]["models"][call["model"]] = tiers[t]["models"].get(call["model"], 0) + 1
+    for t, iterations in enumerate(rounds):
+        tiers[t]["rounds"] = len(iterations)
+    return tiers
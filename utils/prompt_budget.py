@@ -0,0 +1,73 @@
+import re
+from typing import Dict, List
+
+from utils.research import estimate_tokens
+from utils.research_store import tokenize
+
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s+\S|[A-Z][^a-z\n]{3,}:?\s*$)")
+
+
+def count_section_tokens(sections: Dict[str, str]) -> Dict[str, int]:
+    """Estimated tokens per named prompt section, plus a 'total'."""
+    counts = {name: estimate_tokens(text or "") for name, text in sections.items()}
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Hard cut at a line (or word) boundary, marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[: max(0, max_tokens * 4)]
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + " …"
+
+
+def is_heading(line: str) -> bool:
+    """Markdown heading, or a short all-caps label line ("KEY FACTS:")."""
+    return bool(_HEADING_RE.match(line))
+
+
+def split_blocks(text: str) -> List[List[str]]:
+    """Group lines into blocks, each starting at a heading."""
+    blocks: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if is_heading(line) and blocks[-1]:
+            blocks.append([])
+        blocks[-1].append(line)
+    return [b for b in blocks if b]
+
+
+def compress_text(text: str, max_tokens: int) -> str:
+    """
+    Fit structured notes into `max_tokens` while keeping every section.
+
+    Blank lines and repeated whitespace go first. If that is not enough, each
+    heading-led block keeps its heading and a share of the budget proportional
+    to its size, filled with its leading lines (notes put key facts first).
+    """
+    text = "\n".join(re.sub(r"[ \t]+", " ", line).rstrip() for line in text.splitlines() if line.strip())
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    blocks = split_blocks(text)
+    kept: List[str] = []
+    for block in blocks:
+        heading, body = block[0], block[1:]
+        block_tokens = estimate_tokens("\n".join(block))
+        budget = max(0, int(max_tokens * block_tokens / total) - estimate_tokens(heading))
+        kept.append(heading)
+        for line in body:
+            cost = estimate_tokens(line)
+            if cost <= budget:
+                kept.append(line)
+                budget -= cost
+            else:
+                if budget >= 12:
+                    kept.append(truncate_text(line, budget))
+                break
+    return "\n".join(kept)
+
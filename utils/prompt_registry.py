@@ -0,0 +1,138 @@
+"""
+Registry of precompiled chat prompts.
+
+Every file in prompts/ is read and compiled once. Agents register their
+prompt at import: a system prompt file plus the human template, with the
+placeholders it must declare. Placeholders are checked then, so a typo fails
+at startup rather than mid-run. Nodes then fetch the compiled
+ChatPromptTemplate with a dictionary lookup.
+
+Each prompt is versioned by a hash of its content (system file + human
+template). The version changes exactly when the text sent to the model
+does, so it can key caches and label traces. With a reload interval, files
+are re-checked (stat only) at most that often and changed prompts are
+recompiled in place. A prompt that fails validation after an edit keeps
+its previous version; the error is reported in stats().
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+
+from utils.prompt_loader import PROMPT_DIR
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    name: str
+    template: ChatPromptTemplate
+    version: str
+
+    def format_messages(self, **values):
+        return self.template.format_messages(**values)
+
+
+@dataclass(frozen=True)
+class _Spec:
+    system: str
+    human: str
+    variables: frozenset
+
+
+def _placeholders(text: str) -> frozenset:
+    """Variables of an f-string template (raises ValueError on unbalanced braces)."""
+    return frozenset(PromptTemplate.from_template(text).input_variables)
+
+
+class PromptRegistry:
+    def __init__(self, prompt_dir: Path = PROMPT_DIR, reload_interval_s: float = 0.0):
+        self.prompt_dir = Path(prompt_dir)
+        self.reload_interval_s = reload_interval_s
+        self._lock = threading.RLock()
+        self._files: Dict[str, Tuple[str, Tuple[int, int]]] = {}  # name -> (text, (mtime_ns, size))
+        self._specs: Dict[str, _Spec] = {}
+        self._compiled: Dict[str, CompiledPrompt] = {}
+        self._errors: Dict[str, str] = {}
+        self._next_check = time.monotonic() + reload_interval_s
+        for path in sorted(self.prompt_dir.glob("*.txt")):
+            self._files[path.stem] = self._read(path)
+            # system prompts are sent verbatim: literal braces must be doubled
+            unexpected = _placeholders(self._files[path.stem][0])
+            if unexpected:
+                raise ValueError(
+                    f"Prompt file {path.name} has placeholders {sorted(unexpected)}; "
+                    "double literal braces ({{ }})"
+                )
+
+    @staticmethod
+    def _read(path: Path) -> Tuple[str, Tuple[int, int]]:
+        stat = path.stat()
+        return path.read_text(encoding="utf-8"), (stat.st_mtime_ns, stat.st_size)
+
+    def _compile(self, name: str, spec: _Spec) -> CompiledPrompt:
+        if spec.system not in self._files:
+            raise FileNotFoundError(f"Prompt file not found: {self.prompt_dir / (spec.system + '.txt')}")
+        system = self._files[spec.system][0]
+        if _placeholders(system):
+            raise ValueError(f"Prompt file {spec.system}.txt has placeholders; double literal braces")
+        found = _placeholders(spec.human)
+        if found != spec.variables:
+            raise ValueError(
+                f"Prompt '{name}': missing placeholders {sorted(spec.variables - found)}, "
+                f"undeclared {sorted(found - spec.variables)}"
+            )
+        version = hashlib.sha1(f"{system}\0{spec.human}".encode("utf-8")).hexdigest()[:12]
+        template = ChatPromptTemplate.from_messages([("system", system), ("human", spec.human)])
+        return CompiledPrompt(name=name, template=template, version=version)
+
+    def register(self, name: str, system: str, human: str, variables: Iterable[str]) -> CompiledPrompt:
+        """Compile and validate a prompt: system file name (no .txt) + human template."""
+        spec = _Spec(system=system, human=human, variables=frozenset(variables))
+        with self._lock:
+            compiled = self._compile(name, spec)
+            self._specs[name] = spec
+            self._compiled[name] = compiled
+            return compiled
+
+    def get(self, name: str) -> CompiledPrompt:
+        if self.reload_interval_s and time.monotonic() >= self._next_check:
+            self.reload()
+        return self._compiled[name]
+
+    def system_text(self, name: str) -> str:
+        """Raw text of a prompt file (no .txt), as last loaded."""
+        return self._files[name][0]
+
+    def reload(self) -> List[str]:
+        """Re-read changed prompt files and recompile their prompts; returns the names recompiled."""
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_interval_s
+            changed = set()
+            for path in self.prompt_dir.glob("*.txt"):
+                known = self._files.get(path.stem)
+                stat = path.stat()
+                if known is None or known[1] != (stat.st_mtime_ns, stat.st_size):
+                    self._files[path.stem] = self._read(path)
+                    changed.add(path.stem)
+            recompiled = []
+            for name, spec in self._specs.items():
+                if spec.system not in changed:
+                    continue
+                try:
+                    self._compiled[name] = self._compile(name, spec)
+                    self._errors.pop(name, None)
+                    recompiled.append(name)
+                except (ValueError, FileNotFoundError) as e:
+                    self._errors[name] = str(e)
+            return recompiled
+
+    def versions(self) -> Dict[str, str]:
+        return {name: c.version for name, c in self._compiled.items()}
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"prompts": self.versions(), "errors": dict(self._errors)}
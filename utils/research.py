@@ -0,0 +1,74 @@
+import hashlib
+import math
+import re
+from typing import Any, Dict, List, Sequence
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return math.ceil(len(text) / 4)
+
+
+def _content_hash(content: str) -> str:
+    normalized = re.sub(r"\s+", " ", content).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def merge_results(results_per_query: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Flatten per-query search results (in planner priority order), dropping
+    duplicates by URL and by normalized content hash. Each kept result records
+    how many queries returned it ('hits') and the best query rank it came from.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    by_content: Dict[str, str] = {}
+
+    for query_rank, results in enumerate(results_per_query):
+        if not isinstance(results, list):
+            # Tavily returns an error string instead of a list on failure
+            continue
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            content = str(result.get("content", "")).strip()
+            if not content:
+                continue
+            url = str(result.get("url", "")).strip()
+            digest = _content_hash(content)
+            key = url if url in merged else by_content.get(digest)
+
+            if key is not None:
+                kept = merged[key]
+                kept["hits"] += 1
+                kept["score"] = max(kept["score"], float(result.get("score", 0.0) or 0.0))
+                continue
+
+            key = url or digest
+            merged[key] = {
+                "url": url,
+                "content": content,
+                "score": float(result.get("score", 0.0) or 0.0),
+                "query_rank": query_rank,
+                "hits": 1,
+            }
+            by_content[digest] = key
+
+    return list(merged.values())
+
+
+def rank_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Order results by search relevance, boosted when several planned queries
+    agree on a source and penalized slightly for lower-priority queries.
+    """
+    def rank_key(result: Dict[str, Any]) -> float:
+        return result["score"] + 0.1 * (result["hits"] - 1) - 0.02 * result["query_rank"]
+
+    return sorted(results, key=rank_key, reverse=True)
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Render ranked results as compact numbered sources for the summarizer."""
+    return "\n\n".join(
+        f"[{i}] {r['url'] or 'source'}\n{r['content']}" for i, r in enumerate(results, 1)
+    )
@@ -0,0 +1,158 @@
+"""
+Research text cut into chunks and ranked against a query with BM25 (numpy).
+
+Text is chunked along its structure: a heading-led block is one chunk when
+it fits in `chunk_tokens`, otherwise it is split at line and then sentence
+boundaries, each piece keeping its block's heading so it still reads on its
+own. ChunkIndex stores one entry per distinct term of each chunk in flat
+arrays with the query-independent part of the BM25 weight precomputed, so a
+query is a mask and a bincount. Indexes are memoized per text: research
+notes that stay the same across iterations are chunked and indexed once.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils.prompt_budget import is_heading, split_blocks
+from utils.research import estimate_tokens
+from utils.research_store import tokenize
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _pieces(lines: List[str], max_tokens: int) -> List[str]:
+    """Lines (or the sentences of an overlong line) packed into pieces of at most max_tokens."""
+    units: List[Tuple[str, str]] = []  # (separator before it, text)
+    for line in lines:
+        if estimate_tokens(line) <= max_tokens:
+            units.append(("\n", line))
+        else:
+            sentences = [s for s in _SENTENCE_RE.split(line) if s.strip()]
+            units += [("\n" if i == 0 else " ", s) for i, s in enumerate(sentences)]
+    pieces: List[str] = []
+    current = ""
+    for separator, text in units:
+        if current and estimate_tokens(current + separator + text) > max_tokens:
+            pieces.append(current)
+            current = ""
+        current = current + separator + text if current else text
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int = 120) -> List[Tuple[str, str]]:
+    """(heading, body) chunks of `text`, in order; heading is "" before the first one."""
+    chunks: List[Tuple[str, str]] = []
+    for block in split_blocks(text or ""):
+        lines = [line.strip() for line in block if line.strip()]
+        if not lines:
+            continue
+        heading = lines[0] if is_heading(lines[0]) and len(lines) > 1 else ""
+        body = lines[1:] if heading else lines
+        for piece in _pieces(body, max(1, max_tokens - estimate_tokens(heading))):
+            chunks.append((heading, piece))
+    return chunks
+
+
+class ChunkIndex:
+    def __init__(self, chunks: List[Tuple[str, str]], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.tokens = [estimate_tokens(f"{h}\n{body}" if h else body) for h, body in chunks]
+        self._vocab: dict = {}
+        docs, terms, tfs, lengths = [], [], [], []
+        for row, (heading, body) in enumerate(chunks):
+            counts = Counter(tokenize(f"{heading} {body}"))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                docs.append(row)
+                terms.append(self._vocab.setdefault(term, len(self._vocab)))
+                tfs.append(tf)
+        self._docs = np.array(docs, dtype=np.int32)
+        self._terms = np.array(terms, dtype=np.int32)
+        tf = np.array(tfs, dtype=np.float32)
+        n = len(chunks)
+        length = np.array(lengths, dtype=np.float32)
+        avg = float(length.mean()) if n and length.mean() > 0 else 1.0
+        df = np.bincount(self._terms, minlength=len(self._vocab)).astype(np.float32)
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        # BM25 weight of each (chunk, term) entry; a query only selects and sums them
+        self._weights = idf[self._terms] * tf * (k1 + 1) / (
+            tf + k1 * (1 - b + b * length[self._docs] / avg)
+        ) if n else np.zeros(0, dtype=np.float32)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for `query` (distinct query terms)."""
+        ids = [self._vocab[t] for t in set(tokenize(query)) if t in self._vocab]
+        if not ids:
+            return np.zeros(len(self.chunks), dtype=np.float32)
+        wanted = np.zeros(len(self._vocab), dtype=bool)
+        wanted[ids] = True
+        mask = wanted[self._terms]
+        return np.bincount(self._docs[mask], weights=self._weights[mask], minlength=len(self.chunks))
+
+    def top(self, query: str, k: int, max_tokens: int) -> List[int]:
+        """
+        Indexes of up to k chunks, most relevant first, that fit in max_tokens
+        together. Without any matching chunk, the leading chunks are used.
+        """
+        scores = self.scores(query)
+        ranked = [int(i) for i in np.argsort(-scores, kind="stable") if scores[i] > 0]
+        chosen, budget = [], max_tokens
+        for i in ranked or range(len(self.chunks)):
+            if len(chosen) >= k:
+                break
+            if self.tokens[i] <= budget:
+                chosen.append(i)
+                budget -= self.tokens[i]
+        return chosen
+
+    def render(self, indexes: List[int]) -> str:
+        """Chunks in document order, each heading written once per run of its chunks."""
+        lines, heading = [], None
+        for i in sorted(indexes):
+            chunk_heading, body = self.chunks[i]
+            if chunk_heading and chunk_heading != heading:
+                lines.append(chunk_heading)
+            heading = chunk_heading
+            lines.append(body)
+        return "\n".join(lines)
+
+
+@lru_cache(maxsize=64)
+def chunk_index(text: str, chunk_tokens: int = 120) -> ChunkIndex:
+    return ChunkIndex(chunk_text(text, chunk_tokens))
+
+
+def relevant_chunks(
+    text: str, query: str, max_tokens: int, k: int = 6, chunk_tokens: int = 120
+) -> str:
+    """The k chunks of `text` most relevant to `query` within max_tokens, in document order."""
+    if not text:
+        return ""
+    index = chunk_index(text, chunk_tokens)
+    return index.render(index.top(query, k, max_tokens))
+
+
+def rank_chunks(
+    texts: List[str], query: str, max_tokens: int, chunk_tokens: int = 120, k: Optional[int] = None
+) -> List[List[str]]:
+    """
+    Chunk each of `texts` (e.g. search results), rank all chunks together
+    against `query` and keep the best within max_tokens: per text, the kept
+    chunk bodies in their original order (empty when none was kept).
+    """
+    owners, chunks = [], []
+    for owner, text in enumerate(texts):
+        for chunk in chunk_text(text, chunk_tokens):
+            owners.append(owner)
+            chunks.append(chunk)
+    index = ChunkIndex(chunks)
+    kept: List[List[str]] = [[] for _ in texts]
+    for i in sorted(index.top(query, k or len(chunks), max_tokens)):
+        heading, body = chunks[i]
+        kept[owners[i]].append(f"{heading}\n{body}" if heading else body)
+    return kept
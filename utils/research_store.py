@@ -0,0 +1,198 @@
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to "
+    "what when where which who why with your you vs".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def normalize_query(query: str) -> str:
+    """Order-insensitive key so trivially reworded queries share a cache entry."""
+    return " ".join(sorted(set(tokenize(query))))
+
+
+class ResearchStore:
+    """
+    Local store of raw search results and summarized research notes, plus a
+    BM25 inverted index over every cached snippet.
+
+    - Search results are cached per normalized query, notes per normalized
+      topic key; both are considered fresh for `ttl_seconds`.
+    - The snippet index ignores freshness: it lets related topics reuse
+      evidence, and lets an offline deployment run from a warm store.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS search_results (
+                query_key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS research_notes (
+                notes_key TEXT PRIMARY KEY,
+                notes TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS snippets (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                snippet_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, snippet_id)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _fresh(self, created_at: float) -> bool:
+        return time.time() - created_at <= self.ttl_seconds
+
+    # --- raw search results -------------------------------------------------
+
+    def get_results(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM search_results WHERE query_key = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        if row is None or not self._fresh(row[1]):
+            return None
+        return json.loads(row[0])
+
+    def put_results(self, query: str, results: Any) -> None:
+        if not isinstance(results, list):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results (query_key, query, results, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (normalize_query(query), query, json.dumps(results), time.time()),
+            )
+            for result in results:
+                if isinstance(result, dict) and result.get("content"):
+                    self._index_snippet(str(result.get("url", "")), str(result["content"]))
+            self._conn.commit()
+
+    # --- summarized notes ---------------------------------------------------
+
+    def get_notes(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT notes, created_at FROM research_notes WHERE notes_key = ?", (key,)
+            ).fetchone()
+        if row is None or not self._fresh(row[1]):
+            return None
+        return row[0]
+
+    def put_notes(self, key: str, notes: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_notes (notes_key, notes, created_at)"
+                " VALUES (?, ?, ?)",
+                (key, notes, time.time()),
+            )
+            self._conn.commit()
+
+    # --- BM25 snippet index ---------------------------------------------------
+
+    def _index_snippet(self, url: str, content: str) -> None:
+        url = url or "snippet:" + hashlib.sha1(content.encode("utf-8")).hexdigest()
+        if self._conn.execute("SELECT 1 FROM snippets WHERE url = ?", (url,)).fetchone():
+            return
+        terms = Counter(tokenize(content))
+        cursor = self._conn.execute(
+            "INSERT INTO snippets (url, content, length) VALUES (?, ?, ?)",
+            (url, content, sum(terms.values())),
+        )
+        self._conn.executemany(
+            "INSERT INTO postings (term, snippet_id, tf) VALUES (?, ?, ?)",
+            [(term, cursor.lastrowid, tf) for term, tf in terms.items()],
+        )
+
+    def search_snippets(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        BM25 over cached snippets. Each hit carries 'bm25', 'score' (bm25
+        normalized to the best hit, 0-1) and 'coverage' (fraction of distinct
+        query terms present in the snippet).
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            n_docs, avg_len = self._conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM snippets"
+            ).fetchone()
+            if not n_docs:
+                return []
+            placeholders = ",".join("?" * len(terms))
+            rows = self._conn.execute(
+                "SELECT p.term, p.snippet_id, p.tf, s.length FROM postings p"
+                " JOIN snippets s ON s.id = p.snippet_id"
+                f" WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+
+            df = Counter(term for term, *_ in rows)
+            scores: Dict[int, float] = {}
+            matched: Dict[int, int] = Counter()
+            for term, snippet_id, tf, length in rows:
+                idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+                norm = tf + self.k1 * (1 - self.b + self.b * length / (avg_len or 1))
+                scores[snippet_id] = scores.get(snippet_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+                matched[snippet_id] += 1
+
+            top = sorted(scores, key=scores.get, reverse=True)[:k]
+            if not top:
+                return []
+            snippets = {
+                sid: (url, content)
+                for sid, url, content in self._conn.execute(
+                    f"SELECT id, url, content FROM snippets WHERE id IN ({','.join('?' * len(top))})",
+                    top,
+                )
+            }
+
+        best = scores[top[0]] or 1.0
+        return [
+            {
+                "url": snippets[sid][0],
+                "content": snippets[sid][1],
+                "bm25": scores[sid],
+                "score": scores[sid] / best,
+                "coverage": matched[sid] / len(terms),
+            }
+            for sid in top
+        ]
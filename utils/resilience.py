@@ -0,0 +1,402 @@
+"""
+Resilient LLM calls: retries with jittered exponential backoff (honoring
+retry-after), a shared token bucket, hedged requests past a latency quantile,
+and fallback to an alternate model.
+
+Per-call timeouts belong to the chat model's HTTP client (config.settings
+passes LLM_CALL_TIMEOUT_S to it), which covers sync, async and streamed calls
+and frees the connection when it fires. Sync calls run inline on the caller's
+thread; hedging, and the policy's own timeout, apply to async calls only,
+where the losing or timed-out request is a task that can be cancelled.
+
+`ResilientModel` wraps the chat models from config.settings and exposes the
+subset of the Runnable API the agents use (invoke / ainvoke / stream /
+astream / with_structured_output), so agents need no retry code of their own.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+from langchain_core.runnables import Runnable
+
+from utils.research import estimate_tokens
+from utils.tracing import note_call_event
+
+# HTTP statuses worth retrying (timeouts, conflicts, rate limits, server errors)
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# Transport errors from httpx / provider SDKs, matched by name (no SDK import)
+RETRYABLE_ERROR_NAMES = frozenset({
+    "APIConnectionError", "APITimeoutError", "ConnectError", "ConnectTimeout",
+    "ReadError", "ReadTimeout", "RemoteProtocolError", "PoolTimeout",
+})
+
+
+class CallTimeout(TimeoutError):
+    """A call (including its hedge) did not finish within the per-call timeout."""
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    max_retries: int = 4          # retries per model, after the first attempt
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 20.0   # also the longest retry-after waited before falling back
+    timeout_s: float = 0.0        # async calls only, 0 = none (the HTTP client's timeout always applies)
+    hedge_quantile: float = 0.0   # async calls only, e.g. 0.95: second request past that latency; 0 = off
+    hedge_min_samples: int = 20   # latencies observed before hedging kicks in
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    return type(exc).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def is_model_failure(exc: BaseException) -> bool:
+    """
+    True for errors a caller can work around by not using the call's result:
+    unusable structured output (ValueError, which covers pydantic and output
+    parser errors) and calls that failed for good (timeouts, transport and
+    provider API errors, once retries and fallbacks are spent).
+    """
+    if isinstance(exc, (ValueError, TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    return status_code(exc) is not None or type(exc).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a retry-after-ms / retry-after header (delta or HTTP date), if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, policy: CallPolicy, rng: random.Random = random) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(max, base * 2^attempt))."""
+    return rng.uniform(0.0, min(policy.backoff_max_s, policy.backoff_base_s * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Provider token budget shared by every pipeline in the process, refilled
+    continuously at `tokens_per_minute` (0 = unlimited). Prompt tokens are
+    reserved before a call and completion tokens charged after it, so the
+    level can dip below zero and delay the next callers.
+    """
+
+    def __init__(self, tokens_per_minute: float = 0.0):
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Seconds to wait before `tokens` are available; 0 means they were taken."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+            self._updated = now
+            tokens = min(tokens, self.capacity)
+            if self.level >= tokens:
+                self.level -= tokens
+                return 0.0
+            return (tokens - self.level) / self.rate
+
+    def acquire(self, tokens: int) -> None:
+        while (delay := self._reserve(tokens)) > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int) -> None:
+        while (delay := self._reserve(tokens)) > 0:
+            await asyncio.sleep(delay)
+
+    def charge(self, tokens: int) -> None:
+        if self.rate > 0:
+            with self._lock:
+                self.level -= tokens
+
+
+class ModelStats:
+    """Recent latencies and retry-after cooldown of one model, shared by all callers."""
+
+    def __init__(self, window: int = 200):
+        self.latencies: deque = deque(maxlen=window)
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if q <= 0 or len(self.latencies) < max(1, min_samples):
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def cool_down(self, seconds: float) -> None:
+        with self._lock:
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    def cooldown_remaining(self) -> float:
+        return max(0.0, self.cooldown_until - time.monotonic())
+
+
+def _prompt_tokens(input: Any) -> int:
+    if isinstance(input, list):
+        return estimate_tokens("\n".join(str(getattr(m, "content", m)) for m in input))
+    if hasattr(input, "to_string"):
+        return estimate_tokens(input.to_string())
+    return estimate_tokens(str(input))
+
+
+def _completion_tokens(result: Any) -> int:
+    usage = getattr(result, "usage_metadata", None)
+    if usage:
+        return usage.get("output_tokens", 0)
+    return estimate_tokens(str(getattr(result, "content", result)))
+
+
+def _wait_s(started: float, hedge_after: Optional[float], hedged: bool, deadline: Optional[float]) -> Optional[float]:
+    """How long to wait for in-flight requests: until the hedge point or the deadline (None = no limit)."""
+    points = [p for p in (None if hedged else started + hedge_after, deadline) if p is not None]
+    return max(0.0, min(points) - time.monotonic()) if points else None
+
+
+class ResilientModel(Runnable):
+    """
+    Call `models[0]`, retrying transient failures, then each fallback in turn.
+
+    - retryable: timeouts, connection errors and HTTP 408/409/425/429/5xx;
+      anything else (bad request, parsing errors) is raised at once
+    - waits max(jittered backoff, retry-after); a retry-after also pauses every
+      caller of that model, and one longer than `backoff_max_s` skips straight
+      to the fallback
+    - streams are retried only until their first chunk, and are not hedged
+    - only async calls are hedged or bounded by the policy's timeout
+    """
+
+    def __init__(
+        self,
+        models: List[Runnable],
+        stats: List[ModelStats],
+        policy: CallPolicy,
+        bucket: Optional[TokenBucket] = None,
+    ):
+        self.models = models
+        self.stats = stats
+        self.policy = policy
+        self.bucket = bucket or TokenBucket()
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> "ResilientModel":
+        return ResilientModel(
+            [m.with_structured_output(schema, **kwargs) for m in self.models],
+            self.stats, self.policy, self.bucket,
+        )
+
+    # --- retry loop -------------------------------------------------------------
+
+    def _next_delay(self, exc: BaseException, attempt: int, stats: ModelStats, last_model: bool) -> Optional[float]:
+        """Seconds to wait before retrying this model, or None to move on."""
+        if attempt >= self.policy.max_retries:
+            return None
+        hinted = retry_after(exc)
+        if hinted is not None:
+            stats.cool_down(hinted)
+            if hinted > self.policy.backoff_max_s and not last_model:
+                return None
+        return max(hinted or 0.0, backoff_delay(attempt, self.policy))
+
+    def _cooldown(self, stats: ModelStats, last_model: bool) -> Optional[float]:
+        """Seconds to wait out the model's retry-after, or None to use the fallback now."""
+        remaining = stats.cooldown_remaining()
+        if remaining > self.policy.backoff_max_s and not last_model:
+            return None
+        return remaining
+
+    def _attempts(self) -> Iterator[tuple]:
+        for i, (model, stats) in enumerate(zip(self.models, self.stats)):
+            if i:
+                note_call_event("fallback")
+            yield model, stats, i == len(self.models) - 1
+
+    def _record(self, stats: ModelStats, started: float, result: Any) -> Any:
+        stats.record(time.monotonic() - started)
+        self.bucket.charge(_completion_tokens(result))
+        return result
+
+    # --- sync -------------------------------------------------------------------
+
+    def _call(self, fn: Callable[[], Any], stats: ModelStats) -> Any:
+        # inline: no thread to leak when the provider hangs; the HTTP client times out
+        started = time.monotonic()
+        return self._record(stats, started, fn())
+
+    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        tokens = _prompt_tokens(input)
+        error: Optional[BaseException] = None
+        for model, stats, last_model in self._attempts():
+            for attempt in range(self.policy.max_retries + 1):
+                cooldown = self._cooldown(stats, last_model)
+                if cooldown is None:
+                    break
+                time.sleep(cooldown)
+                self.bucket.acquire(tokens)
+                try:
+                    return self._call(lambda: model.invoke(input, config, **kwargs), stats)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    error = e
+                    delay = self._next_delay(e, attempt, stats, last_model)
+                    if delay is None:
+                        break
+                    note_call_event("retry")
+                    time.sleep(delay)
+        raise error
+
+    def stream(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Iterator[Any]:
+        tokens = _prompt_tokens(input)
+        error: Optional[BaseException] = None
+        for model, stats, last_model in self._attempts():
+            for attempt in range(self.policy.max_retries + 1):
+                cooldown = self._cooldown(stats, last_model)
+                if cooldown is None:
+                    break
+                time.sleep(cooldown)
+                self.bucket.acquire(tokens)
+                chunks = model.stream(input, config, **kwargs)
+                try:
+                    first = next(chunks, None)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    error = e
+                    delay = self._next_delay(e, attempt, stats, last_model)
+                    if delay is None:
+                        break
+                    note_call_event("retry")
+                    time.sleep(delay)
+                    continue
+                if first is not None:
+                    yield first
+                    yield from chunks
+                return
+        raise error
+
+    # --- async ------------------------------------------------------------------
+
+    async def _acall(self, make: Callable[[], Any], stats: ModelStats) -> Any:
+        hedge_after = stats.quantile(self.policy.hedge_quantile, self.policy.hedge_min_samples)
+        started = time.monotonic()
+        if hedge_after is None and not self.policy.timeout_s:
+            return self._record(stats, started, await make())
+
+        pending = {asyncio.ensure_future(make())}
+        hedged = hedge_after is None
+        deadline = started + self.policy.timeout_s if self.policy.timeout_s else None
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = _wait_s(started, hedge_after, hedged, deadline)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return self._record(stats, started, task.result())
+                    error = error or task.exception()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise CallTimeout(f"LLM call exceeded {self.policy.timeout_s:.1f}s")
+                if not hedged and pending:
+                    hedged = True
+                    note_call_event("hedge")
+                    pending.add(asyncio.ensure_future(make()))
+            raise error
+        finally:
+            # the losing request (or both, on timeout) is cancelled
+            for task in pending:
+                task.cancel()
+
+    async def ainvoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        tokens = _prompt_tokens(input)
+        error: Optional[BaseException] = None
+        for model, stats, last_model in self._attempts():
+            for attempt in range(self.policy.max_retries + 1):
+                cooldown = self._cooldown(stats, last_model)
+                if cooldown is None:
+                    break
+                await asyncio.sleep(cooldown)
+                await self.bucket.aacquire(tokens)
+                try:
+                    return await self._acall(lambda: model.ainvoke(input, config, **kwargs), stats)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    error = e
+                    delay = self._next_delay(e, attempt, stats, last_model)
+                    if delay is None:
+                        break
+                    note_call_event("retry")
+                    await asyncio.sleep(delay)
+        raise error
+
+    async def astream(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        tokens = _prompt_tokens(input)
+        error: Optional[BaseException] = None
+        for model, stats, last_model in self._attempts():
+            for attempt in range(self.policy.max_retries + 1):
+                cooldown = self._cooldown(stats, last_model)
+                if cooldown is None:
+                    break
+                await asyncio.sleep(cooldown)
+                await self.bucket.aacquire(tokens)
+                chunks = model.astream(input, config, **kwargs).__aiter__()
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    error = e
+                    delay = self._next_delay(e, attempt, stats, last_model)
+                    if delay is None:
+                        break
+                    note_call_event("retry")
+                    await asyncio.sleep(delay)
+                    continue
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+                return
+        raise error
@@ -0,0 +1,97 @@
+"""
+Local history of critic aspect scores, used to calibrate new ones (SQLite).
+
+A small model scores each aspect with its own bias: it may hand out 8/10 for
+grammar to almost anything and rarely more than 5 for SEO. Once an aspect has
+`min_samples` scores on record, a new score is shifted by the gap between
+that aspect's recent mean (over the last `window`) and the pooled mean of all
+aspects. The shift only removes the per-aspect bias: scores stay on the raw
+scale, so a draft the critic rates above CONFIDENCE_THRESHOLD still clears it
+however long the history gets.
+"""
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Tuple
+
+
+def _mean_std(values) -> Tuple[float, float]:
+    n = len(values)
+    mean = sum(values) / n
+    return mean, math.sqrt(sum((v - mean) ** 2 for v in values) / n)
+
+
+class ScoreCalibration:
+    def __init__(self, path: str, window: int = 500, min_samples: int = 20, low: float = 1.0, high: float = 10.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.window = window
+        self.min_samples = min_samples
+        self.low, self.high = low, high
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS aspect_scores (
+                id INTEGER PRIMARY KEY,
+                aspect TEXT NOT NULL,
+                score REAL NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS aspect_scores_by_aspect ON aspect_scores (aspect, id);
+            """
+        )
+        self._conn.commit()
+        self._history: Dict[str, Deque[float]] = {}
+        rows = self._conn.execute("SELECT aspect, score FROM aspect_scores ORDER BY id").fetchall()
+        for aspect, score in rows:
+            self._history.setdefault(aspect, deque(maxlen=window)).append(score)
+
+    def record(self, scores: Dict[str, float]) -> None:
+        now = time.time()
+        with self._lock:
+            for aspect, score in scores.items():
+                self._history.setdefault(aspect, deque(maxlen=self.window)).append(float(score))
+            self._conn.executemany(
+                "INSERT INTO aspect_scores (aspect, score, created_at) VALUES (?, ?, ?)",
+                [(aspect, float(score), now) for aspect, score in scores.items()],
+            )
+            # keep the table at the window size per aspect
+            for aspect in scores:
+                self._conn.execute(
+                    "DELETE FROM aspect_scores WHERE aspect = ? AND id <= ("
+                    "SELECT id FROM aspect_scores WHERE aspect = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (aspect, aspect, self.window),
+                )
+            self._conn.commit()
+
+    def calibrate(self, scores: Dict[str, float]) -> Dict[str, float]:
+        """Scores minus their aspect's bias; aspects with too little history pass through."""
+        if self.min_samples <= 0:
+            return dict(scores)
+        with self._lock:
+            history = {a: list(h) for a, h in self._history.items() if len(h) >= self.min_samples}
+        if not history:
+            return dict(scores)
+        pooled_mean, _ = _mean_std([s for h in history.values() for s in h])
+        calibrated = {}
+        for aspect, score in scores.items():
+            if aspect not in history:
+                calibrated[aspect] = float(score)
+                continue
+            mean, _ = _mean_std(history[aspect])
+            calibrated[aspect] = min(self.high, max(self.low, score - (mean - pooled_mean)))
+        return calibrated
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            history = {a: list(h) for a, h in self._history.items()}
+        return {
+            aspect: dict(zip(("mean", "std"), _mean_std(values)), samples=len(values))
+            for aspect, values in history.items()
+            if values
+        }
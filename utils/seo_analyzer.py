@@ -0,0 +1,162 @@
+"""
+Local SEO analysis of a finished draft: keyword density, keyword placement
+(title, opening, headings), title and meta-description length, and the slug.
+
+No model call is made; the SEO stage (agents/seo_expert.py) only asks the LLM
+for fixes when this report lists issues.
+"""
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from utils.research_store import STOPWORDS
+from utils.text_metrics import constraint_keywords, draft_words
+
+_HEADING_LINE_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+# words of the draft searched for the primary keyword in the opening
+OPENING_WORDS = 100
+
+
+@dataclass
+class SeoReport:
+    primary_keyword: str
+    keywords: List[str]
+    title: str
+    slug: str
+    meta_description: str
+    density: Dict[str, float]      # keyword -> occurrences per 100 words
+    heading_coverage: float        # share of keywords used in some heading
+    missing_keywords: List[str]
+    issues: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def constraint_value(constraints: str, name: str) -> Optional[str]:
+    """Value of a 'name: value' entry in the free-text constraints, if present."""
+    match = re.search(rf"\b{name}\s*[:=]\s*([^;\n]+)", constraints or "", re.IGNORECASE)
+    if not match:
+        return None
+    # "keyword: x, slug: y" -> "x"
+    value = re.split(r",\s*[a-z][a-z ]*[:=]", match.group(1), flags=re.IGNORECASE)[0]
+    return value.strip().strip("\"'")
+
+
+def slugify(text: str, max_words: int = 8) -> str:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return "-".join(words[:max_words])
+
+
+def primary_keyword(topic: str, constraints: str) -> str:
+    """
+    'primary keyword:' / 'keyword:' from the constraints, else the topic's
+    first run of content words ("how to bake sourdough bread" -> "bake sourdough bread").
+    """
+    value = constraint_value(constraints, "primary keyword") or constraint_value(constraints, "keyword")
+    if value:
+        return " ".join(draft_words(value.split(",")[0]))
+    phrase: List[str] = []
+    for word in draft_words(topic):
+        if word in STOPWORDS:
+            if phrase:
+                break
+            continue
+        phrase.append(word)
+    return " ".join(phrase[:4])
+
+
+def _count(phrase: str, joined: str) -> int:
+    return joined.count(f" {phrase} ") if phrase else 0
+
+
+def _contains(text: str, phrase: str) -> bool:
+    return _count(" ".join(draft_words(phrase)), f" {' '.join(draft_words(text))} ") > 0
+
+
+def _opening_meta(draft: str, max_chars: int) -> str:
+    """First sentences of the body, up to max_chars (the fallback meta description)."""
+    body = " ".join(
+        line.strip() for line in draft.splitlines() if line.strip() and not _HEADING_LINE_RE.match(line)
+    )
+    meta = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", body):
+        if len(meta) + len(sentence) + 1 > max_chars:
+            break
+        meta = f"{meta} {sentence}".strip()
+    return meta
+
+
+def analyze_seo(
+    draft: str,
+    topic: str,
+    constraints: str = "",
+    meta_description: Optional[str] = None,
+    density_range: Tuple[float, float] = (0.5, 2.5),
+    meta_range: Tuple[int, int] = (120, 160),
+    title_max_chars: int = 60,
+) -> SeoReport:
+    words = draft_words(draft)
+    joined = f" {' '.join(words)} "
+    primary = primary_keyword(topic, constraints)
+    # the primary keyword plus keywords the constraints name explicitly; style
+    # instructions ("avoid jargon") are not keywords to work in
+    keywords = [k for k in dict.fromkeys([primary] + constraint_keywords(constraints)) if k]
+
+    headings = [(len(m.group(1)), m.group(2)) for m in _HEADING_LINE_RE.finditer(draft)]
+    title = next((text for level, text in headings if level == 1), "")
+    heading_text = f" {' '.join(draft_words(' '.join(text for _, text in headings)))} "
+    density = {
+        k: round(100.0 * _count(" ".join(draft_words(k)), joined) / max(1, len(words)), 2) for k in keywords
+    }
+    missing = [k for k in keywords if not density[k]]
+    in_headings = [k for k in keywords if _count(" ".join(draft_words(k)), heading_text)]
+    meta = (
+        meta_description
+        or constraint_value(constraints, "meta description")
+        or _opening_meta(draft, meta_range[1])
+    )
+    slug = slugify(constraint_value(constraints, "slug") or title or primary or topic)
+
+    issues = []
+    if not title:
+        issues.append(f"Add an H1 title that contains the primary keyword '{primary}'.")
+    else:
+        if primary and not _contains(title, primary):
+            issues.append(f"Put the primary keyword '{primary}' in the title.")
+        if len(title) > title_max_chars:
+            issues.append(f"Shorten the title to {title_max_chars} characters or fewer (now {len(title)}).")
+    if primary and not _contains(" ".join(words[:OPENING_WORDS]), primary):
+        issues.append(f"Use '{primary}' within the first {OPENING_WORDS} words.")
+    if primary and not any(level >= 2 and _contains(text, primary) for level, text in headings):
+        issues.append(f"Use '{primary}' (or a close variant) in at least one H2 heading.")
+    if primary and density[primary] < density_range[0]:
+        issues.append(
+            f"Use '{primary}' more often: {density[primary]:.1f} per 100 words, "
+            f"aim for {density_range[0]:g}-{density_range[1]:g}."
+        )
+    elif primary and density[primary] > density_range[1]:
+        issues.append(
+            f"'{primary}' is overused: {density[primary]:.1f} per 100 words, "
+            f"aim for {density_range[0]:g}-{density_range[1]:g}."
+        )
+    if not meta_range[0] <= len(meta) <= meta_range[1]:
+        issues.append(
+            f"Write a meta description of {meta_range[0]}-{meta_range[1]} characters (now {len(meta)})."
+        )
+    other_missing = [k for k in missing if k != primary]
+    if other_missing:
+        issues.append(f"Work in the missing keywords: {', '.join(other_missing[:8])}.")
+
+    return SeoReport(
+        primary_keyword=primary,
+        keywords=keywords,
+        title=title,
+        slug=slug,
+        meta_description=meta,
+        density=density,
+        heading_coverage=round(len(in_headings) / len(keywords), 3) if keywords else 1.0,
+        missing_keywords=missing,
+        issues=issues,
+    )
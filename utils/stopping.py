@@ -0,0 +1,202 @@
+"""
+Stopping policies for the orchestrator loop.
+
+A policy is a callable `policy(state) -> Optional[str]`: a stop reason, or
+None to keep going. It is evaluated after the orchestrator has advanced
+state['iteration'], so `iteration - 1` rounds have been generated and scored.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.tracing import ONE_OFF_NODES
+
+
+def _best_so_far(scores: List[float]) -> List[float]:
+    best, running = [], 0.0
+    for score in scores:
+        running = max(running, score)
+        best.append(running)
+    return best
+
+
+def _last_round(state: Dict[str, Any]) -> Dict[str, float]:
+    """Wall seconds and tokens of the most recent generate/score round, from the trace."""
+    trace = state.get("trace") or []
+    rounds = [s["iteration"] for s in trace if s["node"] not in ONE_OFF_NODES and s["iteration"] > 0]
+    if not rounds:
+        return {"seconds": 0.0, "tokens": 0}
+    last = max(rounds)
+    spans = [s for s in trace if s["iteration"] == last and s["node"] not in ONE_OFF_NODES]
+    return {
+        "seconds": sum(s["wall_ms"] for s in spans) / 1000,
+        "tokens": sum(s["prompt_tokens"] + s["completion_tokens"] for s in spans),
+    }
+
+
+def _run_started(state: Dict[str, Any]) -> Optional[float]:
+    trace = state.get("trace") or []
+    return trace[0]["start"] if trace else None
+
+
+class ThresholdPolicy:
+    """Stop once the critic's last score reaches the confidence threshold."""
+    name = "threshold"
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    def __call__(self, state: Dict[str, Any]) -> Optional[str]:
+        last_score = state.get("last_score", 0.0)
+        if last_score >= self.threshold:
+            return (
+                f"Early stop: confidence reached {last_score * 100:.1f}% "
+                f"(threshold {self.threshold * 100:.0f}%)"
+            )
+        return None
+
+
+class MaxIterationsPolicy:
+    """Hard cap on rounds (state['max_iterations'])."""
+    name = "max_iterations"
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    def __call__(self, state: Dict[str, Any]) -> Optional[str]:
+        max_iterations = state.get("max_iterations", 5)
+        if state.get("iteration", 0) >= max_iterations:
+            return (
+                f"Max iterations ({max_iterations}) reached without hitting threshold "
+                f"{self.threshold * 100:.0f}% "
+                f"(best score {state.get('best_score', 0.0) * 100:.1f}%)"
+            )
+        return None
+
+
+class PlateauPolicy:
+    """
+    Stop when the best score has improved by less than `min_delta` over the
+    last `window` rounds (flat or oscillating scores).
+    """
+    name = "plateau"
+
+    def __init__(self, window: int = 2, min_delta: float = 0.01):
+        self.window = max(1, window)
+        self.min_delta = min_delta
+
+    def __call__(self, state: Dict[str, Any]) -> Optional[str]:
+        scores = state.get("confidence_scores") or []
+        if len(scores) <= self.window:
+            return None
+        gain = max(scores[-self.window:]) - max(scores[: -self.window])
+        if gain < self.min_delta:
+            return (
+                f"Plateau: best score gained {max(0.0, gain) * 100:.1f} pts over the last "
+                f"{self.window} iteration(s) (min {self.min_delta * 100:.1f} pts)"
+            )
+        return None
+
+
+class ExpectedGainPolicy:
+    """
+    Extrapolate the next round's improvement from the best-so-far curve,
+    assuming gains shrink geometrically (next = last * last / previous), and
+    stop when it is below `min_gain`. A round with no improvement falls back
+    to the mean of the last two gains, so one bad draft does not end the run.
+    """
+    name = "expected_gain"
+
+    def __init__(self, min_gain: float = 0.005):
+        self.min_gain = min_gain
+
+    def expected_gain(self, scores: List[float]) -> Optional[float]:
+        best = _best_so_far(scores)
+        if len(best) < 3:
+            return None
+        last, previous = best[-1] - best[-2], best[-2] - best[-3]
+        if last <= 0 or previous <= 0:
+            return (last + previous) / 2
+        return last * min(1.0, last / previous)
+
+    def __call__(self, state: Dict[str, Any]) -> Optional[str]:
+        expected = self.expected_gain(state.get("confidence_scores") or [])
+        if expected is not None and expected < self.min_gain:
+            return (
+                f"Diminishing returns: next iteration expected to gain "
+                f"{expected * 100:.2f} pts (min {self.min_gain * 100:.1f} pts)"
+            )
+        return None
+
+
+class BudgetPolicy:
+    """
+    Per-run budgets on elapsed seconds and LLM tokens (0 disables either).
+    Stops when another round, estimated from the last one, would exceed them.
+    """
+    name = "budget"
+
+    def __init__(self, max_seconds: float = 0.0, max_tokens: int = 0):
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+
+    def __call__(self, state: Dict[str, Any]) -> Optional[str]:
+        trace = state.get("trace") or []
+        next_round = _last_round(state)
+        if self.max_tokens:
+            used = sum(s["prompt_tokens"] + s["completion_tokens"] for s in trace)
+            if used + next_round["tokens"] > self.max_tokens:
+                return (
+                    f"Token budget: {used:,} of {self.max_tokens:,} used, "
+                    f"next iteration needs ~{next_round['tokens']:,}"
+                )
+        started = _run_started(state)
+        if self.max_seconds and started is not None:
+            elapsed = time.time() - started
+            if elapsed + next_round["seconds"] > self.max_seconds:
+                return (
+                    f"Latency budget: {elapsed:.1f}s of {self.max_seconds:.1f}s used, "
+                    f"next iteration needs ~{next_round['seconds']:.1f}s"
+                )
+        return None
+
+
+class DeadlinePolicy:
+    """
+    Stop when the next round would not finish before the run's deadline:
+    state['deadline'] (epoch seconds) if the caller set one, otherwise
+    `deadline_s` after the run started (0 disables).
+    """
+    name = "deadline"
+
+    def __init__(self, deadline_s: float = 0.0):
+        self.deadline_s = deadline_s
+
+    def _deadline(self, state: Dict[str, Any]) -> Optional[float]:
+        if state.get("deadline"):
+            return state["deadline"]
+        started = _run_started(state)
+        if self.deadline_s and started is not None:
+            return started + self.deadline_s
+        return None
+
+    def __call__(self, state: Dict[str, Any]) -> Optional[str]:
+        deadline = self._deadline(state)
+        if deadline is None:
+            return None
+        remaining = deadline - time.time()
+        needed = _last_round(state)["seconds"]
+        if remaining < needed:
+            return (
+                f"Deadline: {max(0.0, remaining):.1f}s left, "
+                f"next iteration needs ~{needed:.1f}s"
+            )
+        return None
+
+
+def first_stop(policies: List[Any], state: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """{'policy': name, 'reason': text} for the first policy that stops, else None."""
+    for policy in policies:
+        reason = policy(state)
+        if reason:
+            return {"policy": policy.name, "reason": reason}
+    return None
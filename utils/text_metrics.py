@@ -0,0 +1,279 @@
+"""
+Deterministic draft metrics for the critic: length adherence, structure,
+keyword coverage, readability and repetition.
+
+Counting is done on numpy arrays (bytes of the lowercased draft, word ids),
+so a multi-thousand-word draft is measured in well under a millisecond of
+Python-level work per metric.
+"""
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.research_store import tokenize
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+\S", re.MULTILINE)
+
+
+def _byte_table(chars: bytes) -> np.ndarray:
+    table = np.zeros(256, dtype=bool)
+    table[np.frombuffer(chars, dtype=np.uint8)] = True
+    return table
+
+
+# Lookup tables indexed by byte value (faster than np.isin)
+_SENTENCE_END = _byte_table(b".!?")
+_VOWELS = _byte_table(b"aeiouy")
+
+
+def _letters(data: np.ndarray) -> np.ndarray:
+    return (data >= ord("a")) & (data <= ord("z"))
+
+
+def count_syllables(text: str) -> int:
+    """Vowel-group count over the whole text, minus silent trailing 'e's."""
+    data = np.frombuffer(text.lower().encode("ascii", "ignore"), dtype=np.uint8)
+    if data.size == 0:
+        return 0
+    vowel = _VOWELS[data]
+    starts = vowel & ~np.concatenate(([False], vowel[:-1]))
+    letter = _letters(data)
+    next_letter = np.concatenate((letter[1:], [False]))
+    prev_vowel = np.concatenate(([False], vowel[:-1]))
+    silent_e = (data == ord("e")) & ~next_letter & ~prev_vowel & np.concatenate(([False], letter[:-1]))
+    return int(starts.sum() - silent_e.sum())
+
+
+def count_sentences(text: str) -> int:
+    data = np.frombuffer(text.encode("ascii", "ignore"), dtype=np.uint8)
+    if data.size == 0:
+        return 0
+    ends = _SENTENCE_END[data]
+    # a run like "?!" or "..." ends one sentence
+    runs = ends & ~np.concatenate(([False], ends[:-1]))
+    return max(1, int(runs.sum()))
+
+
+def repetition_ratio(words: List[str], n: int = 3) -> float:
+    """Share of word n-grams that repeat an earlier n-gram (0 = no repetition)."""
+    if len(words) < n + 1:
+        return 0.0
+    # 64-bit word hashes mixed into one code per n-gram (wrap-around is fine);
+    # blake2b rather than hash(), which is salted per process
+    vocab: Dict[str, int] = {}
+    index = [vocab.setdefault(word, len(vocab)) for word in words]
+    digests = b"".join(
+        hashlib.blake2b(word.encode("utf-8", "surrogatepass"), digest_size=8).digest() for word in vocab
+    )
+    ids = np.frombuffer(digests, dtype="<i8")[index]
+    codes = ids[: len(ids) - n + 1].copy()
+    with np.errstate(over="ignore"):
+        for k in range(1, n):
+            codes = codes * np.int64(1_000_003) + ids[k: len(ids) - n + 1 + k]
+    return 1.0 - np.unique(codes).size / codes.size
+
+
+# Constraint entries that name keywords ("SEO terms: a, b", "primary keyword: x");
+# other entries ("avoid jargon", "audience: developers") are instructions, not keywords
+_KEYWORD_LABEL_RE = re.compile(
+    r"^(?:(?:primary|secondary|seo|target)\s+)?(?:keywords?|key\s*phrases?|terms)$"
+)
+
+
+def constraint_keywords(constraints: str) -> List[str]:
+    """
+    Keywords listed in explicit keyword entries of the constraints. Entries
+    are separated by ';' or newlines; inside one, a comma-separated item with
+    its own 'label:' starts a new entry ("keyword: x, slug: y" -> ["x"]).
+    """
+    keywords: List[str] = []
+    for entry in re.split(r"[;\n]", constraints or ""):
+        label = None
+        for item in entry.split(","):
+            item = item.strip().lower()
+            match = re.match(r"^([a-z][a-z ]*?)\s*[:=]\s*(.*)$", item)
+            if match:
+                label, item = match.group(1).strip(), match.group(2).strip()
+            if label and _KEYWORD_LABEL_RE.match(label):
+                item = item.strip("\"'. ")
+                if item:
+                    keywords.append(item)
+    return list(dict.fromkeys(keywords))
+
+
+def extract_keywords(topic: str, constraints: str) -> List[str]:
+    """Topic terms plus the keywords named in explicit keyword entries of the constraints."""
+    return list(dict.fromkeys(tokenize(topic) + constraint_keywords(constraints)))
+
+
+def _keyword_found(keyword: str, vocabulary: set, joined: str) -> bool:
+    words = keyword.split()
+    if len(words) > 1:
+        return f" {' '.join(words)} " in joined
+    # single words match any inflection of their stem ("tips" -> "tip", "tipping")
+    if keyword in vocabulary:
+        return True
+    stem = keyword.rstrip("s") if len(keyword) > 3 else None
+    return bool(stem) and any(w.startswith(stem) for w in vocabulary)
+
+
+def _length_score(ratio: float) -> float:
+    # 1.0 on target, 0.5 at +-50%, 0 at double / zero
+    return float(max(0.0, 1.0 - abs(np.log2(max(ratio, 1e-9)))))
+
+
+def _flesch(words: int, sentences: int, syllables: int) -> float:
+    if not words or not sentences:
+        return 0.0
+    return 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / words)
+
+
+def draft_words(draft: str) -> List[str]:
+    return _WORD_RE.findall(draft.lower())
+
+
+def draft_fingerprint(draft: str, words: Optional[List[str]] = None) -> str:
+    """Hash of the draft's words (ignores formatting and case)."""
+    words = draft_words(draft) if words is None else words
+    return hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+
+
+def draft_metrics(
+    draft: str, target_words: int, keywords: List[str], words: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """Raw metrics plus 0-1 sub-scores for one draft."""
+    words = draft_words(draft) if words is None else words
+    n_words = len(words)
+    headings = [len(m.group(1)) for m in _HEADING_RE.finditer(draft)]
+    body = _HEADING_RE.sub("", draft)
+    paragraphs = [p for p in re.split(r"\n\s*\n", body) if p.strip()]
+    sentences = count_sentences(body)
+    syllables = count_syllables(body)
+
+    ratio = n_words / target_words if target_words else 1.0
+    vocabulary, joined = set(words), f" {' '.join(words)} "
+    found = [k for k in keywords if _keyword_found(k, vocabulary, joined)]
+    coverage = len(found) / len(keywords) if keywords else 1.0
+    flesch = _flesch(n_words, sentences, syllables)
+    repetition = repetition_ratio(words)
+
+    h2 = sum(1 for level in headings if level == 2)
+    structure = (
+        0.3 * (1.0 if headings else 0.0)
+        + 0.2 * (1.0 if headings and headings[0] == 1 else 0.0)
+        + 0.3 * min(1.0, h2 / 3)
+        + 0.2 * min(1.0, len(paragraphs) / 5)
+    )
+    readability = float(np.clip((flesch - 10) / 60, 0.0, 1.0))  # 10 (very hard) .. 70 (easy)
+
+    return {
+        "words": n_words,
+        "length_ratio": ratio,
+        "headings": len(headings),
+        "h2": h2,
+        "paragraphs": len(paragraphs),
+        "sentences": sentences,
+        "flesch": flesch,
+        "keyword_coverage": coverage,
+        "missing_keywords": [k for k in keywords if k not in found],
+        "repetition": repetition,
+        "length_score": _length_score(ratio),
+        "structure_score": structure,
+        "readability_score": readability,
+        "seo_score": 0.6 * coverage + 0.4 * min(1.0, len(headings) / 4),
+        "originality_score": float(max(0.0, 1.0 - 2 * repetition)),
+    }
+
+
+@dataclass
+class PreScore:
+    metrics: Dict[str, float]
+    fingerprint: str
+    hard_fails: List[str] = field(default_factory=list)
+    unchanged: bool = False  # same words as the previously scored draft
+
+    @property
+    def overall(self) -> float:
+        m = self.metrics
+        score = (
+            0.25 * m["length_score"]
+            + 0.25 * m["structure_score"]
+            + 0.2 * m["seo_score"]
+            + 0.15 * m["readability_score"]
+            + 0.15 * m["originality_score"]
+        )
+        # a hard fail can never look publication-ready
+        return min(score, 0.45) if self.hard_fails else score
+
+    def fields(self) -> Dict[str, object]:
+        """CriticScore fields derived from the metrics alone."""
+        m = self.metrics
+
+        def points(x: float) -> int:
+            return int(np.clip(round(1 + 9 * x), 1, 10))
+
+        return {
+            "overall_score": round(self.overall, 3),
+            "grammar_score": points(m["readability_score"]),
+            "depth_score": points(min(m["length_score"], m["originality_score"])),
+            "structure_score": points(m["structure_score"]),
+            "seo_alignment_score": points(m["seo_score"]),
+            "short_feedback": " ".join(self.hard_fails),
+        }
+
+    def summary(self) -> str:
+        """One line of measured facts for the LLM critic's prompt."""
+        m = self.metrics
+        missing = ", ".join(m["missing_keywords"][:5]) or "none"
+        return (
+            f"words {m['words']} ({m['length_ratio'] * 100:.0f}% of target), "
+            f"headings {m['headings']} (H2: {m['h2']}), paragraphs {m['paragraphs']}, "
+            f"Flesch reading ease {m['flesch']:.0f}, repeated 3-grams {m['repetition'] * 100:.0f}%, "
+            f"keyword coverage {m['keyword_coverage'] * 100:.0f}% (missing: {missing})"
+        )
+
+
+def prescore(
+    draft: str,
+    target_words: int,
+    keywords: List[str],
+    previous_fingerprint: Optional[str] = None,
+    min_length_ratio: float = 0.5,
+    max_length_ratio: float = 2.0,
+    min_keyword_coverage: float = 0.5,
+    max_repetition: float = 0.25,
+) -> PreScore:
+    """
+    Metrics plus the hard failures that make an LLM review pointless: an
+    empty draft, a length far off target, missing topic / explicit keywords,
+    heavy repetition. Missing markdown headings only lower structure_score
+    (the generator writes markdown-like plain text), and free-text
+    constraints are left to the LLM critic.
+    """
+    words = draft_words(draft)
+    metrics = draft_metrics(draft, target_words, keywords, words)
+    fails = []
+    if not metrics["words"]:
+        fails.append("The draft is empty; write the full blog.")
+    elif metrics["length_ratio"] < min_length_ratio or metrics["length_ratio"] > max_length_ratio:
+        fails.append(
+            f"Length is {metrics['words']} words against a target of {target_words}; "
+            f"{'expand' if metrics['length_ratio'] < 1 else 'cut'} it to roughly {target_words} words."
+        )
+    if keywords and metrics["keyword_coverage"] < min_keyword_coverage:
+        fails.append(f"Cover the required keywords: {', '.join(metrics['missing_keywords'][:8])}.")
+    if metrics["repetition"] > max_repetition:
+        fails.append(
+            f"{metrics['repetition'] * 100:.0f}% of phrases are repeated; remove duplicated passages."
+        )
+    fingerprint = draft_fingerprint(draft, words)
+    return PreScore(
+        metrics=metrics,
+        fingerprint=fingerprint,
+        hard_fails=fails,
+        unchanged=fingerprint == previous_fingerprint,
+    )
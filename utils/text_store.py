@@ -0,0 +1,38 @@
+"""
+Process-wide store for large text fields (research notes, drafts).
+
+Equal texts reaching many states (notes from the research store, cached LLM
+responses, a draft promoted to best_draft) are kept as one object, keyed by a
+content hash. States hold a reference; the text is released when no state
+refers to it any more. Checkpoints persist it once per content as well
+(utils/checkpoint_store.py stores blobs by hash).
+"""
+import hashlib
+import threading
+import weakref
+from typing import Optional
+
+
+class SharedText(str):
+    """A str interned by content in the text store (weak-referenceable)."""
+
+
+_texts: "weakref.WeakValueDictionary[bytes, SharedText]" = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def share_text(text: Optional[str], min_chars: int = 0) -> Optional[str]:
+    """The stored copy of `text`; short (or non-str) values pass through unchanged."""
+    if not isinstance(text, str) or isinstance(text, SharedText) or len(text) < min_chars:
+        return text
+    key = _digest(text)
+    with _lock:
+        shared = _texts.get(key)
+        if shared is None:
+            shared = _texts[key] = SharedText(text)
+    return shared
+
@@ -0,0 +1,334 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from utils.research import estimate_tokens
+
+# Span handler for the node currently running in this context. LangChain adds
+# it to every LLM / tool call made inside the node (including nested runnables).
+_active_span: ContextVar[Optional["SpanCallbackHandler"]] = ContextVar(
+    "blog_trace_span", default=None
+)
+register_configure_hook(_active_span, inheritable=True)
+
+# Nodes that run once per pipeline, not once per generate/score round; their
+# spans are left out of per-round accounting (stopping policies, model tiers).
+ONE_OFF_NODES = ("guardrails", "recall", "planner", "researcher", "seo", "archive")
+
+
+class SpanCallbackHandler(BaseCallbackHandler):
+    """Collects per-call latency, tokens, cache hits, retries, hedges and fallbacks for one node."""
+
+    def __init__(self, pricing: Dict[str, Dict[str, float]], search_cost: float):
+        self.pricing = pricing
+        self.search_cost = search_cost
+        self.calls: List[Dict[str, Any]] = []
+        self.retries = 0
+        self.hedges = 0
+        self.fallbacks = 0
+        self.degraded: List[Dict[str, str]] = []
+        self._pending: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # --- LLM calls ----------------------------------------------------------
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any) -> None:
+        text = "\n".join(str(m.content) for batch in messages for m in batch)
+        with self._lock:
+            self._pending[run_id] = {
+                "kind": "llm",
+                "model": (metadata or {}).get("ls_model_name", ""),
+                "start": time.time(),
+                "estimated_prompt_tokens": estimate_tokens(text),
+            }
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            call = self._pending.pop(run_id, None)
+        if call is None:
+            return
+        end = time.time()
+        generations = [g for batch in response.generations for g in batch]
+        cached = any((g.generation_info or {}).get("cached") for g in generations)
+
+        prompt_tokens = completion_tokens = 0
+        for g in generations:
+            usage = getattr(getattr(g, "message", None), "usage_metadata", None) or {}
+            prompt_tokens += usage.get("input_tokens", 0)
+            completion_tokens += usage.get("output_tokens", 0)
+        if not prompt_tokens and not completion_tokens:
+            usage = (response.llm_output or {}).get("token_usage", {}) or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+        estimated = not prompt_tokens and not completion_tokens
+        if estimated:
+            prompt_tokens = call.pop("estimated_prompt_tokens")
+            completion_tokens = sum(estimate_tokens(g.text) for g in generations)
+        call.pop("estimated_prompt_tokens", None)
+
+        if cached:
+            # served from the local cache: no provider tokens or cost
+            prompt_tokens = completion_tokens = 0
+        price = self.pricing.get(call["model"], {})
+        call.update(
+            end=end,
+            wall_ms=(end - call["start"]) * 1000,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_estimated=estimated and not cached,
+            cached=cached,
+            cost_usd=(
+                prompt_tokens * price.get("input", 0.0)
+                + completion_tokens * price.get("output", 0.0)
+            ) / 1_000_000,
+        )
+        with self._lock:
+            self.calls.append(call)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            call = self._pending.pop(run_id, None)
+        if call is not None:
+            call.pop("estimated_prompt_tokens", None)
+            end = time.time()
+            call.update(end=end, wall_ms=(end - call["start"]) * 1000, error=type(error).__name__)
+            with self._lock:
+                self.calls.append(call)
+
+    def on_retry(self, retry_state: Any, **kwargs: Any) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def on_call_event(self, kind: str) -> None:
+        """'retry', 'hedge' or 'fallback' from utils.resilience."""
+        with self._lock:
+            if kind == "retry":
+                self.retries += 1
+            elif kind == "hedge":
+                self.hedges += 1
+            elif kind == "fallback":
+                self.fallbacks += 1
+
+    # --- search tool calls ----------------------------------------------------
+
+    def on_tool_start(self, serialized, input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._pending[run_id] = {
+                "kind": "search",
+                "model": (serialized or {}).get("name", "search"),
+                "start": time.time(),
+            }
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            call = self._pending.pop(run_id, None)
+        if call is None:
+            return
+        end = time.time()
+        call.update(end=end, wall_ms=(end - call["start"]) * 1000, cost_usd=self.search_cost)
+        with self._lock:
+            self.calls.append(call)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.on_llm_error(error, run_id=run_id, **kwargs)
+
+
+def note_call_event(kind: str) -> None:
+    """Count a resilience event on the span of the node running in this context."""
+    handler = _active_span.get()
+    if handler is not None:
+        handler.on_call_event(kind)
+
+
+def note_degraded(step: str, fallback: str, error: BaseException) -> None:
+    """Record on the running node's span that an optional step failed and what was used instead."""
+    handler = _active_span.get()
+    if handler is not None:
+        with handler._lock:
+            handler.degraded.append(
+                {"step": step, "fallback": fallback, "error": f"{type(error).__name__}: {error}"}
+            )
+
+
+def _make_span(name: str, state: Dict[str, Any], start: float, end: float, handler: SpanCallbackHandler) -> Dict[str, Any]:
+    trace = state.get("trace") or []
+    previous_end = trace[-1]["end"] if trace else start
+    calls = sorted(handler.calls, key=lambda c: c["start"])
+    llm_calls = [c for c in calls if c["kind"] == "llm"]
+    return {
+        "node": name,
+        "iteration": state.get("iteration", 0),
+        "start": start,
+        "end": end,
+        "wall_ms": (end - start) * 1000,
+        "queue_ms": max(0.0, (start - previous_end) * 1000),
+        "llm_calls": len(llm_calls),
+        "search_calls": sum(1 for c in calls if c["kind"] == "search"),
+        "prompt_tokens": sum(c.get("prompt_tokens", 0) for c in llm_calls),
+        "completion_tokens": sum(c.get("completion_tokens", 0) for c in llm_calls),
+        "cache_hits": sum(1 for c in llm_calls if c.get("cached")),
+        "retries": handler.retries,
+        "hedges": handler.hedges,
+        "fallbacks": handler.fallbacks,
+        "degraded": list(handler.degraded),
+        "cost_usd": sum(c.get("cost_usd", 0.0) for c in calls),
+        "calls": calls,
+    }
+
+
+def _with_span(
+    name: str, state: Dict[str, Any], update: Optional[Dict[str, Any]], start: float, handler: SpanCallbackHandler
+) -> Dict[str, Any]:
+    update = dict(update or {})
+    # the span is labelled with the state as the node left it (e.g. the orchestrator's new iteration)
+    update["trace"] = [_make_span(name, {**state, **update}, start, time.time(), handler)]
+    return update
+
+
+def traced_node(
+    name: str,
+    fn: Callable,
+    pricing: Dict[str, Dict[str, float]],
+    search_cost: float = 0.0,
+) -> Callable:
+    """
+    Wrap a graph node so each execution appends a span to state['trace']:
+    wall / queue time plus per-call LLM and search stats collected through a
+    LangChain callback handler scoped to the node. The node's update carries
+    only the new span; the state's reducer appends it.
+    """
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            handler = SpanCallbackHandler(pricing, search_cost)
+            token = _active_span.set(handler)
+            start = time.time()
+            try:
+                result = await fn(state)
+            finally:
+                _active_span.reset(token)
+            return _with_span(name, state, result, start, handler)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        handler = SpanCallbackHandler(pricing, search_cost)
+        token = _active_span.set(handler)
+        start = time.time()
+        try:
+            result = fn(state)
+        finally:
+            _active_span.reset(token)
+        return _with_span(name, state, result, start, handler)
+
+    return wrapper
+
+
+# --- aggregation and export ---------------------------------------------------
+
+
+def summarize_trace(trace: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-node totals and latency percentiles."""
+    by_node: Dict[str, List[Dict[str, Any]]] = {}
+    for span in trace:
+        by_node.setdefault(span["node"], []).append(span)
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for node, spans in by_node.items():
+        walls = sorted(s["wall_ms"] for s in spans)
+        summary[node] = {
+            "runs": len(spans),
+            "wall_ms_total": sum(walls),
+            "wall_ms_p50": _percentile(walls, 0.50),
+            "wall_ms_p95": _percentile(walls, 0.95),
+            "queue_ms_total": sum(s["queue_ms"] for s in spans),
+            "llm_calls": sum(s["llm_calls"] for s in spans),
+            "search_calls": sum(s["search_calls"] for s in spans),
+            "prompt_tokens": sum(s["prompt_tokens"] for s in spans),
+            "completion_tokens": sum(s["completion_tokens"] for s in spans),
+            "cache_hits": sum(s["cache_hits"] for s in spans),
+            "retries": sum(s["retries"] for s in spans),
+            "hedges": sum(s.get("hedges", 0) for s in spans),
+            "fallbacks": sum(s.get("fallbacks", 0) for s in spans),
+            "degraded": sum(len(s.get("degraded", [])) for s in spans),
+            "cost_usd": sum(s["cost_usd"] for s in spans),
+        }
+    return summary
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def export_jsonl(trace: Iterable[Dict[str, Any]], path: Path, run_id: str = "") -> None:
+    """Append one JSON line per node span."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        for span in trace:
+            f.write(json.dumps({"run_id": run_id, **span}) + "\n")
+
+
+def export_chrome_trace(trace: Iterable[Dict[str, Any]], path: Path, run_id: str = "run") -> None:
+    """
+    Write a Chrome trace-event file (open in chrome://tracing or Perfetto):
+    one complete ('X') event per node, with nested LLM / search calls.
+    """
+    events: List[Dict[str, Any]] = []
+    for span in trace:
+        args = {k: v for k, v in span.items() if k not in ("calls", "start", "end", "node")}
+        events.append({
+            "name": span["node"], "cat": "node", "ph": "X", "pid": run_id, "tid": "pipeline",
+            "ts": span["start"] * 1e6, "dur": span["wall_ms"] * 1e3, "args": args,
+        })
+        for call in span["calls"]:
+            if "end" not in call:
+                continue
+            events.append({
+                "name": f"{call['kind']}:{call['model']}", "cat": call["kind"], "ph": "X",
+                "pid": run_id, "tid": f"{span['node']} calls",
+                "ts": call["start"] * 1e6, "dur": call["wall_ms"] * 1e3,
+                "args": {k: v for k, v in call.items() if k not in ("start", "end")},
+            })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+
+def trace_summary_table(trace: Iterable[Dict[str, Any]]):
+    """rich Table with one row per node."""
+    from rich.table import Table
+
+    table = Table(show_header=True, header_style="bold magenta")
+    for column in ("Node", "Runs", "Total", "p95", "Queue", "LLM", "Search",
+                   "Tokens in/out", "Cache hits", "Retries", "Cost"):
+        table.add_column(column, justify="left" if column == "Node" else "right")
+
+    summary = summarize_trace(trace)
+    for node, s in sorted(summary.items(), key=lambda item: -item[1]["wall_ms_total"]):
+        table.add_row(
+            node,
+            str(s["runs"]),
+            f"{s['wall_ms_total'] / 1000:.2f}s",
+            f"{s['wall_ms_p95'] / 1000:.2f}s",
+            f"{s['queue_ms_total'] / 1000:.2f}s",
+            str(s["llm_calls"]),
+            str(s["search_calls"]),
+            f"{s['prompt_tokens']}/{s['completion_tokens']}",
+            str(s["cache_hits"]),
+            str(s["retries"]),
+            f"${s['cost_usd']:.4f}",
+        )
+    return table